@@ -9,6 +9,7 @@ import json
 from datetime import datetime
 from pathlib import Path
 from openai import OpenAI
+from llm_cache import cached_chat
 
 # === 🔑 OpenAI API Key 로드 ===
 openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -51,15 +52,15 @@ prompt = f"""
 """
 
 try:
-    response = client.chat.completions.create(
+    messages = [
+        {"role": "system", "content": "당신은 정치사회 트렌드 전문가입니다."},
+        {"role": "user", "content": prompt}
+    ]
+    insight_text = cached_chat("gpt-4o-mini", messages, 0.5, lambda: client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "당신은 정치사회 트렌드 전문가입니다."},
-            {"role": "user", "content": prompt}
-        ],
+        messages=messages,
         temperature=0.5
-    )
-    insight_text = response.choices[0].message.content.strip()
+    ).choices[0].message.content.strip())
 except Exception as e:
     insight_text = f"⚠️ OpenAI API 호출 실패: {e}"
 
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+llm_cache.py
+LLM 프롬프트-응답 캐시 (SQLite) — 검사지_통합/graph/llm_cache.py 구현을 그대로 불러와 사용
+
+노드들이 스크립트로 단독 실행되므로(from llm_cache import cached_chat) 패키지 import 대신 파일 경로로 불러온다.
+기본 저장 위치만 이 템플릿의 data/cache/llm_cache.sqlite (LLM_CACHE_PATH를 같게 지정하면 두 파이프라인이 공유)
+설정 환경 변수(LLM_CACHE_TTL / LLM_CACHE_MAX / LLM_CACHE_MAX_BYTES / LLM_CACHE_BYPASS)는 공용 모듈 설명 참고
+"""
+
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+_SHARED = Path(__file__).resolve().parents[3] / "검사지_통합" / "graph" / "llm_cache.py"
+_NAME = "nh_shared_llm_cache"
+
+_impl = sys.modules.get(_NAME)
+if _impl is None:
+    _spec = importlib.util.spec_from_file_location(_NAME, _SHARED)
+    _impl = importlib.util.module_from_spec(_spec)
+    sys.modules[_NAME] = _impl
+    _spec.loader.exec_module(_impl)
+    if not os.getenv("LLM_CACHE_PATH"):
+        _impl.CACHE_PATH = Path(__file__).resolve().parents[2] / "data" / "cache" / "llm_cache.sqlite"
+
+CACHE_PATH = _impl.CACHE_PATH
+LLMCache = _impl.LLMCache
+bypass_env = _impl.bypass_env
+cache_key = _impl.cache_key
+cached_chat = _impl.cached_chat
+get_cache = _impl.get_cache
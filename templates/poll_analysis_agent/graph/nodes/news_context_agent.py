@@ -10,6 +10,7 @@ from datetime import datetime
 from bs4 import BeautifulSoup
 import requests
 from openai import OpenAI
+from llm_cache import cached_chat
 
 # === 기본 경로 설정 ===
 BASE_DIR = r"D:\ai-edu-stack\templates\poll_analysis_agent"
@@ -61,12 +62,12 @@ prompt = f"""
 """
 
 try:
-    response = client.chat.completions.create(
+    messages = [{"role": "user", "content": prompt}]
+    summary = cached_chat("gpt-4o-mini", messages, 0.5, lambda: client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+        messages=messages,
         temperature=0.5
-    )
-    summary = response.choices[0].message.content.strip()
+    ).choices[0].message.content.strip())
 except Exception as e:
     summary = f"⚠️ AI 요약 중 오류 발생: {e}"
 
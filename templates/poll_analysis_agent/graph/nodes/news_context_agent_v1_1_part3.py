@@ -9,6 +9,7 @@ AI 여론 자동 분석 (v1.1)
 import os, json
 from pathlib import Path
 from openai import OpenAI
+from llm_cache import cached_chat
 
 # === 경로 설정 ===
 BASE_DIR = Path(__file__).resolve().parent
@@ -57,12 +58,12 @@ prompt = f"""
 
 # === 2️⃣ AI 스크립트 생성 ===
 print("🧠 유튜브 해설 스크립트 생성 중...")
-response = client.chat.completions.create(
+messages = [{"role": "user", "content": prompt}]
+script_text = cached_chat("gpt-4o-mini", messages, 0.7, lambda: client.chat.completions.create(
     model="gpt-4o-mini",
-    messages=[{"role": "user", "content": prompt}],
+    messages=messages,
     temperature=0.7
-)
-script_text = response.choices[0].message.content.strip()
+).choices[0].message.content.strip())
 
 # === 3️⃣ 자막 문장 분리 ===
 subtitles = []
@@ -9,6 +9,7 @@ import sys
 sys.stdout.reconfigure(encoding='utf-8')
 from datetime import datetime
 import openai
+from llm_cache import cached_chat
 
 # === 기본 설정 ===
 BASE_DIR = r"D:\ai-edu-stack\templates\poll_analysis_agent"
@@ -46,15 +47,14 @@ prompt_kr = f"""
 {script_text}
 """
 
-response_kr = openai.ChatCompletion.create(
+messages_kr = [
+    {"role": "system", "content": "당신은 AI 이미지 생성용 프롬프트 디자이너입니다."},
+    {"role": "user", "content": prompt_kr}
+]
+prompt_kr_text = cached_chat("gpt-4o-mini", messages_kr, None, lambda: openai.ChatCompletion.create(
     model="gpt-4o-mini",
-    messages=[
-        {"role": "system", "content": "당신은 AI 이미지 생성용 프롬프트 디자이너입니다."},
-        {"role": "user", "content": prompt_kr}
-    ]
-)
-
-prompt_kr_text = response_kr["choices"][0]["message"]["content"].strip()
+    messages=messages_kr
+)["choices"][0]["message"]["content"].strip())
 
 # === 2️⃣ 영어로 자연스럽게 번역 (Flux 호환형) ===
 prompt_en = f"""
@@ -65,15 +65,14 @@ Korean prompt:
 {prompt_kr_text}
 """
 
-response_en = openai.ChatCompletion.create(
+messages_en = [
+    {"role": "system", "content": "You are a professional AI image prompt translator for diffusion models."},
+    {"role": "user", "content": prompt_en}
+]
+prompt_en_text = cached_chat("gpt-4o-mini", messages_en, None, lambda: openai.ChatCompletion.create(
     model="gpt-4o-mini",
-    messages=[
-        {"role": "system", "content": "You are a professional AI image prompt translator for diffusion models."},
-        {"role": "user", "content": prompt_en}
-    ]
-)
-
-prompt_en_text = response_en["choices"][0]["message"]["content"].strip()
+    messages=messages_en
+)["choices"][0]["message"]["content"].strip())
 
 # === 3️⃣ 파일 저장 ===
 with open(PROMPT_KR_PATH, "w", encoding="utf-8") as f:
@@ -10,6 +10,7 @@ import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from openai import OpenAI
+from llm_cache import cached_chat
 
 # === 🔑 OpenAI API Key 로드 ===
 openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -70,15 +71,15 @@ prompt = f"""
 """
 
 try:
-    response = client.chat.completions.create(
+    messages = [
+        {"role": "system", "content": "당신은 정치 여론 데이터를 분석하는 AI 전문가입니다."},
+        {"role": "user", "content": prompt}
+    ]
+    summary_text = cached_chat("gpt-4o-mini", messages, 0.3, lambda: client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "당신은 정치 여론 데이터를 분석하는 AI 전문가입니다."},
-            {"role": "user", "content": prompt}
-        ],
+        messages=messages,
         temperature=0.3
-    )
-    summary_text = response.choices[0].message.content.strip()
+    ).choices[0].message.content.strip())
 except Exception as e:
     summary_text = f"⚠️ OpenAI API 호출 실패: {e}"
 
@@ -1,6 +1,7 @@
 # graph/nodes/visual_generator.py
 import os
 import openai
+from llm_cache import cached_chat
 import json
 from datetime import datetime
 
@@ -52,13 +53,12 @@ def generate_visual_prompts():
 {script_text}
 """
 
-    response = openai.ChatCompletion.create(
+    messages = [{"role": "user", "content": prompt}]
+    json_text = cached_chat("gpt-4o-mini", messages, 0.8, lambda: openai.ChatCompletion.create(
         model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+        messages=messages,
         temperature=0.8
-    )
-
-    json_text = response["choices"][0]["message"]["content"]
+    )["choices"][0]["message"]["content"])
 
     # 결과 저장
     output_path = os.path.join(output_dir, f"visual_prompts_{datetime.now().strftime('%Y-%m-%d')}.json")
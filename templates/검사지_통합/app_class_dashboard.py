@@ -2,9 +2,12 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
+import os
 import time
 from pathlib import Path
-from graph.flow.pipeline_graph import run_graph
+from graph.batch_runner import default_workers
+from graph.flow.pipeline_graph import interpret_and_report_iter, run_graph_many
+from graph.record_store import get_store
 
 # === 페이지 설정 ===
 st.set_page_config(page_title="AI 교사 도우미 - 반 전체 대시보드", layout="wide")
@@ -19,71 +22,93 @@ pdf_files = sorted(list(neuro_dir.glob("*.pdf")))
 st.info(f"📘 Forms CSV: `{forms_csv}`")
 st.write(f"🧾 감지된 PDF 파일 수: {len(pdf_files)}")
 
+# === 병렬 처리 설정 ===
+workers = st.sidebar.slider("병렬 작업 수 (프로세스)", 1, os.cpu_count() or 1, min(default_workers(), os.cpu_count() or 1))
+timeout = st.sidebar.number_input("학생당 제한 시간(초, 0=무제한)", min_value=0, value=0, step=30)
+
+# === 저장된 결과 (지난 실행, CSV 재분석 없이 DB 조회) ===
+store = get_store()
+if store.path.exists():
+    with st.expander("💾 저장된 반 전체 결과", expanded=False):
+        saved = store.class_frame()
+        if len(saved):
+            st.dataframe(saved, use_container_width=True)
+        else:
+            st.caption("아직 저장된 결과가 없습니다.")
+
 # === 실행 버튼 ===
 if st.button("🚀 반 전체 리포트 생성 시작", type="primary"):
-    results = []
     progress = st.progress(0)
     total = len(pdf_files)
     start_time = time.time()
 
-    # --- 여러 학생 파일 순회 ---
-    for idx, pdf_path in enumerate(pdf_files, 1):
-        st.write(f"처리중: {pdf_path.name}")
-        try:
-            state = run_graph(forms_csv, str(pdf_path))
-
-            # 안전 접근 함수 정의
-            def _safe_get(obj, key, default=None):
-                """dict 또는 객체 모두 안전하게 접근"""
-                if isinstance(obj, dict):
-                    return obj.get(key, default)
-                return getattr(obj, key, default)
-
-            # LangGraph 반환형에 관계없이 안전 접근
-            report = _safe_get(state, "report", {})
-            neuro = _safe_get(state, "neuro", {})
-            analysis = _safe_get(state, "analysis", {})
-            student = _safe_get(state, "student", {})
-
-            sid = _safe_get(student, "student_id", "?")
-            name = _safe_get(student, "name", pdf_path.stem)
-            grade = _safe_get(student, "grade", "-")
-            report_path = _safe_get(report, "md", None)
-            analysis_text = _safe_get(analysis, "summary", "")
-
-            theta = _safe_get(neuro, "theta_rel_open", 0)
-            betaL = _safe_get(neuro, "betaL_rel_open", 0)
-            betaH = _safe_get(neuro, "betaH_rel_open", 0)
-            smr = _safe_get(neuro, "smr_rel_open", 0)
-
-            results.append({
-                "ID": sid,
-                "이름": name,
-                "학년": grade,
-                "Theta": theta,
-                "BetaL": betaL,
-                "BetaH": betaH,
-                "SMR": smr,
-                "AI 요약": analysis_text or "(요약 없음)",
-                "리포트": report_path or ""
-            })
-
-        except Exception as e:
-            results.append({
+    # 안전 접근 함수 정의
+    def _safe_get(obj, key, default=None):
+        """dict 또는 객체 모두 안전하게 접근"""
+        if isinstance(obj, dict):
+            return obj.get(key, default)
+        return getattr(obj, key, default)
+
+    def _row(pdf_path, state):
+        # LangGraph 반환형에 관계없이 안전 접근
+        report = _safe_get(state, "report", {})
+        neuro = _safe_get(state, "neuro", {})
+        analysis = _safe_get(state, "analysis", {})
+        student = _safe_get(state, "student", {})
+        return {
+            "ID": _safe_get(student, "student_id", "?"),
+            "이름": _safe_get(student, "name", pdf_path.stem),
+            "학년": _safe_get(student, "grade", "-"),
+            "Theta": _safe_get(neuro, "theta_rel_open", 0),
+            "BetaL": _safe_get(neuro, "betaL_rel_open", 0),
+            "BetaH": _safe_get(neuro, "betaH_rel_open", 0),
+            "SMR": _safe_get(neuro, "smr_rel_open", 0),
+            "AI 요약": _safe_get(analysis, "summary", "") or "(해석 대기 중)",
+            "리포트": _safe_get(report, "md", None) or ""
+        }
+
+    # 학생 행은 끝나는 대로 표에 바로 반영 (전체가 끝날 때까지 기다리지 않음)
+    rows = {}
+    status_text = st.empty()
+    st.subheader("📋 학생별 요약표")
+    table_placeholder = st.empty()
+
+    def _refresh():
+        table_placeholder.dataframe(pd.DataFrame(list(rows.values())), use_container_width=True)
+
+    # --- 1단계: 여러 학생 파일 병렬 처리 (AI 해석은 뒤에서 일괄 요청) ---
+    done = []
+    stream = run_graph_many(forms_csv, [str(p) for p in pdf_files],
+                            workers=workers, timeout=timeout or None, ordered=False, defer_llm=True)
+    for idx, (pdf_str, state, error) in enumerate(stream, 1):
+        pdf_path = Path(pdf_str)
+        status_text.write(f"처리 완료: {pdf_path.name} ({idx}/{total})")
+        if error is not None:
+            rows[pdf_path] = {
                 "ID": "에러",
                 "이름": pdf_path.name,
                 "학년": "-",
-                "AI 요약": str(e)
-            })
-
-        progress.progress(idx / total)
-
+                "AI 요약": str(error)
+            }
+        else:
+            done.append((pdf_path, state))
+            rows[pdf_path] = _row(pdf_path, state)
+        _refresh()
+        progress.progress(idx / total * 0.7)
+
+    # --- 2단계: AI 교사 도우미 해석 (동시 요청 + 속도 제한) → 끝나는 학생부터 리포트 생성 ---
+    status_text.write(f"🧠 AI 해석 요청 중... ({len(done)}명)")
+    for n, (i, state) in enumerate(interpret_and_report_iter([state for _, state in done]), 1):
+        pdf_path = done[i][0]
+        rows[pdf_path] = _row(pdf_path, state)
+        status_text.write(f"🧠 AI 해석 완료: {rows[pdf_path]['이름']} ({n}/{len(done)})")
+        _refresh()
+        progress.progress(0.7 + 0.3 * n / len(done))
+    progress.progress(1.0)
+
+    results = list(rows.values())
     st.success(f"✅ 완료! {len(results)}명 분석 완료 (총 {time.time()-start_time:.1f}초)")
-
-    # === 결과 테이블 ===
     df = pd.DataFrame(results)
-    st.subheader("📋 학생별 요약표")
-    st.dataframe(df, use_container_width=True)
 
     # === 뇌파 시각화 ===
     st.subheader("📈 주요 뇌파 지표 비교 (Theta, BetaL, BetaH, SMR)")
@@ -2,11 +2,13 @@
 import koreanize_matplotlib
 import streamlit as st
 import pandas as pd
+import json
 import time
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 from pathlib import Path
-from graph.flow.pipeline_graph import run_graph
+from graph.flow.pipeline_graph import NODES as GRAPH_NODES, run_graph
+from graph.tracing import chrome_trace, get_tracer, node_timings
 
 st.set_page_config(page_title="AI 교사 도우미 대시보드", layout="wide")
 st.title("🧠 AI 교사 도우미 시각화 대시보드")
@@ -22,14 +24,8 @@ with col1:
 with col2:
     st.info(f"🧾 Neuro PDF: `{neuro_pdf}`")
 
-NODES = [
-    "ingest_inputs",
-    "validate_schema",
-    "score_engine",
-    "neuro_parse",
-    "ai_teacher_helper",
-    "generate_report"
-]
+# 진행 표시 노드 = 그래프에 등록된 노드 (실행 순서)
+NODES = [name for name, _ in GRAPH_NODES]
 
 def show_progress(status_dict):
     for node in NODES:
@@ -50,41 +46,79 @@ if st.button("🚀 파이프라인 실행 시작", type="primary"):
     st.subheader("📊 노드별 진행 상태")
     progress_placeholder = st.empty()
 
-    status = {node: "⚪ 대기중" for node in NODES}
-
-    def update_status(node_name, emoji):
-        status[node_name] = f"{emoji} {node_name}"
+    status = {node: f"⚪ {node}" for node in NODES}
+    status[NODES[0]] = f"🟢 {NODES[0]} 실행 중"
+    with progress_placeholder.container():
+        show_progress(status)
+    progress = st.progress(0.0)
+    partial_placeholder = st.empty()
+
+    def on_event(node, update, state):
+        # 노드가 끝날 때마다 실제 실행 시간으로 상태 갱신 + 다음 노드 표시
+        for span in node_timings(update.get("log")):
+            status[node] = f"✅ {node} ({span['wall_s']:.2f}초)"
+        if node in NODES:
+            i = NODES.index(node)
+            if i + 1 < len(NODES):
+                status[NODES[i + 1]] = f"🟢 {NODES[i + 1]} 실행 중"
+            progress.progress((i + 1) / len(NODES))
         with progress_placeholder.container():
             show_progress(status)
-            time.sleep(0.2)
+        # 부분 상태 미리보기 (해석이 끝나면 리포트 생성 전에 먼저 표시)
+        if "analysis" in update:
+            partial_placeholder.info(f"🧩 AI 해석 도착: {state.analysis.get('summary', '')[:200]}...")
 
-    node_times = {}
     start_total = time.time()
-
-    for node in NODES:
-        t0 = time.time()
-        update_status(node, "🟢")
-        time.sleep(0.3)
-        node_times[node] = round(time.time() - t0, 2)
-
-    final_state = run_graph(forms_csv, neuro_pdf)
+    try:
+        final_state = run_graph(forms_csv, neuro_pdf, on_event=on_event)
+    except Exception as e:
+        # 실패한 노드 구간은 상태 log에 남지 않음 → 추적 버퍼(get_tracer)에서 찾아 표시
+        failed = next((s for s in reversed(list(get_tracer().spans))
+                       if not s.get("ok") and s.get("start", 0) >= start_total), None)
+        partial_placeholder.empty()
+        if failed is not None:
+            node = failed["node"]
+            status[node] = f"❌ {node} ({failed['wall_s']:.2f}초) — {failed['error']}"
+            with progress_placeholder.container():
+                show_progress(status)
+            with st.expander(f"❌ {node} 오류 상세"):
+                st.code(failed.get("traceback") or failed["error"])
+        st.error(f"❌ 파이프라인 실패 ({time.time() - start_total:.1f}초): {type(e).__name__}: {e}")
+        st.stop()
     elapsed_total = time.time() - start_total
+    partial_placeholder.empty()
     st.success(f"✅ 완료! ({elapsed_total:.1f}초 소요)")
 
+    # 실제 노드 추적 기록 (graph/tracing.py가 상태 log에 남긴 trace 항목)
+    log = final_state.log
+    spans = node_timings(log)
+
     # 노드별 실행시간 시각화
     st.subheader("⏱️ 노드별 실행 시간")
-    df_time = pd.DataFrame(list(node_times.items()), columns=["노드", "실행시간(초)"])
-    fig, ax = plt.subplots(figsize=(6, 3))
-    ax.barh(df_time["노드"], df_time["실행시간(초)"], color="#6fa8dc")
-    ax.set_xlabel("실행시간(초)")
-    ax.set_title("노드별 실행시간 비교")
-    st.pyplot(fig)
-    st.dataframe(df_time, use_container_width=True)
+    df_time = pd.DataFrame([{
+        "노드": s["node"],
+        "실행시간(초)": s["wall_s"],
+        "CPU(초)": s["cpu_s"],
+        "최대 RSS 증가(MB)": (s["peak_rss_delta"] or 0) / 1e6,
+    } for s in spans])
+    if not df_time.empty:
+        fig, ax = plt.subplots(figsize=(6, 3))
+        ax.barh(df_time["노드"], df_time["실행시간(초)"], color="#6fa8dc", label="wall")
+        ax.barh(df_time["노드"], df_time["CPU(초)"], color="#f6b26b", height=0.4, label="CPU")
+        ax.set_xlabel("실행시간(초)")
+        ax.set_title("노드별 실행시간 비교")
+        ax.legend()
+        st.pyplot(fig)
+        st.dataframe(df_time, use_container_width=True)
+        st.download_button("⬇️ Chrome trace (chrome://tracing)",
+                           data=json.dumps(chrome_trace(spans), ensure_ascii=False),
+                           file_name="trace.json", mime="application/json")
 
     # 로그 표시
-    if hasattr(final_state, "logs"):
+    if log:
         st.subheader("📜 실행 로그")
-        log_data = pd.DataFrame(final_state.logs)
+        log_data = pd.DataFrame([{"event": item["event"], "ts": item.get("ts"), "data": str(item["data"])}
+                                 for item in log])
         st.dataframe(log_data)
 
     # AI 분석 요약 시각화
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+bench_bq2_tokenizer.py
+BQ2 텍스트 파싱 마이크로 벤치마크 (이전 호출마다 정규식 컴파일 방식 vs 공용 토크나이저)
+
+실행: python -m benchmarks.bench_bq2_tokenizer --corpus outputs/debug --repeat 2000
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+from graph.bq2_tokenizer import BANDS, band_pairs, metric_records, scan
+
+# PDF 블록에서 라벨과 값이 다른 줄에 있는 경우 (page.get_text("blocks") 형태)
+SAMPLE_BLOCKS = [
+    "체중\n45.2", "측정일\n2024.03.05", "생년월일\n2012.07.14",
+    "좌뇌 52.1\n우뇌\n47.9", "Hz\n10.5", "절대세기 원시뇌파\n12.3",
+]
+# PDF 텍스트 층에서 밴드 라벨과 좌/우 값이 다른 줄에 있는 경우
+SAMPLE_LABEL_LINES = "Theta\n21.1 22.6\nBetaL\n9.0 9.4"
+
+
+# === 이전 구현 (neuro_parse / batch_extract 에서 발췌) ===
+def legacy_parse_pairs(txt):
+    pat = re.compile(
+        r"(Theta|세타|θ)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)|"
+        r"(BetaL|저\s*베타|βL)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)|"
+        r"(BetaH|고\s*베타|βH)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)|"
+        r"(SMR|에스엠알|Sensorimotor)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)",
+        re.I
+    )
+    result = {}
+    for m in pat.finditer(txt):
+        g = [x for x in m.groups() if x]
+        label, nums = None, []
+        for x in g:
+            if re.search(r"[A-Za-z가-힣β]", x):
+                label = x
+            else:
+                nums.append(float(x))
+        if label and len(nums) >= 2:
+            result[label.lower()] = tuple(nums[:2])
+    return result
+
+
+def legacy_compact_table(text):
+    label_line = None
+    for ln in text.splitlines():
+        if re.search(r"(Delta|델타).*(Theta|세타|θ).*(Alpha|알파).*(SMR|에스엠알).*(BetaL|저\s*베타|βL).*(BetaH|고\s*베타|βH)", ln, re.I):
+            label_line = ln
+            break
+    if not label_line:
+        return {}
+    order = [t for t in label_line.split() if re.search(r"theta|세타|betal|betah|smr", t, re.I)]
+    lines = text.splitlines()
+    idx = lines.index(label_line)
+    tail = re.sub(r"(\d+\.\d{1,2})(?=\d)", r"\1 ", "\n".join(lines[idx + 1: idx + 6]))
+    vals = [float(s) for s in re.findall(r"[+-]?\d+(?:\.\d+)?", tail)]
+    return {lab: (vals[2 * i], vals[2 * i + 1]) for i, lab in enumerate(order) if 2 * i + 1 < len(vals)}
+
+
+def legacy_metrics(blocks):
+    # 이전 extract_metrics_from_pdf: PDF 텍스트 블록마다 패턴 적용
+    if isinstance(blocks, str):
+        blocks = blocks.splitlines()
+    lines = [ln for ln in blocks if re.search(r"[가-힣A-Za-z]", ln) and re.search(r"\d", ln)]
+    pattern = re.compile(r"([A-Za-z가-힣\s]+)[=:：]?\s*([\d\.]+)")
+    out = []
+    for line in lines:
+        for key, val in pattern.findall(line):
+            if len(key.strip()) > 1 and re.search(r"\d", val):
+                out.append({"metric": key.strip(), "value": val.strip()})
+    return out
+
+
+def legacy_all(text):
+    # 이전: 텍스트를 경로별로 여러 번 스캔
+    legacy_parse_pairs(text)
+    legacy_compact_table(text)
+    legacy_metrics(text)
+
+
+def new_all(text):
+    # 현재: 1회 스캔으로 밴드 값 + 일반 지표
+    scan(text)
+
+
+def _metric_names(rows):
+    band_columns = {f"{side}_{band}_{kind}" for band in BANDS for side in "LR" for kind in ("abs", "rel")}
+    return {r["metric"] for r in rows if r["metric"] not in band_columns}
+
+
+def check_parity(corpus):
+    """이전/현재 일반 지표명 집합이 같은지 (줄 단위 블록, 문서 1블록, 줄바꿈 포함 샘플 블록)"""
+    cases = [SAMPLE_BLOCKS]
+    for text in corpus:
+        cases.extend([text.splitlines(), [text]])
+    for blocks in cases:
+        old, new = _metric_names(legacy_metrics(blocks)), _metric_names(metric_records(blocks))
+        assert old == new, f"지표명 불일치: 이전에만 {sorted(old - new)} / 현재에만 {sorted(new - old)}"
+    print(f"지표명 일치 확인: {len(cases)}건")
+
+
+def _label_lines(pairs):
+    # {band: (L, R)} → "Theta\n21.1 22.6\n..." (라벨만 있는 줄 + 값 줄)
+    return "\n".join(f"{band}\n{left} {right}" for band, (left, right) in pairs.items())
+
+
+def check_label_lines(corpus):
+    """라벨만 있는 줄 다음 줄의 값도 같은 밴드 값으로 읽는지 (샘플 텍스트 덤프의 밴드 값을 줄 나눔 형태로 다시 씀)"""
+    expected = {"Theta": (21.1, 22.6), "BetaL": (9.0, 9.4)}
+    got = band_pairs(scan(SAMPLE_LABEL_LINES).bands)
+    assert got == expected, f"라벨/값 줄 나눔 파싱 실패: {got}"
+    for text in corpus:
+        pairs = band_pairs(scan(text).bands)
+        assert pairs, "샘플 덤프에서 밴드 값을 찾지 못함"
+        got = band_pairs(scan(_label_lines(pairs)).bands)
+        assert got == pairs, f"라벨/값 줄 나눔 파싱 불일치: {got} != {pairs}"
+    print(f"라벨/값 줄 나눔 확인: {len(corpus) + 1}건")
+
+
+def _time(fn, corpus, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - t0
+
+
+def bench(corpus_dir: str, repeat: int):
+    corpus = [p.read_text(encoding="utf-8") for p in sorted(Path(corpus_dir).glob("*.txt"))]
+    if not corpus:
+        print(f"❌ 텍스트 덤프 없음: {corpus_dir}")
+        return
+
+    check_parity(corpus)
+    check_label_lines(corpus)
+    t_old = _time(legacy_all, corpus, repeat)
+    t_new = _time(new_all, corpus, repeat)
+    n = repeat * len(corpus)
+    print(f"문서 {len(corpus)}개 x {repeat}회")
+    print(f"이전 : {t_old:.3f}s | 문서당 {t_old / n * 1e6:.1f}µs")
+    print(f"현재 : {t_new:.3f}s | 문서당 {t_new / n * 1e6:.1f}µs")
+    print(f"밴드 레코드 수(첫 문서): {len(metric_records(corpus[0]))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default="outputs/debug")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    bench(args.corpus, args.repeat)
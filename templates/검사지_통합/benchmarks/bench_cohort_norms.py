@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+bench_cohort_norms.py
+새 학생이 채점될 때마다 코호트 백분위 구하기 (매번 전체 groupby rank vs 코호트 규준 증분 추가 + 이분 탐색)
+
+실행: python -m benchmarks.bench_cohort_norms --students 20000 --arrivals 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from graph.cohort_norms import CohortNorms
+
+METRICS = ["attention_index", "multicultural_adaptation", "study_habit"]
+
+
+def _population(rng, n: int, start: int = 0) -> pd.DataFrame:
+    df = pd.DataFrame(rng.normal(50, 15, (n, len(METRICS))), columns=METRICS,
+                      index=[f"S{i:06d}" for i in range(start, start + n)])
+    df["grade"] = rng.integers(1, 7, n).astype(str)
+    df["school"] = rng.choice([f"학교{k}" for k in range(20)], n)
+    df["multicultural"] = rng.choice(["Y", "N"], n)
+    return df
+
+
+def _legacy_percentiles(df: pd.DataFrame, sid: str):
+    """이전 방식: 전체 프레임에서 코호트별 rank(pct=True) 다시 계산"""
+    out = {}
+    for dim in ("grade", "school", "multicultural"):
+        ranks = df.groupby(dim)[METRICS].rank(pct=True) * 100.0
+        out[dim] = ranks.loc[sid].to_dict()
+    return out
+
+
+def bench(students: int, arrivals: int):
+    rng = np.random.default_rng(0)
+    base = _population(rng, students)
+    new = _population(rng, arrivals, start=students)
+
+    df = base.copy()
+    t0 = time.perf_counter()
+    for sid, row in new.iterrows():
+        df.loc[sid] = row
+        _legacy_percentiles(df, sid)
+    before = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    norms = CohortNorms()
+    norms.update(base, metrics=METRICS)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for sid, row in new.iterrows():
+        norms.add(sid, row.to_dict(), METRICS)
+        norms.student_percentiles(sid)
+    after = time.perf_counter() - t0
+
+    # 검증: 마지막 학생의 학년 백분위 (동점이 없으면 rank(pct) - 0.5/n 과 같음)
+    sid = new.index[-1]
+    grade = df[df["grade"] == df.loc[sid, "grade"]]
+    exp = (grade["attention_index"] < df.loc[sid, "attention_index"]).sum() + 0.5
+    got = norms.student_percentiles(sid)["attention_index"]["grade"]
+    assert abs(got - exp / len(grade) * 100.0) < 1e-9
+
+    print(f"기존 학생: {students:,} / 새로 채점된 학생: {arrivals}")
+    print(f"이전 (도착마다 전체 rank 재계산): {before:.3f}s (학생당 {before / arrivals * 1000:.2f}ms)")
+    print(f"규준 최초 구성                  : {build:.3f}s")
+    print(f"규준 (증분 추가 + 백분위 조회)  : {after:.3f}s (학생당 {after / arrivals * 1000:.3f}ms)")
+    if after > 0:
+        print(f"속도 향상                       : x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--arrivals", type=int, default=500)
+    args = parser.parse_args()
+    bench(args.students, args.arrivals)
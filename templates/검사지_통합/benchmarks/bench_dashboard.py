@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+bench_dashboard.py
+요약 대시보드 재실행 비용 비교 (매번 CSV 읽기 + describe + CSV 직렬화 vs 캐시 + 미리 계산된 요약 집계)
+
+Streamlit 없이 대시보드 한 번 실행에 해당하는 작업만 재현한다.
+실행: python -m benchmarks.bench_dashboard --rows 50000 --reruns 20
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from graph.score_store import describe_summary, load_stats, write_stats
+
+METRICS = ["attention_index", "emotional_stability", "sleep_hygiene", "cognition_index", "stress_index",
+           "theta_beta_ratio", "smr_ratio", "alpha_asymmetry", "beta_delta_ratio", "noise_index"]
+
+
+def _legacy_rerun(path: Path, student: str):
+    df = pd.read_csv(path)
+    df.select_dtypes(include="number").describe().T
+    df[df["student_name"] == student]
+    df.to_csv(index=False, encoding="utf-8-sig")
+
+
+def bench(rows: int, reruns: int):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(50, 15, (rows, len(METRICS))), columns=METRICS)
+    df.insert(0, "student_name", [f"학생{i}" for i in range(rows)])
+    path = Path(tempfile.mkdtemp(prefix="nh_dash_")) / "neuro_scored.csv"
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+    write_stats(df, path)
+    picks = [f"학생{i}" for i in rng.integers(0, rows, reruns)]
+
+    t0 = time.perf_counter()
+    for student in picks:
+        _legacy_rerun(path, student)
+    before = time.perf_counter() - t0
+
+    # 첫 실행: 읽기 + 요약 파일 + 학생 색인 (이후 실행은 캐시 적중 → 행 선택만)
+    t0 = time.perf_counter()
+    cached = pd.read_csv(path)
+    stats = describe_summary(load_stats(path))
+    students = dict(cached.groupby("student_name", sort=False).indices)
+    first = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for student in picks:
+        cached.iloc[students[student]]
+    after = time.perf_counter() - t0
+
+    exp = df.select_dtypes(include="number").describe().T
+    assert np.allclose(stats[["mean", "std"]].to_numpy(), exp[["mean", "std"]].to_numpy())
+    print(f"행 수: {rows:,} / 재실행 {reruns}회")
+    print(f"이전 (매번 읽기 + describe + CSV 생성): {before:.3f}s (회당 {before / reruns * 1000:.1f}ms)")
+    print(f"캐시 (첫 실행)                      : {first:.3f}s")
+    print(f"캐시 (이후 재실행)                  : {after:.4f}s (회당 {after / reruns * 1000:.2f}ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+    bench(args.rows, args.reruns)
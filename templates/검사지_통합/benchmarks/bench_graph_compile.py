@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+bench_graph_compile.py
+학생 1명당 그래프 생성/컴파일 오버헤드 비교 (매번 compile vs 캐시 재사용)
+
+실행: python -m benchmarks.bench_graph_compile --students 300
+"""
+
+import argparse
+import time
+
+from graph.flow import pipeline_graph
+
+
+def bench(students: int):
+    # 이전 방식: 학생마다 StateGraph 생성 + 노드 등록 + compile
+    t0 = time.perf_counter()
+    for _ in range(students):
+        pipeline_graph.build_graph().compile()
+    before = time.perf_counter() - t0
+
+    # 현재 방식: 최초 1회 compile 후 재사용
+    pipeline_graph.invalidate_graph()
+    t0 = time.perf_counter()
+    for _ in range(students):
+        pipeline_graph.get_app()
+    after = time.perf_counter() - t0
+
+    print(f"학생 수: {students}")
+    print(f"매번 compile : 총 {before:.3f}s | 학생당 {before / students * 1000:.3f}ms")
+    print(f"캐시 재사용  : 총 {after:.3f}s | 학생당 {after / students * 1000:.3f}ms")
+    if after > 0:
+        print(f"속도 향상    : x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=300)
+    bench(parser.parse_args().students)
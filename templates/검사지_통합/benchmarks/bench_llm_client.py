@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+bench_llm_client.py
+AI 해석 요청 비교 (학생마다 순차 invoke vs 비동기 일괄 ainterpret_many) — 가짜 LLM으로 API 키 없이 실행
+
+가짜 LLM은 응답 지연 + 처음 몇 번의 일시 오류를 흉내 내고, 동시 요청 수 최대치를 기록한다.
+검증: 모든 학생 해석 성공(재시도 포함), 동시 요청 수 ≤ max_concurrency, 초당 요청 수 제한 준수
+      defer_llm 상태 → interpret_and_report가 학생마다 리포트 3종(학부모/담임/기관) 파일을 만드는지
+
+실행: python -m benchmarks.bench_llm_client --students 60 --latency 0.2 --rate 50
+"""
+
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from graph.llm_client import LLMClient
+from graph.nodes.ai_teacher_helper import ainterpret_many
+
+
+class _Reply(NamedTuple):
+    content: str
+
+
+class FakeLLM:
+    """invoke / ainvoke를 가진 가짜 채팅 모델 (지연 latency초, 처음 fail_first번은 예외)"""
+    model_name = "fake-llm"
+    temperature = 0.0
+
+    def __init__(self, latency: float, fail_first: int = 0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = 0
+        self.inflight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self) -> int:
+        with self._lock:
+            self.calls += 1
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+            return self.calls
+
+    def _exit(self, call: int) -> _Reply:
+        with self._lock:
+            self.inflight -= 1
+        if call <= self.fail_first:
+            raise RuntimeError("429 Too Many Requests (가짜)")
+        return _Reply(f"① 요약 ② 훈련 포인트 ③ 격려 (#{call})")
+
+    def invoke(self, messages):
+        call = self._enter()
+        time.sleep(self.latency)
+        return self._exit(call)
+
+    async def ainvoke(self, messages):
+        call = self._enter()
+        await asyncio.sleep(self.latency)
+        return self._exit(call)
+
+
+def _students(n: int):
+    return [{"student": {"name": f"학생{i}", "grade": "5"},
+             "neuro": {"theta_rel_open": 20.0 + i % 7, "smr_rel_open": 8.0, "betaL_rel_open": 9.0,
+                       "betaH_rel_open": 6.0}} for i in range(n)]
+
+
+def check_deferred_reports(students: int = 3):
+    """반 전체 지연 해석 경로: 해석 도착 후 학생마다 리포트 3종이 실제로 써지는지 (임시 기록 저장소)"""
+    from graph.flow.pipeline_graph import interpret_and_report
+    from graph.nodes.generate_report import AUDIENCES
+    from graph.record_store import RecordStore
+    from graph.state import PipelineState, Student
+
+    states = [PipelineState(student=Student(student_id=f"S9{i:02d}", name=f"학생{i}", grade="5"),
+                            raw_inputs={"defer_llm": True}) for i in range(students)]
+    client = LLMClient(FakeLLM(0.0), use_cache=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RecordStore(Path(tmp) / "records.sqlite")
+        try:
+            reported = interpret_and_report(states, client=client, store=store)
+        finally:
+            store.close()
+
+    written = []
+    try:
+        for s in reported:
+            paths = [getattr(s.report, aud) for aud in AUDIENCES]
+            assert all(paths), f"리포트 경로 없음: {s.student.student_id} {s.report}"
+            missing = [p for p in paths if not Path(p).exists()]
+            assert not missing, f"리포트 파일 없음: {missing}"
+            written.extend(paths)
+    finally:
+        for p in written:
+            Path(p).unlink(missing_ok=True)
+    print(f"지연 해석 리포트 확인: 학생 {students}명 × {len(AUDIENCES)}종")
+
+
+def bench(students: int, latency: float, rate: float, burst: int, concurrency: int):
+    items = _students(students)
+
+    llm = FakeLLM(latency)
+    client = LLMClient(llm, max_concurrency=concurrency, rate_per_sec=rate, burst=burst, use_cache=False)
+    t0 = time.perf_counter()
+    for _ in items:
+        client.invoke(["prompt"])
+    before = time.perf_counter() - t0
+
+    # 비동기 일괄: 처음 3번은 일시 오류 → 백오프 재시도로 모두 성공해야 함
+    llm = FakeLLM(latency, fail_first=3)
+    client = LLMClient(llm, max_concurrency=concurrency, rate_per_sec=rate, burst=burst,
+                       backoff=0.01, use_cache=False)
+    t0 = time.perf_counter()
+    summaries = asyncio.run(ainterpret_many(items, client))
+    after = time.perf_counter() - t0
+
+    failed = [s for s in summaries if s.startswith("⚠️")]
+    assert not failed, f"해석 실패 {len(failed)}건: {failed[:1]}"
+    assert llm.peak <= concurrency, f"동시 요청 {llm.peak} > {concurrency}"
+    # 토큰 버킷: burst개 이후로는 초당 rate개 (재시도 포함 호출 수 기준)
+    min_elapsed = max(0.0, (llm.calls - burst) / rate) if rate > 0 else 0.0
+    assert after >= min_elapsed * 0.95, f"속도 제한 위반: {after:.3f}s < {min_elapsed:.3f}s"
+
+    print(f"학생 수: {students} / 지연 {latency}s / 초당 {rate}건 (버스트 {burst}) / 동시 {concurrency}")
+    print(f"순차 invoke       : {before:.3f}s")
+    print(f"비동기 일괄       : {after:.3f}s (호출 {llm.calls}회, 재시도 {llm.calls - students}회, 최대 동시 {llm.peak})")
+    if after > 0:
+        print(f"속도 향상         : x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=50.0)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    check_deferred_reports()
+    bench(args.students, args.latency, args.rate, args.burst, args.concurrency)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+bench_normalize.py
+지표 표준화 비교 (행마다 convert_value + Series.map vs 정규식 벡터 연산 + 지표명 색인)
+
+실행: python -m benchmarks.bench_normalize --rows 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from graph.nodes.normalize_metrics import load_metric_dictionary, normalize_frame
+
+# OCR로 흔히 나오는 변형 (공백/대소문자/구분 기호)
+METRICS = ["체중", "체 중", "생년월일", "측정일", "절대세기 원시뇌파", "절대세기  원시뇌파", "절대세기_원시뇌파",
+           "좌뇌", "우뇌", "Hz", "hz", "BQ", "L_Theta_rel", "L Theta rel", "R_SMR_abs", "기타지표"]
+VALUES = ["12.5", "1,234.5", "65kg", "7.8 Hz", "-3.2", "2025-09-01", "2025.9.1", "10/03", "13:05", "없음", "0.031"]
+
+
+def _legacy(df, metric_map):
+    """이전 구현: 원문 그대로 map + 셀마다 파이썬 함수"""
+    def convert_value(v):
+        try:
+            if any(x in str(v) for x in [".", ":", "-"]) and not str(v).replace(".", "", 1).isdigit():
+                return str(v)
+            return float(str(v).replace(",", "").strip())
+        except:
+            return str(v)
+
+    metric = df["metric"].map(metric_map).fillna(df["metric"])
+    value = df["value"].apply(convert_value)
+    return metric, value
+
+
+def bench(rows: int, yaml_path: str):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "student_name": rng.integers(0, rows // 20 + 1, rows).astype(str),
+        "metric": np.array(METRICS, dtype=object)[rng.integers(0, len(METRICS), rows)],
+        "value": np.array(VALUES, dtype=object)[rng.integers(0, len(VALUES), rows)],
+        "file_name": "synthetic.pdf",
+    })
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        metric_map = (yaml.safe_load(f) or {}).get("metric_map", {})
+
+    t0 = time.perf_counter()
+    metric_old, _ = _legacy(df, metric_map)
+    before = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index, metrics = load_metric_dictionary(yaml_path)
+    out, _ = normalize_frame(df, index, metrics)
+    after = time.perf_counter() - t0
+
+    known = list(metrics.categories)
+    mapped_old = metric_old.isin(known).mean()
+    mapped_new = out["metric"].isin(known).mean()
+    print(f"행 수: {rows:,}")
+    print(f"이전 (apply + map) : {before:.3f}s | 표준명 매핑 비율 {mapped_old:.1%}")
+    print(f"벡터 + 지표명 색인  : {after:.3f}s | 표준명 매핑 비율 {mapped_new:.1%}")
+    if after > 0:
+        print(f"속도 향상          : x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--yaml", default="graph/metric_map.yaml")
+    args = parser.parse_args()
+    bench(args.rows, args.yaml)
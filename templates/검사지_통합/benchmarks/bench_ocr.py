@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+bench_ocr.py
+neuro_parse OCR 폴백 벽시계 시간 비교 (이전 전체 페이지 직렬 OCR vs 현재 구현)
+
+실행: python -m benchmarks.bench_ocr --pdf-dir data/raw/neuro
+(Tesseract 설치 필요, 경로는 TESSERACT_PATH 환경변수로 지정 가능)
+"""
+
+import argparse
+import io
+import time
+from pathlib import Path
+
+import fitz
+import pytesseract
+from PIL import Image
+
+from graph.nodes import neuro_parse
+
+
+def legacy_ocr_pdf_to_text(pdf_path: str, lang: str = "kor+eng") -> str:
+    """이전 구현: 모든 페이지 2x 렌더링 → PNG 인코딩/디코딩 → 직렬 OCR"""
+    doc = fitz.open(pdf_path)
+    texts = []
+    for page in doc:
+        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)
+        img = Image.open(io.BytesIO(pix.tobytes("png")))
+        try:
+            t = pytesseract.image_to_string(img, lang=lang)
+        except Exception:
+            t = pytesseract.image_to_string(img)
+        texts.append(t)
+    return "\n".join(texts)
+
+
+def _timed(fn, pdf):
+    t0 = time.perf_counter()
+    text = fn(str(pdf))
+    return time.perf_counter() - t0, neuro_parse._has_band_table(text)
+
+
+def bench(pdf_dir: str):
+    pdfs = sorted(Path(pdf_dir).glob("*.pdf"))
+    if not pdfs:
+        print(f"❌ PDF 없음: {pdf_dir}")
+        return
+
+    total_old = total_new = 0.0
+    print(f"{'파일':40s} {'이전(s)':>8s} {'현재(s)':>8s}  표 인식(이전/현재)")
+    for pdf in pdfs:
+        t_old, ok_old = _timed(legacy_ocr_pdf_to_text, pdf)
+        t_new, ok_new = _timed(neuro_parse._ocr_pdf_to_text, pdf)
+        total_old += t_old
+        total_new += t_new
+        print(f"{pdf.name:40s} {t_old:8.2f} {t_new:8.2f}  {ok_old}/{ok_new}")
+
+    print(f"\n총합: 이전 {total_old:.2f}s | 현재 {total_new:.2f}s"
+          + (f" | x{total_old / total_new:.1f}" if total_new else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf-dir", default="data/raw/neuro")
+    bench(parser.parse_args().pdf_dir)
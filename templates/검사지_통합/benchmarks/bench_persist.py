@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+bench_persist.py
+반 전체 결과 저장 비교 (학생마다 트랜잭션 1번 vs 배치 트랜잭션 1번 + executemany)
+
+실행: python -m benchmarks.bench_persist --students 500
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_state_memory import typed_run
+from graph.record_store import RecordStore
+
+
+def bench(n: int):
+    states = [typed_run(i) for i in range(n)]
+    for i, s in enumerate(states):
+        states[i] = s.apply({"raw_inputs": {"neuro_hash": f"{i:064x}", "neuro_version": "4"}})
+    tmp = Path(tempfile.mkdtemp(prefix="nh_records_"))
+
+    store = RecordStore(tmp / "per_student.sqlite")
+    t0 = time.perf_counter()
+    for s in states:
+        store.persist([s])
+    per_student = time.perf_counter() - t0
+    store.close()
+
+    store = RecordStore(tmp / "batch.sqlite")
+    t0 = time.perf_counter()
+    stored, skipped = store.persist(states)
+    batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    frame = store.class_frame()
+    query = time.perf_counter() - t0
+    store.close()
+
+    print(f"학생 수: {n} (저장 {stored} / 건너뜀 {skipped})")
+    print(f"학생마다 커밋   : {per_student:.3f}s")
+    print(f"배치 1회 커밋   : {batch:.3f}s")
+    print(f"반 전체 조회    : {query:.3f}s ({len(frame)}행 × {len(frame.columns)}열)")
+    if batch > 0:
+        print(f"속도 향상       : x{per_student / batch:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500)
+    bench(parser.parse_args().students)
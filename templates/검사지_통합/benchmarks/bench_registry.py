@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+bench_registry.py
+PDF → 학생 매핑 비교 (파일명 분해 + DataFrame 필터 vs 학생 명부 색인 조회)
+
+실행: python -m benchmarks.bench_registry --students 5000 --files 2000
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from graph.student_registry import StudentRegistry
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = "민서준우지호하윤도현예은수아시우주원태희"
+
+
+def _legacy(df: pd.DataFrame, pdf: str):
+    """이전 구현: 파일명 정규식 + 매 파일 DataFrame 필터"""
+    stem = Path(pdf).stem
+    m = re.search(r"(S\d{3,4})", stem, re.I)
+    sid = m.group(1).upper() if m else None
+    rows = df[df["student_id"].astype(str).str.upper() == sid]
+    return rows.iloc[0]["student_id"] if len(rows) else None
+
+
+def bench(students: int, files: int):
+    rng = random.Random(0)
+    tmp = Path(tempfile.mkdtemp(prefix="nh_registry_"))
+    ids = [f"S{i:04d}" for i in range(1, students + 1)]
+    names = ["".join(rng.choice(s) for s in (SURNAMES, GIVEN, GIVEN)) for _ in ids]
+    csv_path = tmp / "NH_Input.csv"
+    pd.DataFrame({"student_id": ids, "name": names, "grade": [str(i % 6 + 1) for i in range(students)]}) \
+        .to_csv(csv_path, index=False, encoding="utf-8-sig")
+    pdfs = []
+    for k in range(files):
+        i = rng.randrange(students)
+        p = tmp / f"{ids[i]}_{names[i]}_2025-09-{k % 28 + 1:02d}_{k}.pdf"
+        p.write_bytes(os.urandom(64))
+        pdfs.append(str(p))
+
+    t0 = time.perf_counter()
+    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    old = [_legacy(df, p) for p in pdfs]
+    before = time.perf_counter() - t0
+
+    reg = StudentRegistry(tmp / "registry.sqlite")
+    t0 = time.perf_counter()
+    reg.sync(csv_path)
+    first = [reg.resolve(p).student_id for p in pdfs]
+    cold = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    again = [reg.resolve(p).student_id for p in pdfs]
+    warm = time.perf_counter() - t0
+    reg.close()
+
+    assert old == first == again
+    print(f"학생 수: {students:,} / PDF 수: {files:,}")
+    print(f"이전 (파일명 + DataFrame 필터): {before:.3f}s")
+    print(f"명부 (최초: 동기화 + 해시 기록) : {cold:.3f}s")
+    print(f"명부 (재실행: 파일 기록 조회)  : {warm:.3f}s")
+    if warm > 0:
+        print(f"속도 향상 (재실행)            : x{before / warm:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--files", type=int, default=2000)
+    args = parser.parse_args()
+    bench(args.students, args.files)
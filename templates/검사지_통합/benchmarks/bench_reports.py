@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+bench_reports.py
+학생 리포트 PDF 생성 비교 (학생마다 FPDF + add_font vs 묶음 렌더링 + 프로세스 풀)
+
+실행: python -m benchmarks.bench_reports --students 500 --workers 4
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from graph.report_renderer import FONT_PATH, REPORT_FIELDS, render_one, render_reports
+
+
+def _items(students: int):
+    return [(f"학생{i:04d}", {f: (i * 7 + j) % 100 / 3 for j, f in enumerate(REPORT_FIELDS)})
+            for i in range(students)]
+
+
+def bench(students: int, workers=None, chunksize: int = 25, font_path: str = FONT_PATH):
+    if not Path(font_path).exists():
+        print(f"⚠️ 폰트 파일이 없어 건너뜀: {font_path} (NH_REPORT_FONT 또는 --font 지정)")
+        return
+    items = _items(students)
+
+    # 이전 방식: 학생마다 새 문서 + 폰트 파싱/서브셋, 순차 저장
+    with tempfile.TemporaryDirectory() as out:
+        t0 = time.perf_counter()
+        for name, data in items:
+            render_one(name, data, out, font_path)
+        before = time.perf_counter() - t0
+
+    # 현재 방식: 묶음당 문서 1개(폰트 1회) + 프로세스 풀
+    with tempfile.TemporaryDirectory() as out:
+        t0 = time.perf_counter()
+        render_reports(items, out, workers=workers, chunksize=chunksize, font_path=font_path)
+        after = time.perf_counter() - t0
+
+    print(f"학생 수: {students} | 묶음 크기: {chunksize} | 워커: {workers or '자동'}")
+    print(f"학생별 렌더링 : 총 {before:.3f}s | 학생당 {before / students * 1000:.3f}ms")
+    print(f"묶음 렌더링   : 총 {after:.3f}s | 학생당 {after / students * 1000:.3f}ms")
+    if after > 0:
+        print(f"속도 향상     : x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=25)
+    parser.add_argument("--font", default=FONT_PATH)
+    args = parser.parse_args()
+    bench(args.students, args.workers, args.chunksize, args.font)
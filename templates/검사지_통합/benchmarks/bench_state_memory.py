@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+bench_state_memory.py
+학생 상태 1,000개 메모리/시간 비교 (이전 dict 상태 + 제자리 수정/복사 vs 타입 하위 모델 + 변경분 반영)
+
+실행: python -m benchmarks.bench_state_memory --states 1000
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Dict, List, Union
+
+from pydantic import BaseModel, ConfigDict
+
+from graph.state import NeuroBands, PipelineState, Report, Scores, Student, event
+
+BANDS = ("delta", "theta", "alpha", "smr", "betaL", "betaH", "gamma")
+SCORE_KEYS = ("attention_index", "study_habit", "emotion_stability", "multicultural_adaptation",
+              "theta_beta_ratio", "smr_ratio", "attention_index_nh")
+
+
+class _LegacyState(BaseModel):
+    """이전 PipelineState (모든 필드 Dict[str, Any])"""
+    student: Union[Dict[str, Any], BaseModel, None] = None
+    scores: Dict[str, Any] = {}
+    neuro: Dict[str, Any] = {}
+    analysis: Dict[str, Any] = {}
+    report: Dict[str, Any] = {}
+    validated: Dict[str, Any] = {}
+    raw_inputs: Dict[str, Any] = {}
+    log: List[Dict[str, Any]] = []
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def log_event(self, name, payload):
+        self.log.append({"event": name, "data": payload})
+
+
+def _inputs(i: int):
+    sid = f"S{i:04d}"
+    row = {"student_id": sid, "name": f"학생{i}", "grade": str(i % 6 + 1),
+           **{f"Q{q}": (i + q) % 5 + 1 for q in range(1, 6)}}
+    neuro = {f"{b}_rel_open": round((i + k) % 40 / 100, 3) for k, b in enumerate(BANDS)}
+    neuro["source"] = "text_only"
+    values = {k: float((i * 7 + j) % 100) for j, k in enumerate(SCORE_KEYS)}
+    flags = [{"label": "학습 습관 개선 필요", "severity": "medium"}] if i % 3 == 0 else []
+    return sid, row, neuro, values, flags
+
+
+def legacy_run(i: int) -> _LegacyState:
+    sid, row, neuro, values, flags = _inputs(i)
+    state = _LegacyState(raw_inputs={"forms_csv": "forms.csv", "neuro_pdf": f"{sid}.pdf"},
+                         scores={}, student={"name": "-", "student_id": "-", "grade": "-"})
+    state.log_event("ingest_inputs", {"keys": list(state.raw_inputs)})
+    state.student = {"student_id": sid, "name": row["name"], "grade": row["grade"]}
+    state.validated = {"schema_ok": True, "anomalies": [], "rows_after_filter": 1, "sid_selected": sid}
+    state.log_event("validate_schema", state.validated)
+    state.student = {**row}
+    state.scores = {"values": values, "flags": flags}
+    state.log_event("score_engine", {"flags": flags})
+    state.raw_inputs["neuro_parsed"] = neuro
+    state.log_event("neuro_parse", {"status": "ok", **neuro})
+    state.analysis = {"summary": "요약"}
+    state.log_event("ai_teacher_helper", {"summary": "요약..."})
+    new_state = state.model_copy(update={"report": {"md": f"report_{sid}.md"}})
+    new_state.log_event("generate_report", {"path": f"report_{sid}.md"})
+    return new_state
+
+
+def typed_run(i: int) -> PipelineState:
+    sid, row, neuro, values, flags = _inputs(i)
+    state = PipelineState(raw_inputs={"forms_csv": "forms.csv", "neuro_pdf": f"{sid}.pdf"})
+    state = state.apply({"log": [event("ingest_inputs", {"keys": list(state.raw_inputs)})]})
+    validated = {"schema_ok": True, "anomalies": [], "rows_after_filter": 1, "sid_selected": sid}
+    state = state.apply({"student": Student(student_id=sid, name=row["name"], grade=row["grade"]),
+                         "validated": validated, "log": [event("validate_schema", validated)]})
+    state = state.apply({"student": Student.from_row(row), "scores": Scores(values=values, flags=flags),
+                         "log": [event("score_engine", {"flags": flags})]})
+    state = state.apply({"neuro": NeuroBands(**neuro), "log": [event("neuro_parse", {"status": "ok", **neuro})]})
+    state = state.apply({"analysis": {"summary": "요약"}, "log": [event("ai_teacher_helper", {"summary": "요약..."})]})
+    paths = {aud: f"report_{sid}_{aud}.md" for aud in ("parent", "teacher", "institution")}
+    state = state.apply({"report": Report(md=paths["teacher"], **paths),
+                         "log": [event("generate_report", {"paths": paths})]})
+    return state
+
+
+def _measure(fn, n: int):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    states = [fn(i) for i in range(n)]
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return states, elapsed, current, peak
+
+
+def bench(n: int):
+    _, t_old, cur_old, peak_old = _measure(legacy_run, n)
+    _, t_new, cur_new, peak_new = _measure(typed_run, n)
+
+    print(f"상태 수: {n}")
+    print(f"이전(dict + 복사)   : {t_old:.3f}s | 유지 {cur_old / 1e6:.2f}MB | 최대 {peak_old / 1e6:.2f}MB"
+          f" | 상태당 {cur_old / n / 1024:.2f}KB")
+    print(f"현재(하위 모델 + 변경분): {t_new:.3f}s | 유지 {cur_new / 1e6:.2f}MB | 최대 {peak_new / 1e6:.2f}MB"
+          f" | 상태당 {cur_new / n / 1024:.2f}KB")
+    if cur_new > 0:
+        print(f"유지 메모리 비율    : x{cur_old / cur_new:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", type=int, default=1000)
+    bench(parser.parse_args().states)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+batch_runner.py
+반 전체 PDF 처리를 위한 멀티프로세스 배치 실행기
+
+- workers: 프로세스 수 (기본: 환경변수 NH_BATCH_WORKERS 또는 CPU 코어 수)
+- chunksize: 작업 1건에 묶어 보낼 파일 수 (IPC 오버헤드 감소)
+- ordered: True면 입력 순서대로, False면 완료되는 순서대로 결과 반환
+- timeout: 파일 1개당 제한 시간(초). 초과 시 해당 파일은 TimeoutError로 기록
+  · 시간은 워커가 실제로 작업을 시작한 시각부터 잰다 (대기 중인 작업은 시간 초과되지 않음)
+  · 시간 초과가 나면 멈춘 워커 프로세스를 종료하고 풀을 새로 만든 뒤, 끝나지 않은 나머지 작업을 다시 제출
+  · 멈춘 작업을 끊으려면 별도 프로세스가 필요하므로 timeout이 있으면 workers=1 / 파일 1개여도 풀에서 실행
+
+func는 프로세스 간 전달되므로 모듈 최상위 함수여야 한다.
+"""
+
+import multiprocessing
+import os
+import itertools
+import queue
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class BatchResult:
+    """파일 1개 처리 결과"""
+    index: int
+    item: Any
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def default_workers() -> int:
+    env = os.getenv("NH_BATCH_WORKERS")
+    if env and env.isdigit() and int(env) > 0:
+        return int(env)
+    return os.cpu_count() or 1
+
+
+# 워커 프로세스: 작업 시작 알림 큐 (timeout이 있을 때만 설정)
+_STARTED = None
+
+
+def _init_worker(started):
+    global _STARTED
+    _STARTED = started
+
+
+def _run_chunk(func: Callable, chunk: List[Tuple[int, Any]], token: Optional[int] = None) -> List[BatchResult]:
+    """워커 프로세스에서 실행: chunk 내 파일을 순서대로 처리"""
+    if _STARTED is not None and token is not None:
+        _STARTED.put((token, time.time()))
+    out = []
+    for idx, item in chunk:
+        t0 = time.perf_counter()
+        try:
+            value = func(item)
+            out.append(BatchResult(idx, item, value, None, time.perf_counter() - t0))
+        except Exception as e:
+            out.append(BatchResult(idx, item, None, f"{type(e).__name__}: {e}", time.perf_counter() - t0))
+    return out
+
+
+def _failed(chunk: List[Tuple[int, Any]], error: str) -> List[BatchResult]:
+    return [BatchResult(idx, item, None, error) for idx, item in chunk]
+
+
+def run_batch(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    timeout: Optional[float] = None,
+) -> Iterator[BatchResult]:
+    """
+    items 각각에 func를 적용하고 BatchResult를 하나씩 yield
+    """
+    indexed = list(enumerate(items))
+    if not indexed:
+        return
+    workers = max(1, workers or default_workers())
+    chunksize = max(1, chunksize)
+
+    # 워커 1개면 프로세스 생성 없이 현재 프로세스에서 처리 (timeout이 없을 때만 — 현재 프로세스 작업은 끊을 수 없음)
+    if not timeout and (workers == 1 or len(indexed) == 1):
+        for pair in indexed:
+            yield from _run_chunk(func, [pair])
+        return
+
+    chunks = deque(indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize))
+    workers = min(workers, len(chunks))
+    # 제출마다 새 번호 (다시 제출된 chunk가 종료된 이전 워커의 시작 알림을 받지 않도록)
+    tokens = itertools.count()
+    pending: Dict[Any, Tuple[int, List[Tuple[int, Any]]]] = {}
+    started: Dict[int, float] = {}
+    buffered: Dict[int, BatchResult] = {}
+    next_index = 0
+
+    ctx = multiprocessing.get_context()
+    started_q = ctx.Queue() if timeout else None
+
+    def new_pool() -> ProcessPoolExecutor:
+        if started_q is None:
+            return ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                   initializer=_init_worker, initargs=(started_q,))
+
+    ex = new_pool()
+
+    def submit_next():
+        if chunks:
+            chunk, token = chunks.popleft(), next(tokens)
+            pending[ex.submit(_run_chunk, func, chunk, token)] = (token, chunk)
+
+    def drain_started():
+        while True:
+            try:
+                token, t = started_q.get_nowait()
+            except queue.Empty:
+                return
+            if any(token == tok for tok, _ in pending.values()):
+                started[token] = t
+
+    try:
+        # 동시에 제출된 작업은 워커 수만큼만 유지
+        for _ in range(workers):
+            submit_next()
+
+        while pending:
+            wait_for = None
+            if timeout:
+                drain_started()
+                now = time.time()
+                deadlines = [started[tok] + timeout * len(chunk) - now
+                             for tok, chunk in pending.values() if tok in started]
+                # 아직 시작 알림이 없는 작업이 있으면 짧게 대기하며 다시 확인
+                if len(deadlines) < len(pending):
+                    deadlines.append(0.2)
+                wait_for = max(0.05, min(deadlines))
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            finished: List[BatchResult] = []
+            for fut in done:
+                token, chunk = pending.pop(fut)
+                started.pop(token, None)
+                try:
+                    finished.extend(fut.result())
+                except Exception as e:  # 워커 프로세스 비정상 종료 등
+                    finished.extend(_failed(chunk, f"{type(e).__name__}: {e}"))
+                submit_next()
+
+            if timeout:
+                drain_started()
+                now = time.time()
+                expired = [fut for fut, (tok, chunk) in pending.items()
+                           if tok in started and now - started[tok] > timeout * len(chunk)]
+                if expired:
+                    for fut in expired:
+                        token, chunk = pending.pop(fut)
+                        started.pop(token, None)
+                        finished.extend(_failed(chunk, f"TimeoutError: {timeout}s 초과"))
+                    # 멈춘 워커는 cancel로 멈출 수 없음 → 풀을 종료하고 새로 만든 뒤
+                    # 함께 종료된 실행 중 작업 + 대기 작업을 앞쪽에 다시 넣음
+                    for token, chunk in reversed(list(pending.values())):
+                        started.pop(token, None)
+                        chunks.appendleft(chunk)
+                    pending.clear()
+                    _terminate(ex)
+                    ex = new_pool()
+                    for _ in range(workers):
+                        submit_next()
+
+            if not ordered:
+                yield from finished
+                continue
+
+            for res in finished:
+                buffered[res.index] = res
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        if pending:
+            # 중간에 멈춘 경우(제너레이터 close 등) 남은 워커를 기다리지 않고 종료
+            _terminate(ex)
+        else:
+            ex.shutdown(wait=True, cancel_futures=True)
+        if started_q is not None:
+            started_q.close()
+            started_q.cancel_join_thread()
+
+
+def _terminate(ex: ProcessPoolExecutor):
+    """실행 중인 워커 프로세스까지 강제 종료 (Python 3.14+는 terminate_workers 사용)"""
+    terminate = getattr(ex, "terminate_workers", None)
+    if terminate is not None:
+        terminate()
+        return
+    procs = list((getattr(ex, "_processes", None) or {}).values())
+    for p in procs:
+        if p.is_alive():
+            p.terminate()
+    ex.shutdown(wait=False, cancel_futures=True)
+    for p in procs:
+        p.join(timeout=5)
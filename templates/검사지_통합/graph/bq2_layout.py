@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+bq2_layout.py
+PyMuPDF 단어 좌표 기반 BQ2 밴드 표 추출
+
+page.get_text("words")의 bounding box로 숫자 셀을 행 라벨 / 열 헤더에 직접 매핑한다.
+- 행 라벨형: 왼쪽 라벨(Theta 등) + 같은 행의 숫자 2개 → 좌/우 (좌·우/L·R 열 헤더가 있으면 x 위치로 매핑)
+- 열 헤더형: 밴드 헤더 행 아래 값 행 → 숫자마다 x 중심이 가장 가까운 헤더 열에 배정
+- 측정 조건: "개안" / "폐안" 제목 행 아래의 값은 해당 조건(open/closed)으로 표시 (페이지를 넘어가도 유지)
+개안(또는 조건 제목 없는) 표에서 핵심 밴드가 나온 페이지에서 멈추고,
+NH_BQ2_TABLE_REGION이 있으면 해당 clip 영역의 단어만 읽는다.
+"""
+
+import os
+from statistics import median
+from typing import List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from .bq2_tokenizer import BANDS, BandValue, classify_condition, classify_label, guess_kind, split_numbers
+
+CORE_BANDS = ("Theta", "BetaL", "BetaH", "SMR")
+_SIDE_WORDS = {"l": "L", "좌": "L", "좌뇌": "L", "left": "L", "r": "R", "우": "R", "우뇌": "R", "right": "R"}
+
+
+def table_region() -> Optional[Tuple[float, float, float, float]]:
+    """
+    BQ2 표 영역 (페이지 크기 대비 비율 x0,y0,x1,y1)
+    레이아웃을 아는 경우 NH_BQ2_TABLE_REGION="0,0.3,1,0.7" 처럼 지정
+    """
+    env = os.getenv("NH_BQ2_TABLE_REGION")
+    if not env:
+        return None
+    try:
+        x0, y0, x1, y1 = (float(v) for v in env.split(","))
+        return x0, y0, x1, y1
+    except ValueError:
+        return None
+
+
+def region_rect(page, region) -> Optional["fitz.Rect"]:
+    if not region:
+        return None
+    r = page.rect
+    return fitz.Rect(r.x0 + r.width * region[0], r.y0 + r.height * region[1],
+                     r.x0 + r.width * region[2], r.y0 + r.height * region[3])
+
+
+def _rows(words) -> List[List[tuple]]:
+    """단어 → y 중심 기준 행 묶음 (행 내부는 x 순)"""
+    if not words:
+        return []
+    tol = median(w[3] - w[1] for w in words) * 0.5
+    rows: List[Tuple[float, List[tuple]]] = []
+    for w in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        yc = (w[1] + w[3]) / 2
+        if rows and abs(rows[-1][0] - yc) <= tol:
+            rows[-1][1].append(w)
+        else:
+            rows.append((yc, [w]))
+    return [sorted(ws, key=lambda w: w[0]) for _, ws in rows]
+
+
+def _cells(ws) -> List[Tuple[float, float]]:
+    """행의 숫자 셀 → (값, x 중심). 붙은 숫자 '3.818.55'는 단어 폭을 나눠 위치 추정"""
+    out = []
+    for w in ws:
+        nums = split_numbers(w[4])
+        if not nums:
+            continue
+        step = (w[2] - w[0]) / len(nums)
+        out.extend((v, w[0] + step * (i + 0.5)) for i, v in enumerate(nums))
+    return out
+
+
+def _page_bands(words, cond: Optional[str] = None) -> Tuple[List[BandValue], Optional[str]]:
+    """페이지 단어 → (밴드 레코드, 페이지 끝의 측정 조건)"""
+    bands: List[BandValue] = []
+    kind, explicit = "rel", False
+    header = None      # [(band, x 중심)], kind
+    sides = None       # {"L": x, "R": x}  좌/우 열 헤더
+
+    for ws in _rows(words):
+        row_cond = classify_condition(" ".join(w[4] for w in ws))
+        if row_cond and row_cond != cond:
+            cond, header, sides = row_cond, None, None
+        tags = [(classify_label(w[4]), w) for w in ws]
+        for tag, _ in tags:
+            if tag in ("abs", "rel"):
+                kind, explicit = tag, True
+        labels = [(tag, w) for tag, w in tags if tag in BANDS]
+        order = list(dict.fromkeys(tag for tag, _ in labels))
+
+        side_cols = {_SIDE_WORDS[w[4].lower()]: (w[0] + w[2]) / 2 for w in ws if w[4].lower() in _SIDE_WORDS}
+        if "L" in side_cols and "R" in side_cols:
+            sides = side_cols
+            continue
+
+        # 열 헤더형 헤더 행
+        if len(order) >= 3:
+            header = ([(tag, (w[0] + w[2]) / 2) for tag, w in labels], kind if explicit else None)
+            continue
+
+        cells = _cells(ws)
+
+        # 행 라벨형: 라벨 오른쪽 (다음 라벨 전까지) 숫자 2개
+        if labels:
+            for i, (band, lw) in enumerate(labels):
+                x_end = labels[i + 1][1][0] if i + 1 < len(labels) else float("inf")
+                right = [c for c in cells if lw[2] < c[1] < x_end]
+                if len(right) < 2:
+                    continue
+                if sides:
+                    lv = min(right, key=lambda c: abs(c[1] - sides["L"]))[0]
+                    rv = min(right, key=lambda c: abs(c[1] - sides["R"]))[0]
+                else:
+                    lv, rv = right[0][0], right[1][0]
+                bands.append(BandValue(band, "L", kind, lv, cond))
+                bands.append(BandValue(band, "R", kind, rv, cond))
+            continue
+
+        # 열 헤더형 값 행: 숫자 → 가장 가까운 헤더 열
+        if header and len(cells) >= 4:
+            cols, h_kind = header
+            gap = min((b[1] - a[1] for a, b in zip(cols, cols[1:])), default=0)
+            assigned = {}
+            for v, xc in cells:
+                band, hx = min(cols, key=lambda c: abs(c[1] - xc))
+                if gap and abs(hx - xc) > gap * 0.75:
+                    continue
+                assigned.setdefault(band, []).append(v)
+            pairs = [(b, vs[:2]) for b, _ in cols for vs in [assigned.get(b, [])] if len(vs) >= 2]
+            if len(pairs) * 2 >= len(cols):
+                flat = [v for _, vs in pairs for v in vs]
+                k = h_kind or guess_kind(flat, len(pairs)) or kind
+                for band, (lv, rv) in pairs:
+                    bands.append(BandValue(band, "L", k, lv, cond))
+                    bands.append(BandValue(band, "R", k, rv, cond))
+                header = None
+    return bands, cond
+
+
+def _rows_text(words) -> str:
+    return "\n".join(" ".join(w[4] for w in ws) for ws in _rows(words))
+
+
+def extract_bands(doc) -> Tuple[List[BandValue], str]:
+    """
+    열린 fitz 문서 → (밴드 레코드, 표 영역 텍스트)
+    개안(또는 조건 제목 없는) 표의 핵심 밴드(Theta/BetaL/BetaH/SMR)가 나온 페이지에서 중단
+    """
+    region = table_region()
+    bands: List[BandValue] = []
+    texts = []
+    cond = None
+    for page in doc:
+        words = page.get_text("words", clip=region_rect(page, region))
+        if not words:
+            continue
+        page_bands, cond = _page_bands(words, cond)
+        if not page_bands:
+            continue
+        bands.extend(page_bands)
+        texts.append(_rows_text(words))
+        if {b.band for b in bands if b.cond != "closed"} >= set(CORE_BANDS):
+            break
+    return bands, "\n".join(texts)
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+bq2_tokenizer.py
+BQ2 PDF 추출 텍스트 공용 토크나이저 (정규식 사전 컴파일, 텍스트 1회 스캔)
+
+두 가지 표 형태를 모두 처리한다.
+- 라벨형:  "Theta 1.77 3.33"            (라벨 뒤 좌/우 값)
+- 압축형:  "Delta Theta Alpha SMR ..."   (헤더 행) + "3.818.55 1.773.33 ..." (값 행, 숫자 붙음)
+
+결과는 (band, side, kind, value, cond) 레코드. kind는 절대세기(abs)/상대세기(rel)로,
+NH_Input.csv 컬럼명(L_Theta_rel 등)과 같은 규칙을 따른다.
+cond는 측정 조건(개안 open / 폐안 closed, 제목이 없으면 None) — 폐안 표는 컬럼명 뒤에 _closed를 붙여 개안 값과 섞이지 않게 한다.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+BANDS = ("Delta", "Theta", "Alpha", "SMR", "BetaL", "BetaH", "Gamma")
+# 측정 조건 (개안 / 폐안) — 폐안 값의 컬럼명 접미사
+CONDITIONS = ("open", "closed")
+CLOSED_SUFFIX = "_closed"
+
+# 밴드 라벨과 절대/상대세기 구역 제목을 한 정규식으로 (lastgroup으로 분류)
+# 소문자 변환한 줄에 적용 — re.I 대신 앞머리 문자 집합 lookahead로 빠르게 건너뜀
+_LABEL_RE = re.compile(
+    r"(?=[abdgrst절상델세알에저고감δθαβγ])(?:"
+    r"(?P<abs>절대\s*세기|absolute)"
+    r"|(?P<rel>상대\s*세기|relative)"
+    r"|(?P<Delta>delta|델타|δ)"
+    r"|(?P<Theta>theta|세타|θ)"
+    r"|(?P<Alpha>alpha|알파|α)"
+    r"|(?P<SMR>smr|에스엠알|sensorimotor)"
+    r"|(?P<BetaL>beta\s*l(?:ow)?|저\s*베타|βl)"
+    r"|(?P<BetaH>beta\s*h(?:igh)?|고\s*베타|βh)"
+    r"|(?P<Gamma>gamma|감마|γ))"
+)
+# 측정 조건 제목 ("개안스펙트럼", "폐안 (Eyes Closed)" 등) — 소문자 변환한 줄/행에 적용
+_COND_RE = re.compile(r"(?P<open>개안|eyes\s*open)|(?P<closed>폐안|eyes\s*closed)")
+_GLUED_RE = re.compile(r"(\d+)\.(\d{2,})\.(\d+)")
+_NUM_RE = re.compile(r"[+-]?\d+(?:\.\d+)?")
+_DECIMAL_RE = re.compile(r"\d\.\d")
+# PDF 텍스트 블록 단위로 적용 — 블록 안에서는 줄바꿈을 넘어 라벨/값을 짝지음 ("체중\n45.2")
+_KV_RE = re.compile(r"([A-Za-z가-힣\s]+)[=:：]?\s*([\d\.]+)")
+_DIGIT_RE = re.compile(r"\d")
+_KINDS = ("abs", "rel")
+
+# 헤더 행으로 인정할 최소 밴드 수 / 값 행으로 인정할 최소 소수 개수
+_MIN_HEADER_BANDS = 3
+_MIN_ROW_DECIMALS = 6
+# 압축형 헤더 뒤에서 값을 모을 최대 줄 수
+_TAIL_LINES = 5
+
+
+class BandValue(NamedTuple):
+    band: str    # BANDS 중 하나
+    side: str    # "L" | "R"
+    kind: str    # "abs" | "rel"
+    value: float
+    cond: Optional[str] = None  # "open"(개안) | "closed"(폐안) | None(구분 없음)
+
+    @property
+    def column(self) -> str:
+        """NH_Input.csv 컬럼명 (예: L_Theta_rel, 폐안이면 L_Theta_rel_closed)"""
+        suffix = CLOSED_SUFFIX if self.cond == "closed" else ""
+        return f"{self.side}_{self.band}_{self.kind}{suffix}"
+
+
+class Scan(NamedTuple):
+    bands: List[BandValue]
+    metrics: List[Tuple[str, str]]  # (지표명, 원본 값 문자열)
+
+
+def _split_glued(m) -> str:
+    # "44.553.8" → 두 수의 소수 자릿수가 같아지는 위치에서 분리 ("44.5 53.8")
+    head, mid, tail = m.groups()
+    k = len(tail) if len(tail) < len(mid) else min(2, len(mid) - 1)
+    return f"{head}.{mid[:k]} {mid[k:]}.{tail}"
+
+
+def unglue(line: str) -> str:
+    """붙은 연속 소수 분리: '3.818.55' → '3.81 8.55'"""
+    return _GLUED_RE.sub(_split_glued, line)
+
+
+def guess_kind(nums: List[float], n_bands: int) -> Optional[str]:
+    # 상대세기는 한쪽(L) 합이 100% 근처
+    left = nums[0:2 * n_bands:2]
+    if len(left) < 5:
+        return None
+    return "rel" if 80 <= sum(left) <= 120 else "abs"
+
+
+def classify_label(word: str) -> Optional[str]:
+    """단어 → 밴드명(BANDS) / "abs" / "rel" / None"""
+    m = _LABEL_RE.search(word.lower())
+    return m.lastgroup if m else None
+
+
+def classify_condition(text: str) -> Optional[str]:
+    """줄/행 → "open" / "closed" / None (여러 개면 마지막 제목)"""
+    text = text.lower()
+    # 대부분의 줄에는 조건 제목이 없음 → 글자 포함 여부로 먼저 걸러 정규식 탐색 생략
+    if "안" not in text and "eyes" not in text:
+        return None
+    cond = None
+    for m in _COND_RE.finditer(text):
+        cond = m.lastgroup
+    return cond
+
+
+def split_numbers(s: str) -> List[float]:
+    """문자열 속 숫자 목록 (붙은 소수 분리 포함)"""
+    return [float(v) for v in _NUM_RE.findall(unglue(s) if s.count(".") >= 2 else s)]
+
+
+def _emit(out: List[BandValue], order: List[str], nums: List[float], kind: str, cond: Optional[str]):
+    for i, band in enumerate(order):
+        if 2 * i + 1 >= len(nums):
+            break
+        out.append(BandValue(band, "L", kind, nums[2 * i], cond))
+        out.append(BandValue(band, "R", kind, nums[2 * i + 1], cond))
+
+
+def _metric_pairs(blocks: Union[str, Sequence[str]]) -> List[Tuple[str, str]]:
+    """(지표명, 값) 쌍 — blocks가 문자열이면 블록 1개로 취급"""
+    kv = []
+    for block in ([blocks] if isinstance(blocks, str) else blocks):
+        for key, val in _KV_RE.findall(block):
+            key = key.strip()
+            if len(key) > 1 and _DIGIT_RE.search(val):
+                kv.append((key, val.strip()))
+    return kv
+
+
+def scan(text: str, default_kind: str = "rel", metrics: bool = True) -> Scan:
+    """
+    텍스트를 한 번 훑어 밴드 값 레코드와 일반 (지표명, 값) 쌍을 함께 추출
+    """
+    bands: List[BandValue] = []
+    kv = _metric_pairs(text) if metrics else []
+
+    kind, explicit = default_kind, False
+    cond = None
+    headers: List[Tuple[int, List[str]]] = []         # (줄 번호, 밴드 순서)
+    rows: List[Tuple[int, Optional[str], List[float], Optional[str]]] = []  # (줄 번호, kind, 값, cond)
+    tail = None       # 압축형 헤더 뒤 값 수집 [헤더 줄 번호, kind, nums, 남은 줄, cond]
+    pending = None    # 라벨형: 라벨 뒤 값이 다음 줄로 넘어간 경우 [band, kind, nums, 남은 줄, cond]
+
+    # 소문자 변환은 텍스트 전체에 1번
+    for no, line in enumerate(text.lower().splitlines()):
+        if not line.strip():
+            continue
+
+        cond = classify_condition(line) or cond
+        labels = []
+        for m in _LABEL_RE.finditer(line):
+            if m.lastgroup in _KINDS:
+                kind, explicit = m.lastgroup, True
+            else:
+                labels.append(m)
+        order = list(dict.fromkeys(m.lastgroup for m in labels)) if labels else []
+        has_digit = _DIGIT_RE.search(line) is not None
+
+        # 1) 압축형 헤더 행 (축 눈금 숫자 등은 무시)
+        if len(order) >= _MIN_HEADER_BANDS:
+            if tail and tail[2]:
+                rows.append((tail[0] + 1, tail[1], tail[2], tail[4]))
+            headers.append((no, order))
+            tail = [no, kind if explicit else None, [], _TAIL_LINES, cond]
+            pending = None
+            continue
+
+        # 라벨만 있는 줄 ("Theta" 다음 줄에 "21.1 22.6") → 아래 3)에서 pending으로 다음 줄 값 대기
+        if not has_digit and not labels:
+            continue
+        flat = unglue(line) if line.count(".") >= 2 else line
+
+        # 2) 값 행 (소수가 충분히 많은 줄)
+        if flat.count(".") >= _MIN_ROW_DECIMALS and len(_DECIMAL_RE.findall(flat)) >= _MIN_ROW_DECIMALS:
+            nums = _NUM_RE.findall(flat)
+            first = next(i for i, s in enumerate(nums) if "." in s)
+            rows.append((no, kind if explicit else None, [float(s) for s in nums[first:]], cond))
+            tail = pending = None
+            continue
+
+        # 3) 라벨형 "Theta 1.77 3.33" (한 줄에 여러 라벨 가능)
+        if labels:
+            pending = None
+            for i, m in enumerate(labels):
+                end = labels[i + 1].start() if i + 1 < len(labels) else len(line)
+                nums = [float(s) for s in _NUM_RE.findall(unglue(line[m.end():end]))]
+                if len(nums) >= 2:
+                    bands.append(BandValue(m.lastgroup, "L", kind, nums[0], cond))
+                    bands.append(BandValue(m.lastgroup, "R", kind, nums[1], cond))
+                elif i + 1 == len(labels):
+                    pending = [m.lastgroup, kind, nums, 2, cond]
+            continue
+
+        nums = [float(s) for s in _NUM_RE.findall(flat)]
+        if pending:
+            pending[2].extend(nums)
+            pending[3] -= 1
+            if len(pending[2]) >= 2:
+                band, k, vals, _, c = pending
+                bands.append(BandValue(band, "L", k, vals[0], c))
+                bands.append(BandValue(band, "R", k, vals[1], c))
+                pending = None
+            elif pending[3] <= 0:
+                pending = None
+        elif tail and _DECIMAL_RE.search(flat):
+            tail[2].extend(nums)
+            tail[3] -= 1
+            if tail[3] <= 0:
+                rows.append((tail[0] + 1, tail[1], tail[2], tail[4]))
+                tail = None
+        elif tail:
+            tail[3] -= 1
+
+    if tail and tail[2]:
+        rows.append((tail[0] + 1, tail[1], tail[2], tail[4]))
+
+    # 값 행 ↔ 헤더 매칭: 바로 앞 헤더, 없으면 바로 뒤 헤더
+    for no, row_kind, nums, row_cond in rows:
+        order = None
+        for h_no, h_order in headers:
+            if h_no < no:
+                order = h_order
+            elif order is None:
+                order = h_order
+                break
+            else:
+                break
+        if not order:
+            continue
+        k = row_kind or guess_kind(nums, len(order)) or default_kind
+        _emit(bands, order, nums, k, row_cond)
+
+    return Scan(bands, kv)
+
+
+def band_pairs(records: List[BandValue], prefer: str = "rel",
+               cond: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+    """
+    레코드 → {band: (L, R)}
+    prefer 종류(rel/abs)를 우선 사용하고, 없으면 다른 종류 값으로 대체
+    cond를 주면 그 조건 표의 값만 사용 (조건 제목이 없던 레코드로 대체, 다른 조건 값은 섞지 않음)
+    """
+    if cond is not None:
+        records = [r for r in records if r.cond == cond] or [r for r in records if r.cond is None]
+    found: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for r in records:
+        found.setdefault((r.band, r.kind), {}).setdefault(r.side, r.value)
+
+    other = "abs" if prefer == "rel" else "rel"
+    out = {}
+    for band in BANDS:
+        for k in (prefer, other):
+            sides = found.get((band, k))
+            if sides and "L" in sides and "R" in sides:
+                out[band] = (sides["L"], sides["R"])
+                break
+    return out
+
+
+def metric_records(text: Union[str, Sequence[str]], bands: Optional[List[BandValue]] = None) -> List[Dict[str, str]]:
+    """
+    PDF 추출용 (metric, value) 행 목록
+    일반 지표(체중, 측정일 등) + 밴드 값(NH_Input 컬럼명, 예: L_Theta_rel)
+    text: 추출 텍스트 또는 page.get_text("blocks") 블록 문자열 목록 (지표 쌍은 블록마다 찾음)
+    bands를 주면 (좌표 기반 추출 결과 등) 텍스트 표 파싱 대신 그 값을 사용
+    """
+    kv = _metric_pairs(text)
+    if bands is None:
+        bands = scan(text if isinstance(text, str) else "\n".join(text), metrics=False).bands
+    rows = [{"metric": k, "value": v} for k, v in kv]
+    rows.extend({"metric": b.column, "value": str(b.value)} for b in bands)
+    return rows
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+cohort_norms.py
+코호트(학년 / 학교 / 다문화 여부) 규준 — 증분 갱신 + O(log n) 백분위 조회
+
+- 코호트 1개 × 지표 1개마다 정렬된 float64 배열 + 합 / 제곱합 유지
+  · 평균 / 분산: 합·제곱합으로 O(1), 분위수: 정렬 배열 인덱스로 O(1)
+  · 백분위: searchsorted 2번 (O(log n)), 동점은 중간 순위 (아래 + 같은 값의 절반) / n × 100
+- update(frame): 바뀐 학생만 빼고 다시 넣음 (새 학생은 코호트별로 모아 정렬 병합 1번)
+- 정확한 정렬 배열 방식 — 학교/학년 규모(수만 명)에서는 t-digest 같은 근사 요약이 필요 없음
+- save()/load(): NH_Input별 파일 data/processed/cohort_norms_<파일명>_<경로 해시>.npz (norms_path)
+  · get_norms(source)도 NH_Input별 인스턴스 → 다른 NH_Input을 읽어도 서로의 규준을 지우지 않음
+  · 점수표 조회(워커마다 호출)는 메모리만 갱신, 파일 저장은 배치 / CLI에서만 (다음 실행은 바뀐 학생만 반영)
+
+실행: python -m graph.cohort_norms [--nh NH_Input.csv]   (점수표로 규준 갱신·저장 후 코호트 통계 출력)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+NORMS_PATH = Path(__file__).resolve().parents[1] / "data" / "processed" / "cohort_norms.npz"
+COHORT_DIMS = ("grade", "school", "multicultural")
+# 코호트 차원 → 표시 제목 (리포트 백분위 표 / 대시보드 공용)
+COHORT_LABELS = {"all": "전체", "grade": "같은 학년", "school": "같은 학교", "multicultural": "다문화 여부별"}
+# 전체 코호트 키 (dim, value)
+ALL = ("all", "all")
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+Key = Tuple[str, str, str]  # (dim, cohort 값, 지표)
+
+
+class _Dist:
+    """코호트 1개 × 지표 1개 분포 (정렬 배열)"""
+    __slots__ = ("values", "sum", "sumsq")
+
+    def __init__(self, values: Optional[np.ndarray] = None):
+        v = np.sort(np.asarray(values if values is not None else [], dtype="float64"))
+        self.values = v
+        self.sum = float(v.sum())
+        self.sumsq = float((v * v).sum())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def insert(self, x: float):
+        self.values = np.insert(self.values, np.searchsorted(self.values, x), x)
+        self.sum += x
+        self.sumsq += x * x
+
+    def extend(self, xs: np.ndarray):
+        """여러 값을 한 번에 병합 (정렬 1번)"""
+        xs = np.asarray(xs, dtype="float64")
+        self.values = np.sort(np.concatenate([self.values, xs]), kind="mergesort")
+        self.sum += float(xs.sum())
+        self.sumsq += float((xs * xs).sum())
+
+    def remove(self, x: float) -> bool:
+        i = int(np.searchsorted(self.values, x))
+        if i >= len(self.values) or self.values[i] != x:
+            return False
+        self.values = np.delete(self.values, i)
+        self.sum -= x
+        self.sumsq -= x * x
+        return True
+
+    def percentile(self, x: float) -> Optional[float]:
+        n = len(self.values)
+        if n == 0 or x != x:
+            return None
+        lo = int(np.searchsorted(self.values, x, side="left"))
+        hi = int(np.searchsorted(self.values, x, side="right"))
+        return (lo + 0.5 * (hi - lo)) / n * 100.0
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        n = len(self.values)
+        if n == 0:
+            return {"count": 0}
+        mean = self.sum / n
+        var = max(self.sumsq - self.sum * mean, 0.0) / (n - 1) if n > 1 else None
+        out = {"count": n, "mean": mean, "std": None if var is None else var ** 0.5,
+               "min": float(self.values[0]), "max": float(self.values[-1])}
+        for q in QUANTILES:
+            out[f"p{int(q * 100)}"] = float(np.quantile(self.values, q))
+        return out
+
+
+def _label(value: Any) -> Optional[str]:
+    """코호트 값 → 문자열 키 (비어 있으면 None = 해당 코호트 없음)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    text = str(value).strip()
+    if text.endswith(".0") and text[:-2].lstrip("-").isdigit():
+        text = text[:-2]  # CSV에서 float로 읽힌 학년 (6.0 → 6)
+    return text or None
+
+
+class CohortNorms:
+    def __init__(self, dims: Iterable[str] = COHORT_DIMS):
+        self.dims = tuple(dims)
+        self._dists: Dict[Key, _Dist] = {}
+        # 학생 → (코호트 [(dim, 값)], {지표: 값}) — 재계산된 학생의 이전 값을 빼기 위해 보관
+        self._members: Dict[str, Tuple[Tuple[Tuple[str, str], ...], Dict[str, float]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def _cohorts(self, record: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        keys = [ALL]
+        for dim in self.dims:
+            label = _label(record.get(dim))
+            if label is not None:
+                keys.append((dim, label))
+        return tuple(keys)
+
+    def _insert(self, cohorts, values: Dict[str, float]):
+        for c in cohorts:
+            for metric, v in values.items():
+                self._dists.setdefault((c[0], c[1], metric), _Dist()).insert(v)
+
+    def _remove(self, sid: str):
+        cohorts, values = self._members.pop(sid)
+        for c in cohorts:
+            for metric, v in values.items():
+                dist = self._dists.get((c[0], c[1], metric))
+                if dist is not None:
+                    dist.remove(v)
+                    if not len(dist):
+                        del self._dists[(c[0], c[1], metric)]
+
+    # --- 갱신 ---
+    def add(self, sid: str, record: Dict[str, Any], metrics: Iterable[str]) -> bool:
+        """학생 1명 추가/갱신 (값이 그대로면 아무것도 하지 않음) → 바뀌었으면 True"""
+        cohorts = self._cohorts(record)
+        values = {m: float(record[m]) for m in metrics if record.get(m) is not None and record[m] == record[m]}
+        sid = str(sid)
+        with self._lock:
+            if self._members.get(sid) == (cohorts, values):
+                return False
+            if sid in self._members:
+                self._remove(sid)
+            self._members[sid] = (cohorts, values)
+            self._insert(cohorts, values)
+        return True
+
+    def remove(self, sid: str) -> bool:
+        with self._lock:
+            if str(sid) not in self._members:
+                return False
+            self._remove(str(sid))
+        return True
+
+    def update(self, frame: pd.DataFrame, metrics: Optional[List[str]] = None,
+               drop_missing: bool = False) -> Dict[str, int]:
+        """
+        frame: 학생별 1행 (index = 학생 키, 코호트 컬럼 + 지표 컬럼)
+        metrics: 규준을 만들 지표 (기본: 코호트 컬럼을 뺀 숫자 컬럼)
+        drop_missing: frame에 없는 기존 학생 제거 (frame이 전체 모집단일 때)
+        → {"added", "changed", "removed", "unchanged"}
+        """
+        if metrics is None:
+            metrics = [c for c in frame.select_dtypes(include="number").columns if c not in self.dims]
+        dims = [d for d in self.dims if d in frame.columns]
+        num = frame[metrics].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+        labels = frame[dims].to_numpy(dtype=object) if dims else np.empty((len(frame), 0), dtype=object)
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        batch: Dict[Key, List[float]] = {}
+
+        with self._lock:
+            seen = set()
+            for row, sid in enumerate(map(str, frame.index)):
+                seen.add(sid)
+                cohorts = self._cohorts(dict(zip(dims, labels[row])))
+                values = {m: float(v) for m, v in zip(metrics, num[row]) if v == v}
+                old = self._members.get(sid)
+                if old == (cohorts, values):
+                    stats["unchanged"] += 1
+                    continue
+                if old is not None:
+                    self._remove(sid)
+                    stats["changed"] += 1
+                else:
+                    stats["added"] += 1
+                self._members[sid] = (cohorts, values)
+                for c in cohorts:
+                    for metric, v in values.items():
+                        batch.setdefault((c[0], c[1], metric), []).append(v)
+            for key, xs in batch.items():
+                dist = self._dists.get(key)
+                if dist is None:
+                    self._dists[key] = _Dist(np.asarray(xs))
+                elif len(xs) == 1:
+                    dist.insert(xs[0])
+                else:
+                    dist.extend(np.asarray(xs))
+            if drop_missing:
+                for sid in [s for s in self._members if s not in seen]:
+                    self._remove(sid)
+                    stats["removed"] += 1
+        return stats
+
+    # --- 조회 ---
+    def percentile(self, metric: str, value: float, dim: str = "all", cohort: Any = "all") -> Optional[float]:
+        """코호트 안에서 value의 백분위 (0~100, 코호트가 없으면 None)"""
+        label = "all" if dim == "all" else _label(cohort)
+        dist = self._dists.get((dim, label, metric))
+        return dist.percentile(float(value)) if dist is not None else None
+
+    def student_percentiles(self, sid: str) -> Dict[str, Dict[str, Optional[float]]]:
+        """학생이 속한 코호트별 백분위 {지표: {"all": .., "grade": .., ...}} (등록되지 않은 학생이면 {})"""
+        with self._lock:
+            member = self._members.get(str(sid))
+            if member is None:
+                return {}
+            cohorts, values = member
+            return {m: {c[0]: self._dists[(c[0], c[1], m)].percentile(v) for c in cohorts}
+                    for m, v in values.items()}
+
+    def cohort_of(self, sid: str) -> Dict[str, str]:
+        member = self._members.get(str(sid))
+        return {dim: label for dim, label in member[0] if dim != "all"} if member else {}
+
+    def stats(self, dim: Optional[str] = None) -> pd.DataFrame:
+        """코호트 × 지표 요약 (count, mean, std, min, max, p10..p90)"""
+        with self._lock:
+            rows = [{"dim": d, "cohort": c, "metric": m, **dist.summary()}
+                    for (d, c, m), dist in sorted(self._dists.items()) if dim is None or d == dim]
+        return pd.DataFrame(rows)
+
+    # --- 저장 ---
+    def save(self, path=NORMS_PATH) -> Path:
+        """학생별 값만 저장 (분포는 불러올 때 코호트별 정렬 1번으로 복원)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            members = {sid: [list(map(list, cohorts)), values] for sid, (cohorts, values) in self._members.items()}
+        # 같은 폴더의 고유 임시 파일에 쓴 뒤 교체 (동시에 저장해도 서로의 임시 파일을 덮어쓰지 않음)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem + ".", suffix=".tmp.npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, dims=np.array(self.dims),
+                                    members=np.array(json.dumps(members, ensure_ascii=False)))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path=NORMS_PATH) -> "CohortNorms":
+        path = Path(path)
+        with np.load(path, allow_pickle=False) as data:
+            norms = cls(dims=[str(d) for d in data["dims"]])
+            members = json.loads(str(data["members"]))
+        batch: Dict[Key, List[float]] = {}
+        for sid, (cohorts, values) in members.items():
+            cohorts = tuple(tuple(c) for c in cohorts)
+            norms._members[sid] = (cohorts, values)
+            for c in cohorts:
+                for metric, v in values.items():
+                    batch.setdefault((c[0], c[1], metric), []).append(v)
+        norms._dists = {k: _Dist(np.asarray(xs)) for k, xs in batch.items()}
+        return norms
+
+
+_NORMS: Dict[str, CohortNorms] = {}
+_NORMS_LOCK = threading.Lock()
+
+
+def norms_path(source=None) -> Path:
+    """NH_Input 경로별 규준 파일 (source가 없으면 NORMS_PATH)"""
+    if not source:
+        return NORMS_PATH
+    src = os.path.abspath(str(source))
+    digest = hashlib.sha1(src.encode("utf-8")).hexdigest()[:10]
+    return NORMS_PATH.with_name(f"{NORMS_PATH.stem}_{Path(src).stem}_{digest}.npz")
+
+
+def get_norms(source=None) -> CohortNorms:
+    """NH_Input(source)별 프로세스 공용 규준 (저장 파일이 있으면 불러옴, 읽기 실패 시 빈 규준)"""
+    key = os.path.abspath(str(source)) if source else ""
+    with _NORMS_LOCK:
+        norms = _NORMS.get(key)
+        if norms is None:
+            path = norms_path(source)
+            try:
+                norms = CohortNorms.load(path) if path.exists() else CohortNorms()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ 코호트 규준 읽기 실패 → 새로 생성: {path} ({e})")
+                norms = CohortNorms()
+            _NORMS[key] = norms
+        return norms
+
+
+if __name__ == "__main__":
+    from .score_table import load_score_table, save_norms
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nh", default=None, help="NH_Input.csv 경로 (기본: NH_INPUT_CSV)")
+    parser.add_argument("--dim", default=None, choices=("all",) + COHORT_DIMS)
+    args = parser.parse_args()
+    table = load_score_table(args.nh)
+    if table is None:
+        print("❌ NH_Input.csv가 없습니다.")
+    else:
+        norms = table.norms or get_norms(table.source)
+        print(f"✅ 학생 {len(norms)}명 → {save_norms(table) or '저장 실패'}")
+        print(norms.stats(args.dim).to_string(index=False))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+dataset.py
+파티션 parquet 데이터셋 헬퍼
+
+source 파티션: 원본 파일 1개 = 디렉터리 1개 (source=<파일명 해시>/part-0.parquet)
+→ 파일 단위로 덮어쓰기(upsert) / 삭제가 가능하고, 읽을 때는 전체를 합쳐서 사용
+"""
+
+import hashlib
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+
+def partition_dir(dataset_dir, file_name) -> Path:
+    # 파일명(한글 등)을 그대로 디렉터리 값으로 쓰지 않도록 짧은 해시 사용
+    return Path(dataset_dir) / f"source={hashlib.sha1(file_name.encode('utf-8')).hexdigest()[:16]}"
+
+
+def write_partition(dataset_dir, file_name, df: pd.DataFrame):
+    """파일 1개 결과 저장 (임시 파일에 쓴 뒤 교체)"""
+    part = partition_dir(dataset_dir, file_name)
+    part.mkdir(parents=True, exist_ok=True)
+    tmp = part / "part-0.parquet.tmp"
+    df.to_parquet(tmp, index=False)
+    tmp.replace(part / "part-0.parquet")
+
+
+def drop_partition(dataset_dir, file_name):
+    shutil.rmtree(partition_dir(dataset_dir, file_name), ignore_errors=True)
+
+
+def load_partitions(dataset_dir, columns=None) -> pd.DataFrame:
+    """파티션 전체 → 하나의 DataFrame (파티션 순서는 디렉터리 이름 순)"""
+    parts = sorted(Path(dataset_dir).glob("source=*/part-0.parquet"))
+    if not parts:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat([pd.read_parquet(p, columns=columns) for p in parts], ignore_index=True)
@@ -1,5 +1,11 @@
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
 from langgraph.graph import StateGraph, START, END
 from ..state import PipelineState
+from ..batch_runner import run_batch
+from .. import report_writer
+from ..tracing import traced
 from ..nodes import (
     ingest_inputs,
     validate_schema,
@@ -7,42 +13,105 @@ from ..nodes import (
     neuro_parse,
     ai_teacher_helper,
     generate_report,
+    persist_records,
 )
+from ..record_store import PERSIST_BATCH, get_store
+
+# 실행 순서대로 등록되는 노드 목록 (이름, 모듈)
+NODES = [
+    ("ingest_inputs", ingest_inputs),
+    ("validate_schema", validate_schema),
+    ("score_engine", score_engine),
+    ("neuro_parse", neuro_parse),
+    ("ai_teacher_helper", ai_teacher_helper),
+    ("generate_report", generate_report),
+    ("persist_records", persist_records),
+]
+
+# 컴파일된 그래프 캐시 (프로세스당 1회 컴파일)
+_APP = None
+_APP_LOCK = threading.Lock()
 
-def run_graph(forms_csv: str, neuro_pdf: str):
+
+def build_graph() -> StateGraph:
     """
-    LangGraph 기반 파이프라인 실행 함수
+    노드/엣지를 등록한 StateGraph 생성 (컴파일 전)
     """
     graph = StateGraph(PipelineState)
 
-    # 노드 등록
-    graph.add_node("ingest_inputs", ingest_inputs.run)
-    graph.add_node("validate_schema", validate_schema.run)
-    graph.add_node("score_engine", score_engine.run)
-    graph.add_node("neuro_parse", neuro_parse.run)
-    graph.add_node("ai_teacher_helper", ai_teacher_helper.run)
-    graph.add_node("generate_report", generate_report.run)
-
-    # 노드 간 연결
-    graph.add_edge(START, "ingest_inputs")
-    graph.add_edge("ingest_inputs", "validate_schema")
-    graph.add_edge("validate_schema", "score_engine")
-    graph.add_edge("score_engine", "neuro_parse")
-    graph.add_edge("neuro_parse", "ai_teacher_helper")
-    graph.add_edge("ai_teacher_helper", "generate_report")
-    graph.add_edge("generate_report", END)
-
-    app = graph.compile()
+    # 노드 등록 (모듈의 run을 빌드 시점에 바인딩, 실행 시간/메모리/예외 추적 래퍼)
+    for name, module in NODES:
+        graph.add_node(name, traced(name, module.run))
+
+    # 노드 간 연결 (START → ... → END 직렬)
+    names = [name for name, _ in NODES]
+    graph.add_edge(START, names[0])
+    for src, dst in zip(names, names[1:]):
+        graph.add_edge(src, dst)
+    graph.add_edge(names[-1], END)
+    return graph
+
+
+def get_app():
+    """
+    컴파일된 그래프 반환 (최초 호출 시에만 build + compile)
+    """
+    global _APP
+    if _APP is None:
+        with _APP_LOCK:
+            if _APP is None:
+                _APP = build_graph().compile()
+    return _APP
+
+
+def invalidate_graph():
+    """
+    캐시된 그래프 폐기 — 노드 run 함수를 교체/리로드한 뒤 호출
+    """
+    global _APP
+    with _APP_LOCK:
+        _APP = None
+
 
+def _initial_state(forms_csv: str, neuro_pdf: str, defer_llm: bool = False) -> PipelineState:
     # 초기 상태 (빈값으로 시작)
-    state = PipelineState(
-        raw_inputs={"forms_csv": forms_csv, "neuro_pdf": neuro_pdf},
-        scores={},
-        student={"name": "-", "student_id": "-", "grade": "-"}
-    )
+    raw_inputs = {"forms_csv": forms_csv, "neuro_pdf": neuro_pdf}
+    if defer_llm:
+        raw_inputs["defer_llm"] = True
+    return PipelineState(raw_inputs=raw_inputs)
+
+
+def stream_graph(forms_csv: str, neuro_pdf: str, defer_llm: bool = False) -> Iterator[Tuple[str, dict, PipelineState]]:
+    """
+    노드 1개가 끝날 때마다 (노드 이름, 변경분, 지금까지 반영된 상태)를 yield
+    변경분 log의 trace 항목에 노드 실행 시간이 들어 있음 / 마지막 항목의 상태가 최종 상태
+    """
+    state = _initial_state(forms_csv, neuro_pdf, defer_llm)
+    for chunk in get_app().stream(state, stream_mode="updates"):
+        for node, update in chunk.items():
+            state = state.apply(update or {})
+            if update and "report" in update:
+                # 리포트 파일은 백그라운드 저장 → 이벤트를 받은 쪽이 바로 읽을 수 있게 대기
+                report_writer.flush()
+            yield node, update or {}, state
 
-    # 그래프 실행
-    final_state = app.invoke(state)
+
+def run_graph(forms_csv: str, neuro_pdf: str,
+              on_event: Optional[Callable[[str, dict, PipelineState], None]] = None):
+    """
+    LangGraph 기반 파이프라인 실행 함수
+    on_event(node, update, state)를 주면 노드가 끝날 때마다 호출 (대시보드 진행 표시용)
+    """
+    if on_event is None:
+        # 그래프 실행
+        final_state = get_app().invoke(_initial_state(forms_csv, neuro_pdf))
+    else:
+        final_state = None
+        for node, update, state in stream_graph(forms_csv, neuro_pdf):
+            on_event(node, update, state)
+            final_state = state
+    # 리포트 파일은 백그라운드 저장 → 호출자가 바로 읽을 수 있게 대기
+    report_writer.flush()
 
     # ✅ 결과 report 안전하게 추출
     report_path = (
@@ -53,3 +122,92 @@ def run_graph(forms_csv: str, neuro_pdf: str):
 
     print(f"✅ Graph completed. Report: {report_path}")
     return final_state
+
+
+def _invoke_one(args: Tuple[str, str, bool]):
+    """워커 프로세스용: 학생 1명 실행 후 전송 가능한 dict로 반환"""
+    forms_csv, pdf_path, defer_llm = args
+    final_state = get_app().invoke(_initial_state(forms_csv, pdf_path, defer_llm))
+    report_writer.flush()
+    data = dict(final_state) if isinstance(final_state, dict) else final_state.model_dump()
+    # 공유 forms 테이블은 부모 프로세스로 되돌려 보낼 필요 없음
+    raw_inputs = dict(data.get("raw_inputs") or {})
+    raw_inputs.pop("forms_table", None)
+    data["raw_inputs"] = raw_inputs
+    return data
+
+
+def run_graph_many(
+    forms_csv: str,
+    pdf_paths: Iterable[str],
+    workers: int = 1,
+    timeout: Optional[float] = None,
+    ordered: bool = True,
+    defer_llm: bool = False,
+) -> Iterator[Tuple[str, Optional[object], Optional[Exception]]]:
+    """
+    여러 학생 PDF를 같은 컴파일 그래프로 실행 (제너레이터)
+
+    학생 1명 처리가 끝날 때마다 (pdf_path, final_state, error)를 yield.
+    한 학생에서 예외가 나도 나머지 학생은 계속 처리한다.
+    workers > 1이면 batch_runner 프로세스 풀에서 실행 (각 워커가 그래프를 1회 컴파일).
+    defer_llm=True면 AI 해석 / 리포트 / 저장 노드를 건너뛰고, 이후 interpret_and_report로 한꺼번에 처리.
+    """
+    if workers and workers > 1:
+        jobs = [(forms_csv, str(p), defer_llm) for p in pdf_paths]
+        for res in run_batch(_invoke_one, jobs, workers=workers, timeout=timeout, ordered=ordered):
+            pdf_path = res.item[1]
+            if res.ok:
+                yield pdf_path, res.value, None
+            else:
+                yield pdf_path, None, RuntimeError(res.error)
+        return
+
+    app = get_app()
+    for pdf_path in pdf_paths:
+        try:
+            final_state = app.invoke(_initial_state(forms_csv, str(pdf_path), defer_llm))
+        except Exception as e:
+            yield pdf_path, None, e
+            continue
+        report_writer.flush()
+        yield pdf_path, final_state, None
+
+
+def interpret_and_report_iter(states: List[object], client=None, store=None) -> Iterator[Tuple[int, PipelineState]]:
+    """
+    defer_llm으로 실행한 상태들의 AI 해석을 동시에 요청하고,
+    해석이 끝나는 학생부터 리포트를 만들어 (입력 인덱스, 최종 상태)를 yield
+    최종 상태는 PERSIST_BATCH명씩 모아 저장소에 한 트랜잭션으로 기록
+    client / store: LLM 클라이언트, 기록 저장소 (기본: 프로세스 공용)
+    """
+    states = [s if isinstance(s, PipelineState) else PipelineState(**dict(s)) for s in states]
+    items = [{"student": s.student, "neuro": s.neuro} for s in states]
+    store = store or get_store()
+    pending: List[PipelineState] = []
+    try:
+        for i, summary in ai_teacher_helper.iter_interpret(items, client):
+            s = ai_teacher_helper.apply_summary(states[i], summary)
+            # 해석이 도착했으므로 지연 표시를 풀어야 generate_report가 실제로 리포트를 만듦
+            s = s.apply({"raw_inputs": {"defer_llm": False}})
+            s = s.apply(generate_report.run(s))
+            report_writer.flush()
+            pending.append(s)
+            if len(pending) >= PERSIST_BATCH:
+                store.persist(pending)
+                pending.clear()
+            yield i, s
+    finally:
+        # 중간에 멈춰도 끝난 학생은 저장
+        if pending:
+            store.persist(pending)
+
+
+def interpret_and_report(states: List[object], client=None, store=None) -> List[PipelineState]:
+    """
+    defer_llm으로 실행한 상태들을 모아 AI 해석을 비동기 일괄 요청한 뒤 리포트 재생성 (입력 순서 유지)
+    """
+    reported: List[Optional[PipelineState]] = [None] * len(states)
+    for i, state in interpret_and_report_iter(states, client, store):
+        reported[i] = state
+    return reported
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+forms_table.py
+설문(forms) CSV 공유 캐시 — 배치당 1회 파싱 + student_id 인덱스
+"""
+
+import codecs
+import csv
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+ENC_CANDIDATES = ["utf-8-sig", "utf-8", "cp949", "euc-kr"]
+SEP_CANDIDATES = ",;\t|"
+
+# (경로, mtime_ns, size) → FormsTable
+_CACHE: Dict[Tuple[str, int, int], "FormsTable"] = {}
+# 경로 → 마지막으로 감지된 (encoding, sep)
+_DIALECT: Dict[str, Tuple[str, str]] = {}
+_LOCK = threading.Lock()
+
+
+@dataclass
+class FormsTable:
+    """파싱된 forms CSV + 대문자 student_id → 행 인덱스"""
+    path: str
+    encoding: str
+    sep: str
+    df: pd.DataFrame
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    index: Dict[str, List[int]] = field(default_factory=dict)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.df.columns)
+
+    def rows(self, sid: Optional[str]) -> List[Dict[str, Any]]:
+        """student_id(대소문자 무시)에 해당하는 모든 행"""
+        if not sid:
+            return []
+        return [self.records[i] for i in self.index.get(str(sid).upper(), [])]
+
+    def row(self, sid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """student_id에 해당하는 첫 행 (없으면 None)"""
+        rows = self.rows(sid)
+        return dict(rows[0]) if rows else None
+
+
+def _decode_head(head: bytes, encoding: str) -> str:
+    """앞부분 디코드 — 64KB 경계에서 잘린 멀티바이트 문자는 버림 (잘못된 바이트는 그대로 오류)"""
+    return codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+
+
+def _sniff(path: str) -> Tuple[str, str]:
+    """앞부분만 읽어 인코딩/구분자 감지"""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+
+    encoding = "latin1"
+    for enc in ENC_CANDIDATES:
+        try:
+            text = _decode_head(head, enc)
+            encoding = enc
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text = head.decode("latin1")
+
+    try:
+        sep = csv.Sniffer().sniff(text.splitlines()[0] if text else "", delimiters=SEP_CANDIDATES).delimiter
+    except (csv.Error, IndexError):
+        sep = ","
+    return encoding, sep
+
+
+def _build(path: str) -> FormsTable:
+    dialect = _DIALECT.get(path)
+    df = None
+    if dialect:
+        # 지난번 감지 결과로 바로 시도 (파일이 바뀌었어도 대부분 동일)
+        try:
+            df = pd.read_csv(path, sep=dialect[1], encoding=dialect[0])
+        except (UnicodeDecodeError, pd.errors.ParserError):
+            df = None
+    if df is None:
+        dialect = _sniff(path)
+        try:
+            df = pd.read_csv(path, sep=dialect[1], encoding=dialect[0])
+        except (UnicodeDecodeError, pd.errors.ParserError):
+            # 앞부분으로 고른 인코딩이 뒤쪽에서 깨지면 나머지 후보를 파일 전체로 확인
+            df = None
+            for enc in [e for e in ENC_CANDIDATES if e != dialect[0]]:
+                try:
+                    df = pd.read_csv(path, sep=dialect[1], encoding=enc)
+                except (UnicodeDecodeError, pd.errors.ParserError):
+                    continue
+                dialect = (enc, dialect[1])
+                break
+            if df is None:
+                raise
+    _DIALECT[path] = dialect
+
+    records = df.to_dict("records")
+    index: Dict[str, List[int]] = {}
+    if "student_id" in df.columns:
+        for i, sid in enumerate(df["student_id"].astype(str).str.upper()):
+            index.setdefault(sid, []).append(i)
+
+    return FormsTable(path=path, encoding=dialect[0], sep=dialect[1], df=df, records=records, index=index)
+
+
+def load_forms_table(path: str) -> FormsTable:
+    """
+    forms CSV 로드 (경로 + mtime + 크기 기준 캐시)
+    파일이 바뀌지 않았다면 디스크를 다시 읽지 않는다.
+    """
+    path = os.path.abspath(str(path))
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _LOCK:
+        table = _CACHE.get(key)
+        if table is None:
+            # 같은 경로의 이전 버전은 폐기
+            for old in [k for k in _CACHE if k[0] == path]:
+                del _CACHE[old]
+            table = _build(path)
+            _CACHE[key] = table
+    return table
+
+
+def clear_cache():
+    """캐시 전체 초기화"""
+    with _LOCK:
+        _CACHE.clear()
+        _DIALECT.clear()
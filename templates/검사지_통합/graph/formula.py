@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""
+formula.py
+score_engine.yaml 계산식 컴파일러 — 파싱 1회, 열 단위(벡터) 평가
+
+지원 문법 (Python ast로 파싱 후 허용된 노드만 클로저로 변환, eval 사용 안 함)
+- 컬럼 이름, 숫자, + - * / ** , 비교(< <= > >= == !=), and / or / not
+- abs(x), mean(...), sum(...)          : 인자가 여러 개거나 범위면 행 단위 평균/합
+- items[Q1:Q5]                          : Q1..Q5 컬럼 범위
+- weighted_sum({beta: 0.4, theta: 0.3}) : 가중합
+- minmax(x, lo, hi)                     : 반 전체 기준 lo~hi 정규화
+다른 계산식 결과를 참조하면 의존 순서대로 평가하고, 순환 참조는 ValueError.
+
+YAML 형식
+- score_engine: {id: "식"}                               (graph/score_engine.yaml)
+- norms: [{id, compute, normalize: "minmax(0, 100)"}]    (config/score_engine.yaml)
+  → {id}_raw = compute, {id} = minmax({id}_raw, 0, 100)
+"""
+
+import ast
+import os
+import re
+import threading
+import warnings
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+_AGGS = ("mean", "sum")
+_BINOPS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Pow: lambda a, b: a ** b,
+}
+_CMPOPS = {
+    ast.Lt: lambda a, b: a < b,
+    ast.LtE: lambda a, b: a <= b,
+    ast.Gt: lambda a, b: a > b,
+    ast.GtE: lambda a, b: a >= b,
+    ast.Eq: lambda a, b: a == b,
+    ast.NotEq: lambda a, b: a != b,
+}
+
+
+def _keep_missing(result, *operands):
+    """비교 결과에서 피연산자가 결측(NaN)인 자리는 NA (nullable boolean) — 결측이 참/거짓으로 바뀌지 않게"""
+    if not isinstance(result, pd.Series):
+        return result
+    missing = None
+    for x in operands:
+        if isinstance(x, pd.Series):
+            missing = x.isna() if missing is None else (missing | x.isna())
+    if missing is None or not missing.any():
+        return result
+    return result.astype("boolean").mask(missing)
+
+
+_RANGE_RE = re.compile(r"^(.*?)(\d+)$")
+
+
+class FormulaError(ValueError):
+    pass
+
+
+class _Env:
+    """평가 환경: 입력 프레임 + 사전 집계 프레임 + 이미 계산된 결과"""
+
+    def __init__(self, df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]]):
+        self.df = df
+        self.aggregates = aggregates or {}
+        self.values: Dict[str, Any] = {}
+
+    def column(self, name: str):
+        if name in self.values:
+            return self.values[name]
+        if name in self.df.columns:
+            return self.df[name]
+        raise FormulaError(f"컬럼 없음: {name}")
+
+    def aggregate(self, func: str, name: str):
+        agg = self.aggregates.get(func)
+        if agg is not None and name in agg.columns:
+            return agg[name].reindex(self.df.index)
+        return None
+
+    def expand(self, start: str, stop: str) -> List[str]:
+        """items[Q1:Q5] → ["Q1", ..., "Q5"] (숫자 접미사 기준, 아니면 컬럼 순서 기준)"""
+        ms, me = _RANGE_RE.match(start), _RANGE_RE.match(stop)
+        if ms and me and ms.group(1) == me.group(1):
+            lo, hi = int(ms.group(2)), int(me.group(2))
+            return [f"{ms.group(1)}{i}" for i in range(lo, hi + 1)]
+        cols = list(self.df.columns)
+        try:
+            return cols[cols.index(start):cols.index(stop) + 1]
+        except ValueError:
+            raise FormulaError(f"범위 컬럼 없음: {start}:{stop}")
+
+
+def _rowwise(func: str, parts: List[Any], index) -> pd.Series:
+    m = np.column_stack([np.asarray(p, dtype="float64") * np.ones(len(index)) for p in parts])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 전부 NaN인 행
+        out = np.nanmean(m, axis=1) if func == "mean" else np.nansum(m, axis=1)
+    out[np.isnan(m).all(axis=1)] = np.nan
+    return pd.Series(out, index=index)
+
+
+def _minmax(x, lo: float, hi: float):
+    x = pd.Series(x, dtype="float64") if not isinstance(x, pd.Series) else x.astype("float64")
+    xmin, xmax = x.min(), x.max()
+    if pd.isna(xmin) or xmax == xmin:
+        return x.where(x.isna(), float(lo))
+    return (x - xmin) * (hi - lo) / (xmax - xmin) + lo
+
+
+class _Compiler:
+    """ast → 클로저(env → 값). deps: 참조 이름, aggregates: (func, metric), cohort: 반 전체 값 필요(minmax)"""
+
+    def __init__(self):
+        self.deps: Set[str] = set()
+        self.aggregates: Set[Tuple[str, str]] = set()
+        self.cohort = False
+
+    def compile(self, node) -> Callable[[_Env], Any]:
+        method = getattr(self, "_" + type(node).__name__, None)
+        if method is None:
+            raise FormulaError(f"지원하지 않는 문법: {type(node).__name__}")
+        return method(node)
+
+    def _Expression(self, node):
+        return self.compile(node.body)
+
+    def _Constant(self, node):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise FormulaError(f"숫자만 허용: {node.value!r}")
+        v = float(node.value)
+        return lambda env: v
+
+    def _Name(self, node):
+        name = node.id
+        self.deps.add(name)
+        return lambda env: env.column(name)
+
+    def _UnaryOp(self, node):
+        f = self.compile(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda env: -f(env)
+        if isinstance(node.op, ast.UAdd):
+            return f
+        if isinstance(node.op, ast.Not):
+            def run(env):
+                # NaN은 참으로 변환되므로 결측은 가려 두고 NA(nullable boolean)로 유지 → 다른 연산처럼 결측 전파
+                v = pd.Series(f(env))
+                missing = v.isna()
+                return (v == 0).astype("boolean").mask(missing)
+            return run
+        raise FormulaError("지원하지 않는 단항 연산")
+
+    def _BinOp(self, node):
+        op = _BINOPS.get(type(node.op))
+        if op is None:
+            raise FormulaError(f"지원하지 않는 연산: {type(node.op).__name__}")
+        a, b = self.compile(node.left), self.compile(node.right)
+        return lambda env: op(a(env), b(env))
+
+    def _Compare(self, node):
+        left = self.compile(node.left)
+        pairs = []
+        for op, right in zip(node.ops, node.comparators):
+            fn = _CMPOPS.get(type(op))
+            if fn is None:
+                raise FormulaError(f"지원하지 않는 비교: {type(op).__name__}")
+            pairs.append((fn, self.compile(right)))
+
+        def run(env):
+            a, result = left(env), None
+            for fn, right in pairs:
+                b = right(env)
+                r = _keep_missing(fn(a, b), a, b)
+                result = r if result is None else (result & r)
+                a = b
+            return result
+        return run
+
+    def _BoolOp(self, node):
+        parts = [self.compile(v) for v in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def run(env):
+            result = None
+            for p in parts:
+                v = p(env)
+                result = v if result is None else ((result & v) if is_and else (result | v))
+            return result
+        return run
+
+    def _items(self, node):
+        """items[Q1:Q5] → (start, stop)"""
+        sl = node.slice
+        if (isinstance(node.value, ast.Name) and node.value.id == "items" and isinstance(sl, ast.Slice)
+                and isinstance(sl.lower, ast.Name) and isinstance(sl.upper, ast.Name) and sl.step is None):
+            return sl.lower.id, sl.upper.id
+        raise FormulaError("범위는 items[Q1:Q5] 형식만 허용")
+
+    def _Subscript(self, node):
+        start, stop = self._items(node)
+        self.deps.update({start, stop})
+        return lambda env: [env.column(c) for c in env.expand(start, stop)]
+
+    def _Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise FormulaError("함수 호출은 이름(인자) 형식만 허용")
+        func, args = node.func.id, node.args
+
+        if func == "abs" and len(args) == 1:
+            f = self.compile(args[0])
+            return lambda env: np.abs(f(env))
+
+        if func in _AGGS and args:
+            # 단일 지표 이름 → 사전 집계(학생별 mean/sum)가 있으면 그 값 사용
+            if len(args) == 1 and isinstance(args[0], ast.Name):
+                name = args[0].id
+                self.deps.add(name)
+                self.aggregates.add((func, name))
+
+                def single(env):
+                    agg = env.aggregate(func, name)
+                    return agg if agg is not None else env.column(name)
+                return single
+            parts = [self.compile(a) for a in args]
+
+            def many(env):
+                flat = []
+                for p in parts:
+                    v = p(env)
+                    flat.extend(v if isinstance(v, list) else [v])
+                return _rowwise(func, flat, env.df.index)
+            return many
+
+        if func == "weighted_sum" and len(args) == 1 and isinstance(args[0], ast.Dict):
+            terms = []
+            for k, v in zip(args[0].keys, args[0].values):
+                try:
+                    w = float(ast.literal_eval(v))
+                except (ValueError, TypeError):
+                    w = None
+                if not isinstance(k, ast.Name) or w is None:
+                    raise FormulaError("weighted_sum은 {컬럼: 숫자} 형식만 허용")
+                self.deps.add(k.id)
+                terms.append((k.id, w))
+            return lambda env: sum(w * env.column(c) for c, w in terms)
+
+        if func == "minmax" and len(args) == 3:
+            self.cohort = True
+            x = self.compile(args[0])
+            lo, hi = (float(ast.literal_eval(a)) for a in args[1:])
+            return lambda env: _minmax(x(env), lo, hi)
+
+        raise FormulaError(f"지원하지 않는 함수: {func}({len(args)})")
+
+
+@dataclass
+class Formula:
+    id: str
+    expr: str
+    fn: Callable[[_Env], Any]
+    deps: Set[str] = field(default_factory=set)
+    aggregates: Set[Tuple[str, str]] = field(default_factory=set)
+    cohort: bool = False
+
+    def evaluate(self, df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None):
+        return self.fn(_Env(df, aggregates))
+
+
+def _parse(expr: str):
+    # YAML의 weighted_sum({beta: 0.4}) 처럼 dict 키가 이름인 형태도 ast로 그대로 파싱됨
+    try:
+        return ast.parse(str(expr).strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"식 파싱 실패: {expr} ({e.msg})")
+
+
+def compile_formula(fid: str, expr: str) -> Formula:
+    c = _Compiler()
+    fn = c.compile(_parse(expr))
+    return Formula(fid, str(expr), fn, c.deps - {fid}, c.aggregates, c.cohort)
+
+
+def _wrap_normalize(raw_id: str, normalize: str) -> str:
+    """normalize: "minmax(0, 100)" → "minmax(raw_id, 0, 100)" """
+    node = _parse(normalize).body
+    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "minmax"
+            and len(node.args) == 2):
+        raise FormulaError(f"지원하지 않는 normalize: {normalize}")
+    lo, hi = (ast.unparse(a) for a in node.args)
+    return f"minmax({raw_id}, {lo}, {hi})"
+
+
+class Plan:
+    """의존 순서로 정렬된 계산식 묶음"""
+
+    def __init__(self, formulas: List[Formula]):
+        by_id = {f.id: f for f in formulas}
+        if len(by_id) != len(formulas):
+            raise FormulaError("계산식 id 중복")
+        order, state = [], {}
+
+        def visit(fid, path):
+            if state.get(fid) == "done":
+                return
+            if state.get(fid) == "visiting":
+                raise FormulaError("순환 참조: " + " → ".join(path + [fid]))
+            state[fid] = "visiting"
+            for dep in sorted(by_id[fid].deps):
+                if dep in by_id:
+                    visit(dep, path + [fid])
+            state[fid] = "done"
+            order.append(by_id[fid])
+
+        for f in formulas:
+            visit(f.id, [])
+        self.formulas: List[Formula] = order
+
+    @property
+    def ids(self) -> List[str]:
+        return [f.id for f in self.formulas]
+
+    @property
+    def inputs(self) -> Set[str]:
+        """계산식이 아닌 참조 이름 (입력 컬럼)"""
+        ids = set(self.ids)
+        return {d for f in self.formulas for d in f.deps} - ids
+
+    @property
+    def aggregates(self) -> Set[Tuple[str, str]]:
+        return {a for f in self.formulas for a in f.aggregates}
+
+    @property
+    def cohort(self) -> bool:
+        """True면 학생별로 나눠 평가할 수 없음 (minmax 등 반 전체 기준)"""
+        return any(f.cohort for f in self.formulas)
+
+    def evaluate(self, df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+                 strict: bool = False) -> pd.DataFrame:
+        """
+        df에 계산 결과 컬럼을 추가한 새 프레임 반환
+        aggregates: {"mean": 학생×지표, "sum": 학생×지표} — 반복 측정 지표의 사전 집계
+        strict=False면 입력이 없는 식은 경고 후 NaN (이에 의존하는 식도 NaN)
+        """
+        env = _Env(df, aggregates)
+        out = {}
+        for f in self.formulas:
+            try:
+                v = f.fn(env)
+            except FormulaError as e:
+                if strict:
+                    raise
+                print(f"⚠️ {f.id} 계산 실패: {e}")
+                v = np.nan
+            if not isinstance(v, pd.Series):
+                v = pd.Series(v, index=df.index, dtype="float64") if np.ndim(v) == 0 else pd.Series(v, index=df.index)
+            env.values[f.id] = v
+            out[f.id] = v
+        return df.assign(**out)
+
+
+def plan_from_config(cfg: Dict[str, Any]) -> Plan:
+    formulas = []
+    for fid, expr in (cfg.get("score_engine") or {}).items():
+        formulas.append(compile_formula(fid, expr))
+    for norm in cfg.get("norms") or []:
+        fid = norm["id"]
+        if norm.get("normalize"):
+            formulas.append(compile_formula(f"{fid}_raw", norm["compute"]))
+            formulas.append(compile_formula(fid, _wrap_normalize(f"{fid}_raw", norm["normalize"])))
+        else:
+            formulas.append(compile_formula(fid, norm["compute"]))
+    return Plan(formulas)
+
+
+_PLANS: Dict[Tuple[str, int], Plan] = {}
+_LOCK = threading.Lock()
+
+
+def load_plan(yaml_path) -> Plan:
+    """YAML 경로 + mtime 기준 컴파일 결과 캐시"""
+    path = os.path.abspath(str(yaml_path))
+    key = (path, os.stat(path).st_mtime_ns)
+    with _LOCK:
+        plan = _PLANS.get(key)
+    if plan is None:
+        with open(path, "r", encoding="utf-8") as f:
+            plan = plan_from_config(yaml.safe_load(f) or {})
+        with _LOCK:
+            for k in [k for k in _PLANS if k[0] == path]:
+                del _PLANS[k]
+            _PLANS[key] = plan
+    return plan
+
+
+def compile_rule(expr: str) -> Formula:
+    """리스크 규칙 조건식 (예: "attention_index < 35 and study_habit > 70")"""
+    return compile_formula("_rule", expr)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+llm_cache.py
+LLM 프롬프트-응답 캐시 (SQLite)
+
+같은 입력으로 파이프라인을 다시 돌릴 때(예: PDF 폰트 오류 후 재실행) 동일한 프롬프트를
+다시 보내지 않도록, (model, temperature, 정규화된 프롬프트 해시) 기준으로 응답을 저장한다.
+
+- LLM_CACHE_PATH   : 저장 위치 (두 파이프라인이 같은 파일을 쓰게 하려면 동일 경로 지정)
+- LLM_CACHE_TTL    : 유효 시간(초, 기본 7일)
+- LLM_CACHE_MAX    : 최대 항목 수 (초과 시 오래 사용하지 않은 순으로 삭제)
+- LLM_CACHE_MAX_BYTES : 응답 총 크기 상한(바이트, 기본 200MB) — 초과 시 오래 사용하지 않은 순으로 삭제
+- LLM_CACHE_BYPASS : 1이면 캐시를 읽지 않고 항상 새로 호출 (결과는 저장)
+
+표준 라이브러리만 사용 — poll_analysis_agent/graph/nodes/llm_cache.py는 이 파일을 경로로 불러와 공유한다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH") or Path(__file__).resolve().parents[1] / "data" / "cache" / "llm_cache.sqlite")
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX = int(os.getenv("LLM_CACHE_MAX", "20000"))
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+
+def bypass_env() -> bool:
+    """LLM_CACHE_BYPASS=1이면 캐시를 읽지 않음"""
+    return os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+
+
+def _normalize(messages: Iterable[Any]) -> list:
+    """dict / LangChain 메시지 모두 (role, 공백 정규화된 content)로 변환"""
+    out = []
+    for m in messages:
+        if isinstance(m, dict):
+            role, content = m.get("role", "user"), m.get("content", "")
+        else:
+            role, content = getattr(m, "type", "user"), getattr(m, "content", str(m))
+        out.append([role, " ".join(str(content).split())])
+    return out
+
+
+def cache_key(model: str, temperature: Optional[float], messages: Iterable[Any]) -> str:
+    payload = json.dumps([model, temperature, _normalize(messages)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=None, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.path = Path(path or CACHE_PATH)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)")
+            # 이전 버전 파일: 응답 크기 컬럼 추가
+            if "size" not in {row[1] for row in conn.execute("PRAGMA table_info(llm_cache)")}:
+                conn.execute("ALTER TABLE llm_cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE llm_cache SET size=length(CAST(response AS BLOB))")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT response, created_at FROM llm_cache WHERE key=?", (key,)).fetchone()
+            now = time.time()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            db.execute("UPDATE llm_cache SET last_used=? WHERE key=?", (now, key))
+            db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used, size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now, len(response.encode("utf-8"))),
+            )
+            # 만료 항목 삭제 + 최대 항목 수 / 총 크기 초과분은 오래 사용하지 않은 순으로 삭제
+            if self.ttl:
+                db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        """오래 사용하지 않은 항목부터 삭제 (항목 수 / 총 크기 제한)"""
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY last_used ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM llm_cache WHERE key=?", victims)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_DEFAULT: Optional[LLMCache] = None
+
+
+def get_cache() -> LLMCache:
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = LLMCache()
+    return _DEFAULT
+
+
+def cached_chat(model: str, messages: list, temperature: Optional[float],
+                call: Callable[[], str], bypass: Optional[bool] = None) -> str:
+    """
+    캐시에 있으면 저장된 응답, 없으면 call()로 호출한 뒤 저장
+    call은 응답 텍스트(str)를 반환해야 한다. 호출 실패(예외)는 저장하지 않는다.
+    """
+    cache = get_cache()
+    key = cache_key(model, temperature, messages)
+    bypass = bypass_env() if bypass is None else bypass
+    if not bypass:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    text = call()
+    cache.put(key, model, text)
+    return text
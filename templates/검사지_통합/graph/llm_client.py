@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+llm_client.py
+공유 LLM 클라이언트 — 동시 요청 수 제한(세마포어) + 토큰 버킷 속도 제한 + 지수 백오프 재시도
+
+- llm: invoke(messages) / ainvoke(messages)를 가진 LangChain 채팅 모델
+  (테스트 시 langchain_core의 FakeListChatModel, 또는 OPENAI_BASE_URL로 로컬 가짜 서버 지정)
+- 동기(invoke)와 비동기(ainvoke) 모두 같은 속도 제한을 공유
+- 같은 (model, temperature, 프롬프트)는 llm_cache에 저장된 응답 재사용 (LLM_CACHE_BYPASS=1이면 새로 호출)
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, List, Optional
+
+from .llm_cache import LLMCache, bypass_env, cache_key, get_cache
+
+LLM_MAX_CONCURRENCY = int(os.getenv("NH_LLM_MAX_CONCURRENCY", "8"))
+LLM_RATE_PER_SEC = float(os.getenv("NH_LLM_RATE_PER_SEC", "5"))
+LLM_BURST = int(os.getenv("NH_LLM_BURST", "10"))
+LLM_MAX_RETRIES = int(os.getenv("NH_LLM_MAX_RETRIES", "4"))
+
+
+class TokenBucket:
+    """초당 rate개 보충, 최대 capacity개 보관하는 토큰 버킷 (스레드/코루틴 공용)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """토큰 1개 예약 후 기다려야 할 시간(초) 반환"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class LLMClient:
+    def __init__(self, llm, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 rate_per_sec: float = LLM_RATE_PER_SEC, burst: int = LLM_BURST,
+                 max_retries: int = LLM_MAX_RETRIES, backoff: float = 1.0,
+                 cache: Optional[LLMCache] = None, use_cache: bool = True):
+        self.llm = llm
+        self.cache = cache
+        self.use_cache = use_cache
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self._sync_sem = threading.BoundedSemaphore(self.max_concurrency)
+        # asyncio.Semaphore는 이벤트 루프에 묶이므로 루프마다 생성 (닫힌 루프는 약한 참조로 자동 제거)
+        self._async_sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    def _delay(self, attempt: int) -> float:
+        # 지수 백오프 + 지터
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def _async_sem(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._async_sems.get(loop)
+        if sem is None:
+            sem = self._async_sems[loop] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    def _model(self) -> str:
+        return str(getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None) or type(self.llm).__name__)
+
+    def _cache_key(self, messages: List[Any]) -> Optional[str]:
+        if not self.use_cache:
+            return None
+        return cache_key(self._model(), getattr(self.llm, "temperature", None), messages)
+
+    def _cached(self, key: Optional[str]):
+        if key is None or bypass_env():
+            return None
+        text = (self.cache or get_cache()).get(key)
+        if text is None:
+            return None
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=text)
+
+    def _store(self, key: Optional[str], response):
+        if key is not None:
+            content = getattr(response, "content", response)
+            if isinstance(content, str):
+                (self.cache or get_cache()).put(key, self._model(), content)
+        return response
+
+    def invoke(self, messages: List[Any]):
+        key = self._cache_key(messages)
+        hit = self._cached(key)
+        if hit is not None:
+            return hit
+        return self._store(key, self._invoke(messages))
+
+    async def ainvoke(self, messages: List[Any]):
+        # SQLite 조회/저장은 블로킹 → 이벤트 루프를 막지 않도록 스레드에서 실행
+        key = self._cache_key(messages)
+        hit = await asyncio.to_thread(self._cached, key) if key is not None else None
+        if hit is not None:
+            return hit
+        response = await self._ainvoke(messages)
+        if key is None:
+            return response
+        return await asyncio.to_thread(self._store, key, response)
+
+    def _invoke(self, messages: List[Any]):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                with self._sync_sem:
+                    return self.llm.invoke(messages)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._delay(attempt))
+
+    async def _ainvoke(self, messages: List[Any]):
+        sem = self._async_sem()
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire_async()
+            try:
+                async with sem:
+                    return await self.llm.ainvoke(messages)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+
+
+_DEFAULT: Optional[LLMClient] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """프로세스 공용 클라이언트 (ChatOpenAI 1개 재사용)"""
+    global _DEFAULT
+    if _DEFAULT is None:
+        with _DEFAULT_LOCK:
+            if _DEFAULT is None:
+                from langchain_openai import ChatOpenAI
+                _DEFAULT = LLMClient(ChatOpenAI(model="gpt-4o-mini", temperature=0.4))
+    return _DEFAULT
+
+
+def set_client(client: Optional[LLMClient]):
+    """공용 클라이언트 교체 (테스트용 가짜 LLM 주입 등). None이면 기본값으로 재생성"""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        _DEFAULT = client
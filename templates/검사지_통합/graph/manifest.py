@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+manifest.py
+증분 배치용 처리 목록 (data/processed/manifest.json)
+
+PDF마다 (path, size, mtime, 내용 해시, 파서 버전)을 기록해 두고,
+다음 실행 때 새로 추가/변경된 파일과 삭제된 파일만 골라낸다.
+- size·mtime이 같으면 해시 계산 없이 그대로 사용
+- size·mtime이 달라도 해시와 파서 버전이 같으면 (복사/touch 등) 재처리하지 않음
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .neuro_cache import file_sha256
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    hash: str
+    version: str
+    processed_at: float = 0.0
+
+
+class Manifest:
+    def __init__(self, path, entries: Dict[str, ManifestEntry] = None):
+        self.path = Path(path)
+        self.entries: Dict[str, ManifestEntry] = entries or {}
+
+    @classmethod
+    def load(cls, path) -> "Manifest":
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️ manifest 읽기 실패 → 전체 재처리: {path}")
+            return cls(path)
+        return cls(path, {k: ManifestEntry(**v) for k, v in raw.get("files", {}).items()})
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (중단돼도 이전 manifest 유지)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"files": {k: asdict(v) for k, v in sorted(self.entries.items())}},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def key(path) -> str:
+        return Path(path).name
+
+    def diff(self, files: Iterable[Path], version: str) -> Tuple[List[Tuple[Path, ManifestEntry]], List[Path], List[str]]:
+        """
+        → (처리할 파일 [(경로, 새 항목)], 변경 없는 파일, 삭제된 키)
+        새 항목은 처리 성공 후 mark()로 기록
+        """
+        todo, same = [], []
+        seen = set()
+        for p in files:
+            p = Path(p)
+            k = self.key(p)
+            seen.add(k)
+            st = p.stat()
+            old = self.entries.get(k)
+            if old and old.version == version and old.size == st.st_size and old.mtime_ns == st.st_mtime_ns:
+                same.append(p)
+                continue
+            entry = ManifestEntry(str(p), st.st_size, st.st_mtime_ns, file_sha256(p), version)
+            if old and old.version == version and old.hash == entry.hash:
+                # 내용은 그대로 → 통계만 갱신
+                entry.processed_at = old.processed_at
+                self.entries[k] = entry
+                same.append(p)
+                continue
+            todo.append((p, entry))
+        deleted = [k for k in self.entries if k not in seen]
+        return todo, same, deleted
+
+    def mark(self, entry: ManifestEntry):
+        entry.processed_at = time.time()
+        self.entries[self.key(entry.path)] = entry
+
+    def remove(self, key: str):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
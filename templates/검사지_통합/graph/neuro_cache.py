@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+neuro_cache.py
+neuro_parse 결과 디스크 캐시 (SQLite)
+
+키: PDF 내용 SHA-256 + 파서 버전 (Artifacts.csv의 hash / version 컬럼과 동일한 의미)
+값: neuro_parsed dict + 추출 텍스트
+용량 제한: 항목 수 / 총 바이트 기준 LRU 삭제
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_PATH = Path(__file__).resolve().parents[1] / "data" / "cache" / "neuro_parse.sqlite"
+MAX_ENTRIES = int(os.getenv("NH_NEURO_CACHE_MAX_ENTRIES", "5000"))
+MAX_BYTES = int(os.getenv("NH_NEURO_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def file_sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용 해시 (대용량 PDF도 청크 단위로 읽음)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class NeuroCache:
+    def __init__(self, path=CACHE_PATH, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            # 배치 워커 여러 개가 동시에 읽고 쓸 수 있도록 WAL 사용
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS neuro_parse ("
+                " hash TEXT NOT NULL, version TEXT NOT NULL,"
+                " parsed TEXT NOT NULL, text TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (hash, version))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_neuro_parse_last_used ON neuro_parse(last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, digest: str, version: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """(parsed, text) 또는 None"""
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT parsed, text FROM neuro_parse WHERE hash=? AND version=?", (digest, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute(
+                "UPDATE neuro_parse SET last_used=? WHERE hash=? AND version=?", (time.time(), digest, version)
+            )
+            db.commit()
+            self.hits += 1
+            return json.loads(row[0]), row[1]
+
+    def put(self, digest: str, version: str, parsed: Dict[str, Any], text: str):
+        payload = json.dumps(parsed, ensure_ascii=False)
+        size = len(payload.encode("utf-8")) + len((text or "").encode("utf-8"))
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO neuro_parse (hash, version, parsed, text, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, version, payload, text or "", size, time.time()),
+            )
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        """오래 사용하지 않은 항목부터 삭제 (항목 수 / 총 크기 제한)"""
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM neuro_parse").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for digest, version, size in db.execute(
+            "SELECT hash, version, size FROM neuro_parse ORDER BY last_used ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((digest, version))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM neuro_parse WHERE hash=? AND version=?", victims)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM neuro_parse")
+            db.commit()
+
+
+_DEFAULT: Optional[NeuroCache] = None
+
+
+def get_cache() -> Optional[NeuroCache]:
+    """프로세스 공용 캐시 (NH_NEURO_CACHE=0이면 비활성)"""
+    global _DEFAULT
+    if os.getenv("NH_NEURO_CACHE", "1") == "0":
+        return None
+    if _DEFAULT is None:
+        _DEFAULT = NeuroCache()
+    return _DEFAULT
@@ -1,17 +1,15 @@
 # D:\ai-edu-stack\templates\검사지_통합\graph\nodes\ai_teacher_helper.py
-from langchain_openai import ChatOpenAI
+import asyncio
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from langchain_core.messages import HumanMessage
-from ..state import PipelineState
+from ..state import PipelineState, event
+from ..llm_client import LLMClient, get_client
 
-# -------------------------------------------------------------
-# AI 교사 도우미 노드 (3단 구조 해석)
-# -------------------------------------------------------------
-def run(state: PipelineState) -> PipelineState:
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.4)
-
-    neuro = state.neuro or {}
-    student = state.student or {}
 
+def build_prompt(student: Dict[str, Any], neuro: Dict[str, Any]) -> str:
+    """학생 정보 + 뇌파 지표 → 3단 해석 요청 프롬프트"""
     # 학생 기본 정보
     name = student.get("name", "학생")
     grade = student.get("grade", "N/A")
@@ -23,7 +21,7 @@ def run(state: PipelineState) -> PipelineState:
     betaH = neuro.get("betaH_rel_open")
 
     # 요약용 입력 텍스트
-    input_text = f"""
+    return f"""
     학생 이름: {name}
     학년: {grade}
     측정된 주요 뇌파 상대세기:
@@ -33,20 +31,90 @@ def run(state: PipelineState) -> PipelineState:
     - BetaH: {betaH}
 
     위 데이터를 기반으로,
-    ① 핵심 요약(집중력/정서/습관)  
-    ② 훈련 포인트(실행 가능한 루틴)  
-    ③ 격려 문장(따뜻한 멘트)  
+    ① 핵심 요약(집중력/정서/습관)
+    ② 훈련 포인트(실행 가능한 루틴)
+    ③ 격려 문장(따뜻한 멘트)
     3단 구성으로 분석해 주세요.
     분석 결과는 문단 구분을 명확히 해주세요.
     """
 
-    # AI 해석 생성
-    response = llm.invoke([HumanMessage(content=input_text)])
-    summary = response.content.strip()
 
+def summary_update(summary: str) -> Dict[str, Any]:
+    """해석 결과 → 상태 변경분 (run / apply_summary 공용)"""
+    return {
+        "analysis": {"summary": summary},
+        "log": [event("ai_teacher_helper", {"summary": summary[:120] + "..."})],
+    }
+
+
+# -------------------------------------------------------------
+# AI 교사 도우미 노드 (3단 구조 해석)
+# -------------------------------------------------------------
+def run(state: PipelineState) -> Dict[str, Any]:
+    # 반 전체 실행 시에는 interpret_many로 한꺼번에 해석 (노드에서는 건너뜀)
+    if state.raw_inputs.get("defer_llm"):
+        return {"log": [event("ai_teacher_helper", {"deferred": True})]}
+
+    # AI 해석 생성 (공용 클라이언트: 속도 제한 + 재시도)
+    response = get_client().invoke([HumanMessage(content=build_prompt(state.student, state.neuro))])
+    return summary_update(response.content.strip())
+
+
+async def _ainterpret_one(client: LLMClient, item: Dict[str, Any]) -> str:
+    prompt = build_prompt(item.get("student") or {}, item.get("neuro") or {})
+    try:
+        response = await client.ainvoke([HumanMessage(content=prompt)])
+        return response.content.strip()
+    except Exception as e:
+        return f"⚠️ AI 해석 실패: {e}"
+
+
+async def ainterpret_many(students: List[Dict[str, Any]], client: Optional[LLMClient] = None) -> List[str]:
+    """
+    여러 학생을 동시에 해석 (동시 요청 수 / 초당 요청 수는 클라이언트 설정을 따름)
+    students: [{"student": {...}, "neuro": {...}}, ...] — 결과 순서는 입력 순서와 같음
+    실패한 학생은 "⚠️ ..." 메시지로 채움
+    """
+    client = client or get_client()
+    return await asyncio.gather(*(_ainterpret_one(client, s) for s in students))
+
+
+def interpret_many(students: List[Dict[str, Any]], client: Optional[LLMClient] = None) -> List[str]:
+    """ainterpret_many의 동기 버전 (Streamlit 등 동기 코드에서 호출)"""
+    return asyncio.run(ainterpret_many(students, client))
+
+
+def iter_interpret(students: List[Dict[str, Any]], client: Optional[LLMClient] = None) -> Iterator[Tuple[int, str]]:
+    """
+    interpret_many의 스트리밍 버전: 해석이 끝나는 순서대로 (입력 인덱스, 요약) yield
+    이벤트 루프는 별도 스레드에서 돌리므로 동기 코드(Streamlit)가 결과마다 화면을 갱신할 수 있음
+    """
+    client = client or get_client()
+    out: "queue.Queue" = queue.Queue()
+    done = object()
+
+    async def main():
+        async def one(i, item):
+            out.put((i, await _ainterpret_one(client, item)))
+        await asyncio.gather(*(one(i, s) for i, s in enumerate(students)))
+
+    def runner():
+        try:
+            asyncio.run(main())
+        except Exception as e:
+            out.put(e)
+        out.put(done)
+
+    threading.Thread(target=runner, name="interpret-stream", daemon=True).start()
+    while True:
+        item = out.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
 
-    # 상태 업데이트
-    state.analysis = {"summary": summary}
-    state.log_event("ai_teacher_helper", {"summary": summary[:120] + "..."})  # ✅ summary로 수정
-    return state
 
+def apply_summary(state: PipelineState, summary: str) -> PipelineState:
+    """interpret_many 결과를 반영한 새 상태 (run과 같은 형식)"""
+    return state.apply(summary_update(summary))
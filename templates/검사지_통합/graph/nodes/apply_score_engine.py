@@ -4,54 +4,34 @@ apply_score_engine.py
 기초형 NeuroHarmony BQ2 계산 엔진 (ver.0.1)
 """
 
-import pandas as pd
-import yaml
-import numpy as np
 from pathlib import Path
 
-def apply_score_engine(input_path="data/processed/neuro_normalized.csv",
+from ..score_store import refresh_scores, write_stats
+from ..formula import load_plan
+from .normalize_metrics import MATRIX_PATH, load_matrix
+
+def apply_score_engine(input_path=MATRIX_PATH,
                        yaml_path="graph/score_engine.yaml",
                        output_path="data/processed/neuro_scored.csv"):
-    # === YAML 로드 ===
-    with open(yaml_path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
-    engine = cfg.get("score_engine", {})
-
-    # === 데이터 로드 ===
-    df = pd.read_csv(input_path)
-    print(f"📄 표준화된 데이터 로드 완료: {len(df)}행")
-
-    # === numeric 변환 (가능한 항목만) ===
-    df["value_num"] = pd.to_numeric(df["value"], errors="coerce")
-
-    # === 학생별로 피벗 (metric → column) ===
-    pivot_df = df.pivot_table(index="student_name", 
-                              columns="metric", 
-                              values="value_num", 
-                              aggfunc=lambda x: np.nanmean(x))
-    pivot_df.reset_index(inplace=True)
-
-    # === 계산식 적용 ===
-    for col, expr in engine.items():
-        try:
-            if "mean(" in expr:
-                target = expr.split("(")[1].split(")")[0]
-                # mean 처리: target 컬럼 내 평균 (학생별 단일 컬럼이라 그대로 사용)
-                pivot_df[col] = pivot_df[target]
-            elif "sum(" in expr:
-                target = expr.split("(")[1].split(")")[0]
-                # sum 처리: 동일한 metric이 여러 번 등장했을 때 대비
-                pivot_df[col] = df[df["metric"] == target].groupby("student_name")["value_num"].sum().values
-            else:
-                pivot_df[col] = pivot_df.eval(expr)
-        except Exception as e:
-            print(f"⚠️ {col} 계산 실패: {e}")
+    # === YAML 컴파일 (mtime 기준 캐시) ===
+    plan = load_plan(yaml_path)
 
+    # === 데이터 로드: 학생 × 지표 float32 행렬 (문자열 파싱·피벗 없음) ===
+    wide, sums = load_matrix(input_path)
+    print(f"📄 학생 × 지표 행렬 로드 완료: {wide.shape[0]} × {wide.shape[1]}")
 
+    # === 계산식 적용 (의존 순서대로 열 단위 평가) ===
+    pivot_df = plan.evaluate(wide, aggregates={"mean": wide, "sum": sums})
+    pivot_df.columns.name = None
+    pivot_df = pivot_df.reset_index()
 
     # === 결과 저장 ===
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     pivot_df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    # 반 전체 요약 집계 (대시보드가 매번 describe()하지 않도록)
+    write_stats(pivot_df, output_path)
+    # 학교/학년/측정 월 파티션 저장소도 갱신 (대시보드는 필요한 부분만 읽음, 실패해도 계산 결과는 유지)
+    refresh_scores(pivot_df)
 
     print("\n✅ 스코어 엔진 계산 완료!")
     print(f"저장 위치: {output_path}")
@@ -2,76 +2,119 @@
 """
 batch_extract_bq2_metrics.py
 NeuroHarmony BQ2 PDF 다중 추출 및 통합 처리
+
+실행: python -m graph.nodes.batch_extract_bq2_metrics --workers 8
+      python -m graph.nodes.batch_extract_bq2_metrics --full-rebuild   (manifest 무시, 전체 재처리)
+
+증분 처리: data/processed/manifest.json에 기록된 파일 중 새로 추가/변경된 PDF만 추출하고,
+결과는 파일별 파티션(data/processed/neuro_df/source=.../part-0.parquet, graph/dataset.py)에 덮어쓴다.
+삭제된 PDF의 파티션은 제거한다.
 """
 
+import argparse
+import shutil
 import fitz
 import pandas as pd
-import re
 from pathlib import Path
+from ..batch_runner import run_batch
+from ..dataset import drop_partition, load_partitions, write_partition
+from ..manifest import Manifest
+from ..bq2_tokenizer import metric_records
+from ..bq2_layout import CORE_BANDS, extract_bands
+from ..student_registry import resolve_pdf
 
 def extract_metrics_from_pdf(pdf_path):
     """단일 PDF에서 지표명 + 수치 추출"""
     doc = fitz.open(pdf_path)
     blocks_text = []
     for page in doc:
-        blocks = page.get_text("blocks")
+        blocks = page.get_text("blocks")  # (x0, y0, x1, y1, text, block_no, ...)
         for b in blocks:
             txt = b[4].strip()
             if txt:
                 blocks_text.append(txt)
-    doc.close()
 
-    # 숫자와 문자 모두 포함된 라인만 필터링
-    lines = [line for line in blocks_text if re.search(r"[가-힣A-Za-z]", line) and re.search(r"\d", line)]
-    pattern = re.compile(r"([A-Za-z가-힣\s]+)[=:：]?\s*([\d\.]+)")
+    # 밴드 표는 단어 좌표로 셀 매핑 (핵심 밴드가 없으면 텍스트 파싱으로 대체)
+    bands, _ = extract_bands(doc)
+    doc.close()
+    if not {b.band for b in bands} >= set(CORE_BANDS):
+        bands = None
 
-    metrics = []
-    for line in lines:
-        matches = pattern.findall(line)
-        for m in matches:
-            key, val = m[0].strip(), m[1].strip()
-            if len(key) > 1 and re.search(r"\d", val):
-                metrics.append({"metric": key, "value": val})
+    # 공용 BQ2 토크나이저로 1회 스캔 (일반 지표 + 밴드 좌/우 값)
+    metrics = metric_records(blocks_text, bands=bands)
 
     df = pd.DataFrame(metrics).drop_duplicates()
-    df["student_name"] = pdf_path.stem.split("_")[1] if "_" in pdf_path.stem else pdf_path.stem
+    # 학생 명부로 PDF → 학생 조회 (명부에 없으면 파일명 이름 토큰, 그것도 없으면 파일명)
+    student = resolve_pdf(pdf_path)
+    df["student_id"] = student.student_id
+    df["student_name"] = student.name or pdf_path.stem
     df["file_name"] = pdf_path.name
     return df
 
 
-def batch_extract():
-    """폴더 내 모든 PDF 처리"""
+# 추출 로직(토크나이저/레이아웃)이 바뀌면 올려서 manifest의 기존 결과를 무효화
+EXTRACTOR_VERSION = "3"
+DATASET_DIR = Path("data/processed/neuro_df")
+MANIFEST_PATH = Path("data/processed/manifest.json")
+
+
+def batch_extract(workers=None, chunksize=1, timeout=None, full_rebuild=False):
+    """폴더 내 새로 추가/변경된 PDF만 처리 (멀티프로세스)"""
     neuro_dir = Path("data/raw/neuro")
     output_dir = Path("data/processed")
     output_dir.mkdir(parents=True, exist_ok=True)
 
     pdf_files = sorted(list(neuro_dir.glob("*.pdf")))
+    manifest = Manifest.load(MANIFEST_PATH)
+    if full_rebuild:
+        print("🔁 전체 재처리 (--full-rebuild)")
+        shutil.rmtree(DATASET_DIR, ignore_errors=True)
+        manifest.clear()
+
+    todo, same, deleted = manifest.diff(pdf_files, EXTRACTOR_VERSION)
+
+    # 삭제된 PDF → 파티션 제거
+    for key in deleted:
+        drop_partition(DATASET_DIR, key)
+        manifest.remove(key)
+        print(f"🗑️ 삭제된 파일 결과 제거: {key}")
+
+    print(f"📂 전체 {len(pdf_files)}개 / 처리 대상 {len(todo)}개 / 변경 없음 {len(same)}개 / 삭제 {len(deleted)}개")
     if not pdf_files:
         print("❌ PDF 파일이 감지되지 않았습니다.")
-        return
-
-    all_records = []
-    for pdf in pdf_files:
-        print(f"📘 처리 중: {pdf.name}")
-        try:
-            df = extract_metrics_from_pdf(pdf)
-            if not df.empty:
-                all_records.append(df)
-        except Exception as e:
-            print(f"⚠️ {pdf.name} 처리 중 오류: {e}")
-
-    if all_records:
-        neuro_df = pd.concat(all_records, ignore_index=True)
-        neuro_df.to_parquet(output_dir / "neuro_df.parquet", index=False)
-        neuro_df.to_csv(output_dir / "neuro_df.csv", index=False, encoding="utf-8-sig")
-        print("\n✅ 모든 PDF 분석 완료!")
-        print(f"총 파일 수: {len(pdf_files)}개")
-        print(f"총 추출 행 수: {len(neuro_df)}")
-        print(f"저장 위치: {output_dir / 'neuro_df.parquet'}")
+
+    entries = {p: e for p, e in todo}
+    done = 0
+    for res in run_batch(extract_metrics_from_pdf, list(entries),
+                         workers=workers, chunksize=chunksize, timeout=timeout):
+        if not res.ok:
+            # manifest에 기록하지 않음 → 다음 실행 때 다시 시도 (이전 결과는 유지)
+            print(f"⚠️ {res.item.name} 처리 중 오류: {res.error}")
+            continue
+        print(f"📘 처리 완료: {res.item.name} ({res.elapsed:.2f}초)")
+        if res.value.empty:
+            drop_partition(DATASET_DIR, res.item.name)
+        else:
+            write_partition(DATASET_DIR, res.item.name, res.value)
+        manifest.mark(entries[res.item])
+        done += 1
+    manifest.save()
+
+    neuro_df = load_partitions(DATASET_DIR)
+    if len(neuro_df):
+        print("\n✅ PDF 분석 완료!")
+        print(f"이번 실행 처리: {done}개 / 누적 추출 행 수: {len(neuro_df)}")
+        print(f"저장 위치: {DATASET_DIR} (manifest: {MANIFEST_PATH})")
         print("\n📊 미리보기:")
         print(neuro_df.head(10).to_string(index=False))
     else:
         print("⚠️ 추출된 데이터가 없습니다.")
 
 if __name__ == "__main__":
-    batch_extract()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=None, help="파일당 제한 시간(초)")
+    parser.add_argument("--full-rebuild", action="store_true", help="manifest 무시하고 모든 PDF 재처리")
+    args = parser.parse_args()
+    batch_extract(args.workers, args.chunksize, args.timeout, args.full_rebuild)
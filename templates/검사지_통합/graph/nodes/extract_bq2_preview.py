@@ -1,34 +1,29 @@
 # D:\ai-edu-stack\templates\검사지_통합\graph\nodes\extract_bq2_preview.py
 import fitz
 import pandas as pd
-import re
 from pathlib import Path
+from ..bq2_tokenizer import metric_records
+from ..bq2_layout import CORE_BANDS, extract_bands
 
 def extract_bq2_preview(pdf_path: str):
     """BQ2 PDF에서 표 형태의 지표와 수치를 추출"""
     doc = fitz.open(pdf_path)
     blocks_text = []
-    
     for page in doc:
         blocks = page.get_text("blocks")  # (x0, y0, x1, y1, text, block_no, ...)
         for b in blocks:
             txt = b[4].strip()
             if txt:
                 blocks_text.append(txt)
-    doc.close()
 
-    # 숫자와 문자 혼합된 라인만 추출
-    lines = [line for line in blocks_text if re.search(r"[가-힣A-Za-z]", line) and re.search(r"\d", line)]
+    # 밴드 표는 단어 좌표로 셀 매핑 (핵심 밴드가 없으면 텍스트 파싱으로 대체)
+    bands, _ = extract_bands(doc)
+    doc.close()
+    if not {b.band for b in bands} >= set(CORE_BANDS):
+        bands = None
 
-    pattern = re.compile(r"([A-Za-z가-힣\s]+)[=:：]?\s*([\d\.]+)")
-    metrics = []
-    for line in lines:
-        matches = pattern.findall(line)
-        for m in matches:
-            key = m[0].strip()
-            val = m[1].strip()
-            if len(key) > 1 and re.search(r"\d", val):
-                metrics.append({"metric": key, "value": val})
+    # 공용 BQ2 토크나이저로 1회 스캔 (일반 지표 + 밴드 좌/우 값)
+    metrics = metric_records(blocks_text, bands=bands)
 
     df = pd.DataFrame(metrics).drop_duplicates()
     print(f"\n🧠 {pdf_path.name}에서 감지된 주요 지표:")
@@ -1,59 +1,108 @@
 # -*- coding: utf-8 -*-
+"""
+generate_report.py
+학생 1명 통합 결과 리포트 (학부모 / 담임 / 기관용 Markdown)
+
+- 템플릿(graph/report_templates/*.md.j2)은 모듈 로드 시 1회 컴파일
+- 세 대상 리포트를 같은 렌더링 문맥으로 한 번에 생성
+- 파일 저장은 report_writer 백그라운드 스레드에서 처리 (읽기 전 report_writer.flush())
+"""
+
 import re
+from datetime import date
 from pathlib import Path
-from ..state import PipelineState
+from numbers import Number
+
+from jinja2 import Environment, FileSystemLoader
+
+from .. import report_writer
+from ..cohort_norms import COHORT_LABELS
+from ..state import PipelineState, Report, event
 
 # 출력 경로 설정
 OUTPUT = Path(__file__).resolve().parents[2] / "outputs" / "reports"
 OUTPUT.mkdir(parents=True, exist_ok=True)
+TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "report_templates"
 
-def run(state: PipelineState) -> PipelineState:
-    print("🟢 [generate_report] 노드 실행 시작")
+# 대상 → Artifacts.csv 컬럼
+AUDIENCES = {
+    "parent": "report_parent_pdf",
+    "teacher": "report_teacher_pdf",
+    "institution": "report_institution_pdf",
+}
+# 기존 report["md"] (대시보드 미리보기)는 담임용을 가리킴
+DEFAULT_AUDIENCE = "teacher"
+SEVERITY = {"high": "높음", "medium": "보통", "low": "낮음"}
 
-    # 기본 데이터 추출
-    student = state.student or {}
-    scores = state.scores.get("values", {})
-    flags = state.scores.get("flags", [])
-    analysis = getattr(state, "analysis", {}).get("summary", "")
 
-    name = student.get("name", "-")
-    sid = student.get("student_id", "-")
-    grade = student.get("grade", "-")
+def _num(value):
+    if isinstance(value, bool) or not isinstance(value, Number):
+        return "—" if value is None else value
+    if value != value:  # NaN
+        return "—"
+    return f"{value:.2f}".rstrip("0").rstrip(".")
 
-    # 안전한 파일명 생성
-    # 파일명에서 경로 기호(\, /) 제거
-    safe_sid = re.search(r'(S\d{3,4})', str(sid))
-    safe_sid = safe_sid.group(1) if safe_sid else Path(str(sid)).stem
-    filename = f"report_{safe_sid}.md"
-    out_path = OUTPUT / filename
+
+def _env() -> Environment:
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+        autoescape=False,
+    )
+    env.filters["num"] = _num
+    env.filters["severity"] = lambda s: SEVERITY.get(str(s), s)
+    env.globals["cohort_labels"] = COHORT_LABELS
+    return env
 
 
-    # 보고서 내용 구성
-    md = f"""# 통합 결과 요약
+ENV = _env()
+TEMPLATES = {aud: ENV.get_template(f"{aud}.md.j2") for aud in AUDIENCES}
 
-**학생**: {name} ({sid}) | **학년**: {grade}
 
-## 1) 핵심 지표
-{scores}
+def _safe_sid(sid) -> str:
+    # 파일명에서 경로 기호(\, /) 제거
+    found = re.search(r'(S\d{3,4})', str(sid))
+    return found.group(1) if found else Path(str(sid)).stem
 
-## 2) 리스크 플래그
-{flags}
 
-## 3) 해석 요약
-{analysis}
+def render_all(student, scores, flags, analysis="", cohorts=None) -> dict:
+    """대상별 Markdown {parent, teacher, institution} — 문맥은 1회만 구성 (cohorts: 코호트 백분위)"""
+    context = {
+        "name": student.get("name", "-"),
+        "sid": student.get("student_id", "-"),
+        "grade": student.get("grade", "-"),
+        "scores": scores or {},
+        "flags": flags or [],
+        "cohorts": cohorts or {},
+        "analysis": analysis or "",
+        "today": date.today().isoformat(),
+    }
+    return {aud: tpl.render(context) for aud, tpl in TEMPLATES.items()}
 
-## 4) 4주 개입 권고(요약)
-- 학부모: 가정에서 10분 대화 + 주 2회 훈련
-- 학교: 담임과 주간 점검 루틴
-"""
 
-    # 파일 저장
-    out_path.write_text(md, encoding="utf-8-sig")
-    print(f"🟢 Report saved at: {out_path}")
+def run(state: PipelineState) -> dict:
+    # AI 해석을 뒤로 미룬 반 전체 실행은 interpret_and_report_iter에서 해석과 함께 생성
+    if state.raw_inputs.get("defer_llm"):
+        return {"log": [event("generate_report", {"deferred": True})]}
+    print("🟢 [generate_report] 노드 실행 시작")
+
+    # 기본 데이터 추출
+    student = state.student
+    analysis = (state.analysis or {}).get("summary", "")
+
+    safe_sid = _safe_sid(student.student_id)
+    paths = {}
+    for aud, text in render_all(student, state.scores.values, state.scores.flags, analysis,
+                                     state.scores.cohorts).items():
+        out_path = OUTPUT / f"report_{safe_sid}_{aud}.md"
+        report_writer.submit(out_path, text)
+        paths[aud] = str(out_path)
+    print(f"🟢 Report queued: {OUTPUT / f'report_{safe_sid}_*.md'}")
 
-    # LangGraph에서 상태를 복사해 반환
-    new_state = state.copy(update={
-        "report": {"md": str(out_path)}
-    })
-    new_state.log_event("generate_report", {"path": str(out_path)})
-    return new_state
+    # 변경분만 반환 (전체 상태 복사 없음)
+    return {
+        "report": Report(md=paths[DEFAULT_AUDIENCE], **paths),
+        "log": [event("generate_report", {"paths": paths})],
+    }
@@ -1,66 +1,45 @@
 # -*- coding: utf-8 -*-
 """
 generate_reports.py
-학생별 NeuroHarmony BQ2 자동 리포트 생성 (ver.0.1)
+학생별 NeuroHarmony BQ2 자동 리포트 생성 (ver.0.2)
+
+실행: python -m graph.nodes.generate_reports --workers 4 --combined
 """
 
+import argparse
 import pandas as pd
-from fpdf import FPDF
 from pathlib import Path
 
-def generate_reports(input_path="data/processed/neuro_scored.csv",
-                     output_dir="report/pdf"):
-    # === 데이터 로드 ===
-    df = pd.read_csv(input_path)
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    students = df["student_name"].unique()
-
-    for name in students:
-        data = df[df["student_name"] == name].iloc[0]  # 첫 행 기준 요약
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.add_font("NotoSansKR", "", r"D:\ai-edu-stack\templates\검사지_통합\NotoSansKR-Regular.ttf")
-        pdf.set_font("NotoSansKR", "", 14)
+from ..report_renderer import group_rows, render_one, render_reports
 
-        # 제목
-        pdf.set_text_color(30, 136, 229)
-        pdf.cell(0, 10, f"NeuroHarmony BQ2 학생 리포트", ln=True, align="C")
-        pdf.ln(8)
-        pdf.set_text_color(0, 0, 0)
 
-        # 기본 정보
-        pdf.set_font("NotoSansKR", "", 12)
-        pdf.cell(0, 10, f"학생 이름: {name}", ln=True)
-        pdf.ln(4)
+def render_report(name, data, output_dir="report/pdf"):
+    """학생 1명 요약(data: 지표명 → 값)을 PDF로 저장하고 경로 반환"""
+    return render_one(name, data, output_dir)
 
-        # 주요 수치
-        pdf.set_font("NotoSansKR", "", 11)
-        fields = [
-            "brain_average", "brain_balance", "avg_frequency", "total_power",
-            "left_brain", "right_brain", "frequency", "raw_wave_power", "weight"
-        ]
-        for f in fields:
-            if f in data:
-                pdf.cell(60, 8, f"{f}", border=0)
-                pdf.cell(0, 8, str(round(data[f], 2) if pd.notna(data[f]) else "—"), ln=True)
 
-        # 하단 문구
-        pdf.ln(10)
-        pdf.set_font("NotoSansKR", "", 10)
-        pdf.set_text_color(120)
-        pdf.multi_cell(0, 6,
-            "※ 본 리포트는 NeuroHarmony BQ2 결과 기반으로 생성되었습니다.\n"
-            "비움과채움 AI교육팀 | enfedu.com",
-            align="L"
-        )
-
-        # 저장
-        output_file = Path(output_dir) / f"{name}_리포트.pdf"
-        pdf.output(str(output_file))
+def generate_reports(input_path="data/processed/neuro_scored.csv",
+                     output_dir="report/pdf", workers=None, chunksize=25, combined=False):
+    # === 데이터 로드 + 학생별 첫 행 (첫 행 기준 요약) ===
+    df = pd.read_csv(input_path)
+    items = group_rows(df)
 
-        print(f"✅ {name} 리포트 생성 완료 → {output_file}")
+    # === 묶음 단위 렌더링 (폰트 로드/서브셋은 묶음당 1회) ===
+    combined_path = str(Path(output_dir) / "반전체_리포트.pdf") if combined else None
+    paths = render_reports(items, output_dir, workers=workers, chunksize=chunksize,
+                           combined_path=combined_path)
+    for path in paths:
+        print(f"✅ 리포트 생성 완료 → {path}")
+    if combined_path:
+        print(f"📚 반 전체 리포트 → {combined_path}")
 
-    print("\n🎉 모든 학생 리포트 생성 완료!")
+    print(f"\n🎉 모든 학생 리포트 생성 완료! ({len(paths)}/{len(items)}명)")
+    return paths
 
 if __name__ == "__main__":
-    generate_reports()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunksize", type=int, default=25, help="문서 1개에 그릴 학생 수")
+    parser.add_argument("--combined", action="store_true", help="반 전체 PDF 1개도 생성")
+    args = parser.parse_args()
+    generate_reports(workers=args.workers, chunksize=args.chunksize, combined=args.combined)
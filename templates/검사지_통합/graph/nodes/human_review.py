@@ -1,5 +1,4 @@
-from ..state import PipelineState
+from ..state import PipelineState, event
 
-def run(state: PipelineState) -> PipelineState:
-    state.log_event('human_review', {'approved': True})
-    return state
+def run(state: PipelineState) -> dict:
+    return {'log': [event('human_review', {'approved': True})]}
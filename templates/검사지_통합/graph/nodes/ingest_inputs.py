@@ -1,13 +1,24 @@
 from pathlib import Path
 from typing import Dict, Any
-from ..state import PipelineState
+from ..state import PipelineState, event
+from ..forms_table import load_forms_table
 
 DATA_RAW = Path(__file__).resolve().parents[2] / 'data' / 'raw'
 DATA_RAW.mkdir(parents=True, exist_ok=True)
 
-def run(state: PipelineState) -> PipelineState:
+def run(state: PipelineState) -> Dict[str, Any]:
     # raw_inputs에 forms_csv와 neuro_pdf가 이미 포함되어 있음
     payload = state.raw_inputs or {}
-    state.log_event("ingest_inputs", {"keys": list(payload.keys())})
-    return state
+    log = []
+    raw_inputs = {}
 
+    # forms CSV는 캐시에서 1회만 파싱 → 이후 노드는 forms_table만 사용
+    forms_csv = payload.get('forms_csv')
+    if forms_csv and 'forms_table' not in payload:
+        try:
+            raw_inputs['forms_table'] = load_forms_table(forms_csv)
+        except Exception as e:
+            log.append(event('ingest_inputs', {'forms_error': str(e)}))
+
+    log.append(event("ingest_inputs", {"keys": list(payload.keys())}))
+    return {"raw_inputs": raw_inputs, "log": log}
@@ -1,27 +1,77 @@
 from pathlib import Path
-from typing import Dict
-from ..state import PipelineState
-import os, io, re
+from ..state import NeuroBands, PipelineState, event
+from ..neuro_cache import file_sha256, get_cache
+from ..bq2_tokenizer import band_pairs, scan
+from ..bq2_layout import extract_bands, region_rect, table_region
+from concurrent.futures import ThreadPoolExecutor
+import os
 import fitz  # PyMuPDF
 import pytesseract
 from PIL import Image
 
+# 파서 로직이 바뀌면 올려서 이전 캐시 결과를 무효화
+PARSER_VERSION = "5"
+
+# === OCR 설정 ===
+OCR_SCALE = 2
+OCR_WORKERS = int(os.getenv("NH_OCR_WORKERS", "4"))
+
+
 # === OCR 유틸 ===
+def _render_page(page, region=None) -> Image.Image:
+    """페이지 → 흑백 PIL 이미지 (PNG 인코딩 없이 pixmap 샘플 직접 사용)"""
+    pix = page.get_pixmap(matrix=fitz.Matrix(OCR_SCALE, OCR_SCALE), colorspace=fitz.csGRAY,
+                          clip=region_rect(page, region), alpha=False)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def _ocr_image(img: Image.Image, lang: str) -> str:
+    try:
+        return pytesseract.image_to_string(img, lang=lang)
+    except Exception:
+        return pytesseract.image_to_string(img)
+
+
+def _ocr_pages(doc, lang: str, region=None, workers: int = OCR_WORKERS) -> list:
+    """
+    페이지 순서대로 OCR, 표가 발견된 페이지에서 중단
+    렌더링은 현재 스레드(fitz 문서는 스레드 안전하지 않음), tesseract는 스레드 풀에서 병렬 실행
+    """
+    texts = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        inflight = []
+        pages = iter(range(len(doc)))
+
+        def submit_next():
+            i = next(pages, None)
+            if i is not None:
+                inflight.append(ex.submit(_ocr_image, _render_page(doc[i], region), lang))
+
+        for _ in range(max(1, workers)):
+            submit_next()
+
+        while inflight:
+            t = inflight.pop(0).result()
+            texts.append(t)
+            if _has_band_table(t):
+                for fut in inflight:
+                    fut.cancel()
+                break
+            submit_next()
+    return texts
+
+
 def _ocr_pdf_to_text(pdf_path: str, lang: str = "kor+eng") -> str:
-    """PDF → 이미지 → OCR 문자열 추출"""
+    """PDF → 이미지 → OCR 문자열 추출 (표 발견 시 조기 종료)"""
     tess = os.getenv("TESSERACT_PATH")
     if tess and os.path.exists(tess):
         pytesseract.pytesseract.tesseract_cmd = tess
-    doc = fitz.open(pdf_path)
-    texts = []
-    for page in doc:
-        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        try:
-            t = pytesseract.image_to_string(img, lang=lang)
-        except Exception:
-            t = pytesseract.image_to_string(img)
-        texts.append(t)
+    with fitz.open(pdf_path) as doc:
+        region = table_region()
+        texts = _ocr_pages(doc, lang, region)
+        # 영역 OCR로 표를 못 찾으면 전체 페이지로 재시도
+        if region and not any(_has_band_table(t) for t in texts):
+            texts = _ocr_pages(doc, lang)
     return "\n".join(texts)
 
 # === 내부 파서 함수들 ===
@@ -34,164 +84,98 @@ def _avg_pair(lv, rv):
     except Exception:
         return None
 
-def _best_block(text: str) -> str:
-    """가장 숫자가 많은 블록 추출"""
-    blocks = text.split("\n\n")
-    if not blocks:
-        return text
-    return max(blocks, key=lambda b: len(re.findall(r"\d", b)))
-
-def _parse_pairs_from_text(txt: str) -> dict:
-    """텍스트에서 Theta, BetaL 등 숫자 패턴 추출"""
-    pat = re.compile(
-        r"(Theta|세타|θ)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)|"
-        r"(BetaL|저\s*베타|βL)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)|"
-        r"(BetaH|고\s*베타|βH)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)|"
-        r"(SMR|에스엠알|Sensorimotor)\D*?([0-9]+(?:\.[0-9]+)?)\D*?([0-9]+(?:\.[0-9]+)?)",
-        re.I
-    )
-    result = {}
-    for m in pat.finditer(txt):
-        g = [x for x in m.groups() if x]
-        if not g:
-            continue
-        label = None
-        nums = []
-        for x in g:
-            if re.search(r"[A-Za-z가-힣β]", x):
-                label = x
-            else:
-                nums.append(float(x))
-        if label and len(nums) >= 2:
-            label = label.lower()
-            if "theta" in label or "세타" in label or "θ" in label:
-                result["Theta"] = tuple(nums[:2])
-            elif "betal" in label or "저" in label:
-                result["BetaL"] = tuple(nums[:2])
-            elif "betah" in label or "고" in label:
-                result["BetaH"] = tuple(nums[:2])
-            elif "smr" in label or "sensorimotor" in label:
-                result["SMR"] = tuple(nums[:2])
-    return result
-
-
-def _unglue_numbers(s: str) -> str:
-    """
-    붙은 연속 소수점 숫자 (예: '44.553.8') 패턴 분리
-    '44.553.8' → '44.55 3.8'
-    """
-    s = re.sub(r"(\d+\.\d{1,2})(?=\d)", r"\1 ", s)
-    return s
-
-
-def _parse_compact_table(text: str) -> dict:
-    """Delta/Theta/Alpha/... 표에서 숫자 붙은 경우 파싱"""
-    label_line = None
-    for ln in text.splitlines():
-        if re.search(r"(Delta|델타).*(Theta|세타|θ).*(Alpha|알파).*(SMR|에스엠알).*(BetaL|저\s*베타|βL).*(BetaH|고\s*베타|βH)", ln, re.I):
-            label_line = ln
-            break
-    if not label_line:
-        return {}
-
-    order, toks = [], label_line.split()
-    for tok in toks:
-        t = tok.lower()
-        if "theta" in t or "세타" in t or "θ" in t:
-            order.append("Theta")
-        elif "betal" in t or "βl" in t or "저" in t:
-            order.append("BetaL")
-        elif "betah" in t or "βh" in t or "고" in t:
-            order.append("BetaH")
-        elif "smr" in t or "sensorimotor" in t or "에스엠알" in t:
-            order.append("SMR")
-
-    lines = text.splitlines()
-    idx = lines.index(label_line)
-    tail = "\n".join(lines[idx + 1: idx + 6])
-    tail = _unglue_numbers(tail)
-    nums = re.findall(r"[+-]?\d+(?:\.\d+)?", tail)
-
-    vals = []
-    for s in nums:
-        try:
-            vals.append(float(s))
-        except Exception:
-            pass
+# 밴드 → neuro_parsed 키 접두어
+_BAND_KEYS = {
+    "Delta": "delta", "Theta": "theta", "Alpha": "alpha", "SMR": "smr",
+    "BetaL": "betaL", "BetaH": "betaH", "Gamma": "gamma",
+}
+_CORE_BANDS = ("Theta", "BetaL", "BetaH", "SMR")
 
-    pairs, i = {}, 0
-    for lab in order:
-        if i + 1 < len(vals):
-            pairs[lab] = (vals[i], vals[i + 1])
-            i += 2
-        else:
-            break
-    return pairs
 
+def _parse_bands(text: str) -> dict:
+    """텍스트 → {band: (L, R)} (라벨형/압축형 표 모두, 상대세기 우선, 개안 표만)"""
+    return band_pairs(scan(text, metrics=False).bands, prefer="rel", cond="open")
 
-# === 핵심 실행 함수 ===
-def run(state: PipelineState) -> PipelineState:
-    pdf_path = state.raw_inputs.get("neuro_pdf")
-    if not pdf_path:
-        state.log_event("neuro_parse", {"status": "no_pdf"})
-        return state
 
-    pdf_path = Path(pdf_path)
-    if not pdf_path.exists():
-        state.log_event("neuro_parse", {"status": "not_found", "path": str(pdf_path)})
-        return state
+def _has_band_table(text: str) -> bool:
+    """Theta/BetaL/BetaH/SMR 표가 인식되었는지"""
+    pairs = _parse_bands(text)
+    return any(b in pairs for b in _CORE_BANDS)
+
 
+# === PDF 1개 파싱 (캐시 미적용) ===
+def parse_pdf(pdf_path: Path):
+    """PDF → (neuro_parsed dict, 추출 텍스트)"""
     all_text = ""
     pairs = {}
 
-    # 1️⃣ 우선 텍스트 파서로 시도
+    # 1️⃣ 단어 좌표로 표 셀 직접 매핑 → 실패 시 전체 텍스트 파싱
     try:
         with fitz.open(pdf_path) as doc:
-            all_text = "\n".join(page.get_text() for page in doc)
-        pairs = _parse_pairs_from_text(all_text)
+            bands, all_text = extract_bands(doc)
+            pairs = band_pairs(bands, prefer="rel", cond="open")
+            if not any(b in pairs for b in _CORE_BANDS):
+                all_text = "\n".join(page.get_text() for page in doc)
+                pairs = _parse_bands(all_text)
     except Exception:
         pass
 
-    # 2️⃣ 값이 전혀 없으면 compact table 시도
-    if not pairs:
-        pairs = _parse_compact_table(all_text)
-
-    # 3️⃣ 좌/우 평균 계산
-    theta = _avg_pair(*(pairs.get("Theta") or (None, None)))
-    betaL = _avg_pair(*(pairs.get("BetaL") or (None, None)))
-    betaH = _avg_pair(*(pairs.get("BetaH") or (None, None)))
-    smr   = _avg_pair(*(pairs.get("SMR")   or (None, None)))
-
     # 기본 태그 설정
     source_tag = "text_only"
 
-    # 4️⃣ 전부 None이면 OCR 폴백 시도
-    vals_now = [v for v in [theta, betaL, betaH, smr] if v is not None]
-    if not vals_now:
+    # 2️⃣ 핵심 밴드가 전혀 없으면 OCR 폴백 시도
+    if not any(b in pairs for b in _CORE_BANDS):
         try:
             ocr_text = _ocr_pdf_to_text(str(pdf_path))
             all_text = ((all_text or "") + "\n" + (ocr_text or "")).strip()
-            focus_text = _best_block(all_text)
-            text_pairs = _parse_pairs_from_text(focus_text) or _parse_compact_table(all_text)
-
-            theta = _avg_pair(*(text_pairs.get("Theta") or (None, None)))
-            betaL = _avg_pair(*(text_pairs.get("BetaL") or (None, None)))
-            betaH = _avg_pair(*(text_pairs.get("BetaH") or (None, None)))
-            smr   = _avg_pair(*(text_pairs.get("SMR")   or (None, None)))
-
+            pairs = _parse_bands(all_text)
             source_tag = "ocr_text"
         except Exception:
             source_tag = "text_only"
 
-    # === 결과 저장 ===
+    # 3️⃣ 좌/우 평균 계산
     parsed = {
-        "theta_rel_open": theta,
-        "betaL_rel_open": betaL,
-        "betaH_rel_open": betaH,
-        "smr_rel_open": smr,
-        "source": source_tag,
+        f"{key}_rel_open": _avg_pair(*(pairs.get(band) or (None, None)))
+        for band, key in _BAND_KEYS.items()
     }
+    parsed["source"] = source_tag
+    return parsed, all_text
+
+
+def _has_values(parsed: dict) -> bool:
+    """밴드 값이 하나라도 있는지"""
+    return any(v is not None for k, v in parsed.items() if k != "source")
+
+
+# === 핵심 실행 함수 ===
+def run(state: PipelineState) -> dict:
+    pdf_path = state.raw_inputs.get("neuro_pdf")
+    if not pdf_path:
+        return {"log": [event("neuro_parse", {"status": "no_pdf"})]}
+
+    pdf_path = Path(pdf_path)
+    if not pdf_path.exists():
+        return {"log": [event("neuro_parse", {"status": "not_found", "path": str(pdf_path)})]}
+
+    # 내용 해시 + 파서 버전으로 캐시 조회 → 같은 PDF는 재파싱/재OCR 하지 않음
+    cache = get_cache()
+    digest = file_sha256(pdf_path)
+    # 밴드를 하나도 못 읽은 결과는 캐시하지 않음 (OCR 설치/표 영역 수정 후 다시 시도되도록)
+    cached = cache.get(digest, PARSER_VERSION) if cache else None
+    if cached and not _has_values(cached[0]):
+        cached = None
+    if cached:
+        parsed, all_text = cached
+    else:
+        parsed, all_text = parse_pdf(pdf_path)
+        if cache and _has_values(parsed):
+            cache.put(digest, PARSER_VERSION, parsed, all_text)
+
+    log = []
+    if cache:
+        log.append(event("neuro_cache", {"hit": cached is not None, "hash": digest, **cache.stats()}))
 
-    state.raw_inputs["neuro_parsed"] = parsed
-    state.log_event("neuro_parse", {"status": "ok", **parsed})
-    return state
+    # === 결과 저장 ===
+    log.append(event("neuro_parse", {"status": "ok" if _has_values(parsed) else "no_bands", **parsed}))
+    return {"neuro": NeuroBands(**parsed), "raw_inputs": {"neuro_hash": digest, "neuro_version": PARSER_VERSION},
+            "log": log}
@@ -2,59 +2,268 @@
 """
 normalize_metrics.py
 NeuroHarmony BQ2 PDF 추출 결과(metric, value) 표준화 처리
+
+출력
+- neuro_normalized.parquet/.csv : 긴 형식 (student_name, metric, value, file_name) — 확인용
+- neuro_matrix.parquet          : 넓은 형식 학생 × 표준 지표 (float32, 없는 값 NaN)
+                                  → apply_score_engine이 문자열 파싱 없이 바로 읽음
+
+실행: python -m graph.nodes.normalize_metrics
 """
 
+import difflib
+import math
+import os
+import re
+import unicodedata
+
+import numpy as np
 import pandas as pd
 import yaml
 from pathlib import Path
 
+from ..bq2_tokenizer import BANDS, CLOSED_SUFFIX
+from ..dataset import load_partitions
+
+MATRIX_PATH = "data/processed/neuro_matrix.parquet"
+# 한 학생에게 같은 지표가 여러 번 나온 경우 합계 컬럼 (예: sum__raw_wave_power)
+SUM_PREFIX = "sum__"
+
+# 값 정규화 패턴 (모듈 로드 시 1회 컴파일, 값마다 정규식 1회)
+# date: 맨 앞이 날짜/시각 (2025-09-01, 2025.9.1, 2025/09/01, 10월 3일, 13:05)
+#       또는 셀 전체가 연도 없는 날짜 (10/03, 10-03) → 숫자로 바꾸지 않음
+# num : 첫 번째 숫자 — 부호, 천 단위 쉼표, 소수, 지수 (예: "1,234.5 uV" → 1234.5, "-3.2Hz" → -3.2)
+VALUE_PATTERN = re.compile(
+    r"^\s*(?P<date>\d{4}\s*[-./년]\s*\d{1,2}\s*[-./월]\s*\d{1,2}|\d{1,2}\s*[-./]\s*\d{1,2}\s*$"
+    r"|\d{1,2}\s*월\s*\d{1,2}|\d{1,2}:\d{2}(?::\d{2})?)"
+    r"|(?P<num>[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:[eE][-+]?\d+)?|[-+]?\.\d+)"
+)
+# 지표명 비교용: 공백/구분 기호 제거
+_KEY_STRIP = re.compile(r"[\s_\-·:;,.()\[\]{}/\\]+")
+# 사전에 없는 지표명의 근사 일치 기준 (difflib 유사도)
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LEN = 4
+
+
+def metric_key(name) -> str:
+    """지표명 비교 키: NFKC 정규화 + 소문자 + 공백/구분 기호 제거 ("절대세기  원시뇌파" == "절대세기_원시뇌파")"""
+    return _KEY_STRIP.sub("", unicodedata.normalize("NFKC", str(name))).lower()
+
+
+def build_alias_index(metric_map, names=()):
+    """원본명/표준명 → 표준명 색인 (비교 키 기준), metric_map.yaml 로드 시 1회 생성"""
+    index = {metric_key(n): n for n in names}
+    for raw, std in metric_map.items():
+        index[metric_key(raw)] = std
+        index.setdefault(metric_key(std), std)
+    return index
+
+
+def map_metrics(metric: pd.Series, index) -> pd.Series:
+    """
+    원본 지표명 → 표준명 (사전에 없으면 원래 이름)
+    고유값에 대해서만 키 계산/근사 일치 → 행 수와 무관하게 지표 종류 수만큼만 연산
+    """
+    codes, uniques = pd.factorize(metric, sort=False)
+    keys = list(index)
+    mapped = []
+    for u in uniques:
+        key = metric_key(u)
+        std = index.get(key)
+        if std is None and len(key) >= FUZZY_MIN_LEN:
+            close = difflib.get_close_matches(key, keys, n=1, cutoff=FUZZY_CUTOFF)
+            std = index[close[0]] if close else None
+        mapped.append(std if std is not None else str(u))
+    # 결측 지표명(code -1)은 마지막 "nan"으로
+    lookup = np.array(mapped + ["nan"], dtype=object)
+    return pd.Series(lookup[codes], index=metric.index)
+
+
+_DICTIONARIES = {}
+
+
+def load_metric_dictionary(yaml_path="graph/metric_map.yaml"):
+    """
+    metric_map.yaml → (지표명 색인 dict, 표준 지표 Categorical dtype)
+    색인: metric_key(원본명/표준명) → 표준명, 카테고리 순서: metric_map 표준명 순 + 밴드 컬럼(L_Delta_abs ..., 폐안 L_Delta_abs_closed ...)
+    YAML 경로 + mtime 기준 캐시
+    """
+    path = os.path.abspath(str(yaml_path))
+    cache_key = (path, os.stat(path).st_mtime_ns)
+    if cache_key in _DICTIONARIES:
+        return _DICTIONARIES[cache_key]
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    metric_map = config.get("metric_map", {}) or {}
+    names = list(dict.fromkeys(metric_map.values()))
+    names += [f"{s}_{b}_{k}{c}" for c in ("", CLOSED_SUFFIX) for k in ("abs", "rel") for b in BANDS for s in ("L", "R")]
+    names = list(dict.fromkeys(names))
+    result = (build_alias_index(metric_map, names), pd.CategoricalDtype(names))
+    _DICTIONARIES.clear()
+    _DICTIONARIES[cache_key] = result
+    return result
+
+
+def _convert_unique(uniques: np.ndarray):
+    """
+    고유 값 → (숫자 배열, 표시용 문자열 배열)
+    컴파일된 패턴 1회 탐색으로 날짜/숫자를 함께 판별
+    (str.extract / astype(str)은 중간 문자열 배열을 여러 번 만들어 이 경로보다 느렸음)
+    """
+    search = VALUE_PATTERN.search
+    num = np.full(len(uniques), np.nan)
+    shown = np.empty(len(uniques), dtype=object)
+    for i, x in enumerate(uniques):
+        text = str(x).strip()
+        try:
+            # 대부분은 단위 없는 숫자 → 정규식 없이 바로 변환
+            v = float(text)
+            if not math.isfinite(v):
+                raise ValueError(text)
+        except ValueError:
+            m = search(text)
+            found = m.group("num") if m is not None else None
+            if found is None:
+                shown[i] = text
+                continue
+            v = float(found.replace(",", ""))
+        num[i] = v
+        shown[i] = str(v)
+    return num, shown
+
+
+def convert_values(value: pd.Series):
+    """
+    값 컬럼 → (숫자 Series, 표시용 문자열 Series)
+    날짜/시각은 숫자로 바꾸지 않고 원문 유지, 나머지는 첫 번째 숫자 추출 (단위/기호 무시)
+    같은 값이 반복되는 OCR 결과가 대부분이라 고유값만 변환한 뒤 코드로 펼침 (행 수가 아니라 고유값 수만큼 연산)
+    """
+    if pd.api.types.is_numeric_dtype(value):
+        num = value.astype("float64")
+        return num, num.astype(str).where(num.notna(), "nan")
+    codes, uniques = pd.factorize(value, sort=False)
+    num, shown = _convert_unique(np.asarray(uniques, dtype=object))
+    # 결측(code -1)은 마지막 NaN
+    num = np.append(num, np.nan)[codes]
+    shown = np.append(shown, np.nan)[codes]
+    return pd.Series(num, index=value.index), pd.Series(shown, index=value.index, dtype=object)
+
+
+def to_matrix(long_df, metrics=None):
+    """
+    긴 형식 (student_name, metric, value) → 학생 × 지표 float32 행렬
+    반복 지표는 평균, 2개 이상 나온 지표는 sum__{metric} 합계 컬럼 추가
+    집계는 groupby 내장 연산만 사용 (파이썬 콜백 없음)
+    """
+    values = pd.to_numeric(long_df["value"], errors="coerce") if long_df["value"].dtype == object \
+        else long_df["value"].astype("float64")
+    metric = long_df["metric"]
+    if not isinstance(metric.dtype, pd.CategoricalDtype):
+        metric = metric.astype(metrics or "category")
+    frame = pd.DataFrame({"student_name": long_df["student_name"].values,
+                          "metric": metric.values, "value": values.values})
+
+    stats = frame.groupby(["student_name", "metric"], observed=True)["value"].agg(["mean", "sum", "count"])
+    mean = stats["mean"].unstack("metric")
+    cats = [c for c in metric.dtype.categories if c in mean.columns]
+    mean = mean.reindex(columns=cats).astype("float32")
+
+    repeated = stats[stats["count"] > 1]
+    if len(repeated):
+        sums = repeated["sum"].unstack("metric")
+        sums = sums.reindex(index=mean.index, columns=[c for c in cats if c in sums.columns])
+        # 반복되지 않은 학생은 값 1개의 합 = 평균
+        sums = sums.fillna(mean[sums.columns]).astype("float32")
+        sums.columns = [f"{SUM_PREFIX}{c}" for c in sums.columns]
+        mean = pd.concat([mean, sums], axis=1)
+
+    mean.columns = [str(c) for c in mean.columns]
+    mean.index.name = "student_name"
+    return mean
+
+
+def load_matrix(path=MATRIX_PATH):
+    """
+    neuro_matrix.parquet → (평균 행렬, 합계 행렬) — apply_score_engine의 aggregates 형식
+    이전 긴 형식 파일(metric/value 컬럼)을 주면 행렬로 변환해서 반환
+    """
+    path = str(path)
+    matrix = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    if "metric" in matrix.columns:
+        matrix = to_matrix(matrix)
+    elif "student_name" in matrix.columns:
+        matrix = matrix.set_index("student_name")
+    return split_sums(matrix)
+
+
+def split_sums(matrix):
+    """행렬 → (평균 행렬, 합계 행렬) — sum__ 컬럼 분리"""
+    sum_cols = [c for c in matrix.columns if c.startswith(SUM_PREFIX)]
+    sums = matrix[sum_cols].rename(columns=lambda c: c[len(SUM_PREFIX):])
+    return matrix.drop(columns=sum_cols), sums
+
+
+def normalize_frame(df, metric_index, metrics):
+    """
+    추출 결과 (metric, value, student_name, file_name) → 표준 지표명(Categorical) + value_num
+    metric_index: load_metric_dictionary의 지표명 색인
+    value는 숫자면 float 문자열, 날짜 등은 원문 / 사전에 없는 지표는 원래 이름으로 카테고리 추가
+    반환: (정규화된 프레임, 확장된 지표 dtype)
+    """
+    normalized = map_metrics(df["metric"], metric_index)
+    known = set(metrics.categories)
+    extra = [m for m in pd.unique(normalized) if m not in known]
+    if extra:
+        metrics = pd.CategoricalDtype(list(metrics.categories) + extra)
+
+    value_num, value = convert_values(df["value"])
+    out = pd.DataFrame({
+        "student_name": df["student_name"].values,
+        "metric": normalized.astype(metrics).values,
+        "value": value.values,
+        "value_num": value_num.values,
+        "file_name": df["file_name"].values if "file_name" in df.columns else None,
+    })
+    return out, metrics
+
+
 def normalize_metrics(input_path="data/processed/neuro_df.csv",
                       yaml_path="graph/metric_map.yaml",
-                      output_path="data/processed/neuro_normalized.parquet"):
-    # === YAML 로드 ===
-    with open(yaml_path, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
-    metric_map = config.get("metric_map", {})
-
-    # === 데이터 로드 ===
-    df = pd.read_csv(input_path)
-    print(f"📄 원본 데이터 로드 완료: {len(df)}행")
+                      output_path="data/processed/neuro_normalized.parquet",
+                      matrix_path=MATRIX_PATH):
+    # === 지표 사전 로드 ===
+    metric_index, metrics = load_metric_dictionary(yaml_path)
 
-    # === metric 표준화 ===
-    df["normalized_metric"] = df["metric"].map(metric_map).fillna(df["metric"])
+    # === 데이터 로드 (증분 배치 파티션 → parquet → CSV 순으로 우선) ===
+    dataset_dir = Path(input_path).with_suffix("")
+    parquet_input = Path(input_path).with_suffix(".parquet")
+    if dataset_dir.is_dir():
+        df = load_partitions(dataset_dir)
+    elif parquet_input.exists():
+        df = pd.read_parquet(parquet_input)
+    else:
+        df = pd.read_csv(input_path)
+    print(f"📄 원본 데이터 로드 완료: {len(df)}행")
 
-    # === value 타입 변환 ===
-    def convert_value(v):
-        try:
-            # 날짜형은 그대로 둠
-            if any(x in str(v) for x in [".", ":", "-"]) and not str(v).replace(".", "", 1).isdigit():
-                return str(v)
-            return float(str(v).replace(",", "").strip())
-        except:
-            return str(v)
-    df["value_clean"] = df["value"].apply(convert_value)
-
-    # === 컬럼 정리 ===
-    df = df[["student_name", "normalized_metric", "value_clean", "file_name"]]
-    df.rename(columns={
-        "normalized_metric": "metric",
-        "value_clean": "value"
-    }, inplace=True)
-
-    # === 저장 ===
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    # value 컬럼 문자열로 통일 후 저장
-    df["value"] = df["value"].astype(str)
+    df, metrics = normalize_frame(df, metric_index, metrics)
 
-    df.to_parquet(output_path, index=False)
-    df.to_csv(output_path.replace(".parquet", ".csv"), index=False, encoding="utf-8-sig")
+    # === 넓은 형식 행렬 저장 ===
+    matrix = to_matrix(df[["student_name", "metric", "value_num"]].rename(columns={"value_num": "value"}))
+    Path(matrix_path).parent.mkdir(parents=True, exist_ok=True)
+    matrix.reset_index().to_parquet(matrix_path, index=False)
 
+    # === 긴 형식 (확인용) ===
+    long_df = df[["student_name", "metric", "value", "file_name"]]
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    long_df.to_parquet(output_path, index=False)
+    long_df.to_csv(output_path.replace(".parquet", ".csv"), index=False, encoding="utf-8-sig")
 
     print("\n✅ 표준화 완료!")
-    print(f"총 {len(df)}행 → 저장 위치: {output_path}")
+    print(f"총 {len(long_df)}행 → 저장 위치: {output_path}")
+    print(f"학생 × 지표 행렬: {matrix.shape[0]} × {matrix.shape[1]} → {matrix_path}")
     print("\n📊 미리보기:")
-    print(df.head(10).to_string(index=False))
-    return df
+    print(long_df.head(10).to_string(index=False))
+    return matrix
 
 if __name__ == "__main__":
     normalize_metrics()
@@ -1,5 +1,23 @@
-from ..state import PipelineState
+# -*- coding: utf-8 -*-
+"""
+persist_records.py
+학생 1명 최종 상태를 기록 저장소(record_store, SQLite)에 저장
 
-def run(state: PipelineState) -> PipelineState:
-    state.log_event('persist_records', {'stored': True})
-    return state
+- 학생 / 밴드 / 점수 / 플래그 / 요약 / 리포트 경로를 한 트랜잭션으로 upsert
+- defer_llm 실행은 건너뜀 (interpret_and_report_iter가 PERSIST_BATCH명씩 묶어 저장)
+- 저장 실패는 그래프를 멈추지 않고 log에만 기록
+"""
+
+from ..record_store import get_store
+from ..state import PipelineState, event
+
+
+def run(state: PipelineState) -> dict:
+    # AI 해석을 뒤로 미룬 반 전체 실행은 interpret_and_report_iter에서 묶어서 저장
+    if state.raw_inputs.get("defer_llm"):
+        return {"log": [event("persist_records", {"stored": False, "deferred": True})]}
+    try:
+        stored, skipped = get_store().persist([state])
+    except Exception as e:
+        return {"log": [event("persist_records", {"stored": False, "error": str(e)})]}
+    return {"log": [event("persist_records", {"stored": bool(stored), "skipped": skipped})]}
@@ -1,13 +1,11 @@
-from ..state import PipelineState
+from ..state import PipelineState, event
 
-def run(state: PipelineState) -> PipelineState:
-    scores = state.scores.get('values', {})
-    flags = state.scores.get('flags', [])
+def run(state: PipelineState) -> dict:
+    scores = state.scores.values
+    flags = list(state.scores.flags)
     insights = {
         'summary': f"요약: 핵심 지표 {scores}.",
         'risk': flags,
         'guidance': ['학부모 소통 강화','주 2회 집중력 훈련 활동'],
     }
-    state.analysis = insights
-    state.log_event('rag_interpreter', insights)
-    return state
+    return {'analysis': insights, 'log': [event('rag_interpreter', insights)]}
@@ -1,27 +1,49 @@
-import pandas as pd
-from ..state import PipelineState
+from dataclasses import replace
 
-def run(state: PipelineState) -> PipelineState:
+from ..state import PipelineState, Scores, Student, event
+from ..forms_table import load_forms_table
+from ..score_table import load_score_table
+from ..student_registry import resolve_pdf
+
+def run(state: PipelineState) -> dict:
     forms_csv = state.raw_inputs.get("forms_csv")
-    df = pd.read_csv(forms_csv, sep=None, engine="python", encoding="utf-8-sig") if forms_csv else pd.DataFrame()
+    table = state.raw_inputs.get("forms_table")
+    if table is None and forms_csv:
+        table = load_forms_table(forms_csv)
 
-    sid = None
+    # validate_schema가 학생 명부로 정한 학번 (단독 호출이면 여기서 명부 조회)
+    sid = state.student.student_id if state.student.student_id != "-" else None
     neuro_pdf = state.raw_inputs.get("neuro_pdf")
-    if neuro_pdf:
-        # 예: data/raw/neuro\S001_홍길동_2025-09-01.pdf → "S001"
-        sid = str(neuro_pdf).split("\\")[-1].split("_")[0].upper()
+    if sid is None and neuro_pdf:
+        sid = resolve_pdf(neuro_pdf, *([forms_csv] if forms_csv else [])).student_id
 
-    # 매칭 행 찾기
-    if sid and not df.empty:
-        row = df[df["student_id"].str.upper() == sid]
-        if not row.empty:
-            student_data = row.iloc[0].to_dict()
-            # ✅ LangGraph는 dict 형태로 저장해야 함 (Pydantic 모델 금지)
-            state.student = {**student_data}
-            state.log_event("score_engine", {"matched_student": student_data})
+    log = []
+    # 매칭 행 찾기 (student_id 인덱스 조회)
+    if sid and table is not None and table.records:
+        student_data = table.row(sid)
+        if student_data is not None:
+            student = Student.from_row(student_data)
+            # 행에 이름/학년이 없으면 validate_schema가 정한 값(명부/파일명) 유지
+            keep = {f: state.student.get(f) for f in ("name", "grade")
+                    if student.get(f) == "-" and state.student.get(f) != "-"}
+            if keep:
+                student = replace(student, **keep)
+            log.append(event("score_engine", {"matched_student": student_data}))
         else:
-            state.student = {"student_id": sid, "name": "-", "grade": "-"}
+            student = Student(student_id=sid)
     else:
-        state.student = {"student_id": sid or "Unknown", "name": "-", "grade": "-"}
+        student = Student(student_id=sid or "Unknown")
+    update = {"student": student, "log": log}
+
+    # 점수는 반 전체 일괄 계산 결과(score_table)에서 조회 (NH_Input/MC_SelfTest가 바뀔 때만 재계산)
+    try:
+        scores = load_score_table(state.raw_inputs.get("nh_input_csv"), state.raw_inputs.get("mc_selftest_csv"))
+    except Exception as e:
+        scores = None
+        log.append(event("score_engine", {"score_table_error": str(e)}))
+    found = scores.scores(sid) if scores is not None else None
+    if found is not None:
+        update["scores"] = Scores(**found)
+        log.append(event("score_engine", {"flags": found["flags"]}))
 
-    return state
+    return update
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+stream_batch.py
+BQ2 배치 스트리밍 파이프라인: 추출 → 표준화 → 점수 → 리포트 (중간 CSV/parquet 없이 메모리에서 연결)
+
+batch_extract_bq2_metrics / normalize_metrics / apply_score_engine / generate_reports 네 단계를
+학생(PDF) 단위 제너레이터 체인으로 연결한다. PDF는 한 번만 읽고, 학생마다 리포트 1개를 쓰며,
+마지막에 neuro_scored.csv만 저장한다 (--checkpoint면 neuro_df / neuro_matrix parquet도 저장).
+점수 계산식에 minmax 등 반 전체 기준 식이 있으면 점수 단계에서만 모아서 한 번에 계산한다.
+
+실행: python -m graph.nodes.stream_batch --workers 8
+"""
+
+import argparse
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+import pandas as pd
+
+from ..batch_runner import run_batch
+from ..score_store import refresh_scores, write_stats
+from ..formula import Plan, load_plan
+from ..report_renderer import render_reports, report_path
+from .batch_extract_bq2_metrics import extract_metrics_from_pdf
+from .normalize_metrics import load_metric_dictionary, normalize_frame, split_sums, to_matrix
+
+
+def extract_stage(pdf_files, workers=None, chunksize=1, timeout=None) -> Iterator[Tuple[Path, pd.DataFrame]]:
+    """PDF → 추출 행 (완료 순서대로)"""
+    for res in run_batch(extract_metrics_from_pdf, pdf_files, workers=workers,
+                         chunksize=chunksize, timeout=timeout, ordered=False):
+        if not res.ok:
+            print(f"⚠️ {res.item.name} 처리 중 오류: {res.error}")
+            continue
+        print(f"📘 추출 완료: {res.item.name} ({res.elapsed:.2f}초)")
+        if not res.value.empty:
+            yield res.item, res.value
+
+
+def normalize_stage(records: Iterable[Tuple[Path, pd.DataFrame]], yaml_path="graph/metric_map.yaml",
+                    checkpoint=None) -> Iterator[pd.DataFrame]:
+    """추출 행 → 학생 1명 × 표준 지표 행렬 (float32)"""
+    metric_index, metrics = load_metric_dictionary(yaml_path)
+    for _, df in records:
+        if checkpoint is not None:
+            checkpoint["neuro_df"].append(df)
+        norm, metrics = normalize_frame(df, metric_index, metrics)
+        row = to_matrix(norm[["student_name", "metric", "value_num"]].rename(columns={"value_num": "value"}))
+        if checkpoint is not None:
+            checkpoint["neuro_matrix"].append(row)
+        yield row
+
+
+def score_stage(rows: Iterable[pd.DataFrame], plan: Plan) -> Iterator[pd.Series]:
+    """학생 행렬 → 점수 행 (반 전체 기준 식이 있으면 모두 모은 뒤 한 번에 평가)"""
+    if plan.cohort:
+        rows = list(rows)
+        if not rows:
+            return
+        wide, sums = split_sums(pd.concat(rows))
+        scored = plan.evaluate(wide, aggregates={"mean": wide, "sum": sums})
+        for name, row in scored.iterrows():
+            yield row.rename(name)
+        return
+    for row in rows:
+        wide, sums = split_sums(row)
+        scored = plan.evaluate(wide, aggregates={"mean": wide, "sum": sums})
+        for name, out in scored.iterrows():
+            yield out.rename(name)
+
+
+def report_stage(scored: Iterable[pd.Series], output_dir="report/pdf",
+                 chunksize: int = 25) -> Iterator[Tuple[pd.Series, Path]]:
+    """점수 행 → 학생 리포트 PDF (chunksize명씩 묶어 render_reports로 그림 → 폰트 로드/서브셋은 묶음당 1회)"""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    def flush(rows):
+        done = set(render_reports([(row.name, row.to_dict()) for row in rows], output_dir,
+                                  workers=1, chunksize=len(rows)))
+        for row in rows:
+            path = report_path(output_dir, row.name)
+            if str(path) in done:
+                print(f"✅ {row.name} 리포트 생성 완료 → {path}")
+            else:
+                path = None
+            yield row, path
+
+    batch = []
+    for row in scored:
+        batch.append(row)
+        if len(batch) >= chunksize:
+            yield from flush(batch)
+            batch = []
+    if batch:
+        yield from flush(batch)
+
+
+def stream_batch(neuro_dir="data/raw/neuro", output_dir="data/processed", report_dir="report/pdf",
+                 yaml_path="graph/score_engine.yaml", metric_map_path="graph/metric_map.yaml",
+                 workers=None, chunksize=1, timeout=None, checkpoint=False, reports=True):
+    pdf_files = sorted(Path(neuro_dir).glob("*.pdf"))
+    if not pdf_files:
+        print("❌ PDF 파일이 감지되지 않았습니다.")
+        return None
+
+    plan = load_plan(yaml_path)
+    saved = {"neuro_df": [], "neuro_matrix": []} if checkpoint else None
+
+    records = extract_stage(pdf_files, workers, chunksize, timeout)
+    rows = normalize_stage(records, metric_map_path, saved)
+    scored = score_stage(rows, plan)
+    if reports:
+        scored = (row for row, _ in report_stage(scored, report_dir))
+
+    results = list(scored)
+    if not results:
+        print("⚠️ 추출된 데이터가 없습니다.")
+        return None
+
+    # === 최종 산출물 ===
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    scored_df = pd.DataFrame(results)
+    scored_df.index.name = "student_name"
+    scored_df = scored_df.reset_index()
+    scored_df.to_csv(output_dir / "neuro_scored.csv", index=False, encoding="utf-8-sig")
+    write_stats(scored_df, output_dir / "neuro_scored.csv")
+    # 학교/학년/측정 월 파티션 저장소도 갱신 (대시보드는 필요한 부분만 읽음, 실패해도 계산 결과는 유지)
+    refresh_scores(scored_df)
+
+    if saved is not None:
+        pd.concat(saved["neuro_df"], ignore_index=True).to_parquet(output_dir / "neuro_df.parquet", index=False)
+        pd.concat(saved["neuro_matrix"]).reset_index().to_parquet(output_dir / "neuro_matrix.parquet", index=False)
+        print(f"💾 체크포인트 저장: {output_dir / 'neuro_df.parquet'}, {output_dir / 'neuro_matrix.parquet'}")
+
+    print("\n🎉 스트리밍 배치 완료!")
+    print(f"총 파일 수: {len(pdf_files)}개 / 학생 수: {len(scored_df)}")
+    print(f"저장 위치: {output_dir / 'neuro_scored.csv'}")
+    return scored_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="추출 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=None, help="PDF 1개당 제한 시간(초)")
+    parser.add_argument("--checkpoint", action="store_true", help="neuro_df / neuro_matrix parquet도 저장")
+    parser.add_argument("--no-reports", action="store_true", help="PDF 리포트 생성 생략")
+    args = parser.parse_args()
+    stream_batch(workers=args.workers, chunksize=args.chunksize, timeout=args.timeout,
+                 checkpoint=args.checkpoint, reports=not args.no_reports)
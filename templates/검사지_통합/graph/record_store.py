@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+record_store.py
+파이프라인 결과 저장소 (SQLite, WAL) — persist_records 노드 / 반 전체 배치 / 대시보드 조회 공용
+
+테이블 (모두 student_id 기준)
+- students  : 학번 / 이름 / 학년 / 기타 forms 컬럼(JSON)
+- bands     : neuro_parse 밴드별 상대세기 (NeuroBands 필드)
+- scores    : 점수 (긴 형식 student_id, metric, value)
+- flags     : 리스크 플래그 (순번, label, severity, 원본 JSON)
+- summaries : AI 교사 도우미 해석
+- artifacts : Artifacts.csv와 같은 컬럼 (원본 PDF, 대상별 리포트 경로, 내용 해시, 파서 버전, 갱신 시각)
+
+persist(states): 상태 여러 개를 트랜잭션 1번 + 테이블별 executemany로 기록
+(scores/flags는 해당 학생 행을 지우고 다시 넣어 이전 실행의 남은 항목이 없도록 함)
+
+실행: python -m graph.record_store --artifacts-csv ../../storage/inputs/Artifacts.csv
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .state import NeuroBands, PipelineState
+
+RECORD_DB = os.getenv("NH_RECORD_DB") or str(Path(__file__).resolve().parents[1] / "data" / "processed" / "records.sqlite")
+# 반 전체 배치에서 한 트랜잭션에 모을 학생 수
+PERSIST_BATCH = int(os.getenv("NH_PERSIST_BATCH", "200"))
+
+BAND_COLUMNS = [f.name for f in fields(NeuroBands) if f.name != "source"]
+ARTIFACT_COLUMNS = ["student_id", "source_file_url", "report_parent_pdf", "report_teacher_pdf",
+                    "report_institution_pdf", "hash", "version", "updated_at"]
+# 학번을 알 수 없는 상태 (validate_schema / score_engine 기본값)
+_NO_SID = {"", "-", "UNKNOWN", "NONE"}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS students ("
+    " student_id TEXT PRIMARY KEY, name TEXT, grade TEXT, extra TEXT, updated_at REAL)",
+    "CREATE TABLE IF NOT EXISTS bands ("
+    " student_id TEXT PRIMARY KEY, " + ", ".join(f"{c} REAL" for c in BAND_COLUMNS) + ", source TEXT, updated_at REAL)",
+    "CREATE TABLE IF NOT EXISTS scores ("
+    " student_id TEXT NOT NULL, metric TEXT NOT NULL, value REAL, PRIMARY KEY (student_id, metric))",
+    "CREATE TABLE IF NOT EXISTS flags ("
+    " student_id TEXT NOT NULL, seq INTEGER NOT NULL, label TEXT, severity TEXT, data TEXT,"
+    " PRIMARY KEY (student_id, seq))",
+    "CREATE TABLE IF NOT EXISTS summaries ("
+    " student_id TEXT PRIMARY KEY, summary TEXT, updated_at REAL)",
+    "CREATE TABLE IF NOT EXISTS artifacts ("
+    " student_id TEXT PRIMARY KEY, source_file_url TEXT, report_parent_pdf TEXT, report_teacher_pdf TEXT,"
+    " report_institution_pdf TEXT, hash TEXT, version TEXT, updated_at REAL)",
+)
+
+
+def _upsert(table: str, columns: List[str], key: str = "student_id") -> str:
+    updates = ", ".join(f"{c}=excluded.{c}" for c in columns if c != key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            f" ON CONFLICT({key}) DO UPDATE SET {updates}")
+
+
+_STUDENT_SQL = _upsert("students", ["student_id", "name", "grade", "extra", "updated_at"])
+_BAND_SQL = _upsert("bands", ["student_id", *BAND_COLUMNS, "source", "updated_at"])
+_SUMMARY_SQL = _upsert("summaries", ["student_id", "summary", "updated_at"])
+_ARTIFACT_SQL = _upsert("artifacts", ARTIFACT_COLUMNS)
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _float(v: Any) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if f != f else f
+
+
+def _as_state(state: Any) -> PipelineState:
+    return state if isinstance(state, PipelineState) else PipelineState(**dict(state))
+
+
+def state_rows(state: Any, now: float) -> Optional[Dict[str, list]]:
+    """상태 1개 → 테이블별 행 목록 (학번을 모르면 None)"""
+    state = _as_state(state)
+    sid = str(state.student.student_id or "").strip().upper()
+    if sid in _NO_SID:
+        return None
+    rows: Dict[str, list] = {"students": [(sid, state.student.name, state.student.grade,
+                                           _json(state.student.extra), now)]}
+
+    neuro = state.neuro
+    if any(neuro.get(c) is not None for c in BAND_COLUMNS):
+        rows["bands"] = [(sid, *(_float(neuro.get(c)) for c in BAND_COLUMNS), neuro.source, now)]
+
+    rows["scores"] = [(sid, str(k), _float(v)) for k, v in (state.scores.values or {}).items()]
+    rows["flags"] = [(sid, i, f.get("label"), f.get("severity"), _json(f))
+                     for i, f in enumerate(state.scores.flags or ())]
+
+    summary = (state.analysis or {}).get("summary")
+    if summary:
+        rows["summaries"] = [(sid, summary, now)]
+
+    raw = state.raw_inputs or {}
+    report = state.report
+    if raw.get("neuro_pdf") or report.teacher or report.md:
+        rows["artifacts"] = [(sid, str(raw.get("neuro_pdf") or ""), report.parent, report.teacher or report.md,
+                              report.institution, raw.get("neuro_hash"), raw.get("neuro_version"), now)]
+    return rows
+
+
+class RecordStore:
+    def __init__(self, path=RECORD_DB):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            # 배치 워커가 쓰는 동안 대시보드가 읽을 수 있도록 WAL (WAL에서는 NORMAL 동기화로 충분)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for sql in _SCHEMA:
+                conn.execute(sql)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def persist(self, states: Iterable[Any]) -> Tuple[int, int]:
+        """상태 여러 개를 트랜잭션 1번으로 기록 → (저장 수, 학번 없음으로 건너뛴 수)"""
+        now = time.time()
+        batch: Dict[str, list] = {t: [] for t in ("students", "bands", "scores", "flags", "summaries", "artifacts")}
+        sids, skipped = [], 0
+        for state in states:
+            rows = state_rows(state, now)
+            if rows is None:
+                skipped += 1
+                continue
+            sids.append((rows["students"][0][0],))
+            for table, values in rows.items():
+                batch[table].extend(values)
+        if not sids:
+            return 0, skipped
+
+        with self._lock:
+            db = self._db()
+            with db:
+                db.executemany(_STUDENT_SQL, batch["students"])
+                db.executemany(_BAND_SQL, batch["bands"])
+                # 점수/플래그는 학생 단위로 통째 교체
+                db.executemany("DELETE FROM scores WHERE student_id=?", sids)
+                db.executemany("DELETE FROM flags WHERE student_id=?", sids)
+                db.executemany("INSERT OR REPLACE INTO scores (student_id, metric, value) VALUES (?, ?, ?)",
+                               batch["scores"])
+                db.executemany("INSERT OR REPLACE INTO flags (student_id, seq, label, severity, data)"
+                               " VALUES (?, ?, ?, ?, ?)", batch["flags"])
+                db.executemany(_SUMMARY_SQL, batch["summaries"])
+                db.executemany(_ARTIFACT_SQL, batch["artifacts"])
+        return len(sids), skipped
+
+    # --- 조회 (대시보드) ---
+    def query(self, sql: str, params: Iterable[Any] = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._db(), params=list(params))
+
+    def class_frame(self, grade: Optional[str] = None) -> pd.DataFrame:
+        """학생별 1행: 기본 정보 + 밴드 + 해석 + 담임용 리포트 경로 (+ 점수 wide)"""
+        where, params = ("WHERE s.grade = ?", [str(grade)]) if grade is not None else ("", [])
+        df = self.query(
+            "SELECT s.student_id, s.name, s.grade, " + ", ".join(f"b.{c}" for c in BAND_COLUMNS) +
+            ", m.summary, a.report_teacher_pdf AS report, a.updated_at"
+            " FROM students s LEFT JOIN bands b USING (student_id) LEFT JOIN summaries m USING (student_id)"
+            " LEFT JOIN artifacts a USING (student_id) " + where + " ORDER BY s.student_id",
+            params,
+        )
+        scores = self.query("SELECT student_id, metric, value FROM scores")
+        if len(scores):
+            wide = scores.pivot(index="student_id", columns="metric", values="value").reset_index()
+            df = df.merge(wide, on="student_id", how="left")
+        return df
+
+    def flags_frame(self) -> pd.DataFrame:
+        return self.query("SELECT student_id, seq, label, severity FROM flags ORDER BY student_id, seq")
+
+    def artifacts_frame(self) -> pd.DataFrame:
+        """Artifacts.csv 형식 (updated_at은 UTC ISO 문자열)"""
+        df = self.query(f"SELECT {', '.join(ARTIFACT_COLUMNS)} FROM artifacts ORDER BY student_id")
+        df["updated_at"] = pd.to_datetime(df["updated_at"], unit="s").dt.strftime("%Y-%m-%dT%H:%M:%S")
+        return df
+
+    def export_artifacts(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.artifacts_frame().to_csv(path, index=False, encoding="utf-8-sig")
+        return path
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_STORES: Dict[str, RecordStore] = {}
+_STORE_LOCK = threading.Lock()
+
+
+def get_store(path=None) -> RecordStore:
+    """프로세스 공용 저장소 (NH_RECORD_DB로 경로 변경)"""
+    path = str(path or RECORD_DB)
+    with _STORE_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = RecordStore(path)
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=RECORD_DB)
+    parser.add_argument("--artifacts-csv", default=None, help="Artifacts.csv 형식으로 내보낼 경로")
+    args = parser.parse_args()
+    store = get_store(args.db)
+    print(store.class_frame().to_string(index=False))
+    if args.artifacts_csv:
+        print(f"✅ Artifacts → {store.export_artifacts(args.artifacts_csv)}")
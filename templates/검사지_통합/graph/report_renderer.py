@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+report_renderer.py
+BQ2 학생 리포트 PDF 일괄 렌더러 (FPDF)
+
+fpdf2는 문서를 저장할 때 폰트를 제자리에서 서브셋하므로 문서 간에 폰트 객체를 공유할 수 없다.
+그래서 학생마다 FPDF + add_font(NotoSansKR 전체 파싱)를 하는 대신,
+- 워커 1개가 학생 묶음(chunk)을 한 문서에 페이지로 그려 폰트 파싱/서브셋을 묶음당 1회로 줄이고
+- 완성된 묶음 PDF를 PyPDF2로 학생별 페이지 범위만큼 잘라 개별 파일로 저장한다.
+- combined_path를 주면 묶음 PDF들을 이어 붙여 반 전체 PDF 1개도 만든다.
+
+폰트 경로: NH_REPORT_FONT 또는 템플릿 폴더의 NotoSansKR-Regular.ttf
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fpdf import FPDF
+
+from .batch_runner import run_batch
+
+ROOT = Path(__file__).resolve().parents[1]
+FONT_PATH = os.getenv("NH_REPORT_FONT") or str(ROOT / "NotoSansKR-Regular.ttf")
+FONT_FAMILY = "NotoSansKR"
+
+REPORT_FIELDS = [
+    "brain_average", "brain_balance", "avg_frequency", "total_power",
+    "left_brain", "right_brain", "frequency", "raw_wave_power", "weight"
+]
+
+
+def new_document(font_path: str = FONT_PATH) -> FPDF:
+    """폰트를 1회 등록한 빈 문서"""
+    pdf = FPDF()
+    pdf.add_font(FONT_FAMILY, "", font_path)
+    return pdf
+
+
+def draw_report(pdf: FPDF, name, data):
+    """학생 1명 리포트를 새 페이지에 그림 (data: 지표명 → 값)"""
+    pdf.add_page()
+    pdf.set_font(FONT_FAMILY, "", 14)
+
+    # 제목
+    pdf.set_text_color(30, 136, 229)
+    pdf.cell(0, 10, "NeuroHarmony BQ2 학생 리포트", ln=True, align="C")
+    pdf.ln(8)
+    pdf.set_text_color(0, 0, 0)
+
+    # 기본 정보
+    pdf.set_font(FONT_FAMILY, "", 12)
+    pdf.cell(0, 10, f"학생 이름: {name}", ln=True)
+    pdf.ln(4)
+
+    # 주요 수치
+    pdf.set_font(FONT_FAMILY, "", 11)
+    for f in REPORT_FIELDS:
+        if f in data:
+            pdf.cell(60, 8, f"{f}", border=0)
+            pdf.cell(0, 8, str(round(data[f], 2) if pd.notna(data[f]) else "—"), ln=True)
+
+    # 하단 문구
+    pdf.ln(10)
+    pdf.set_font(FONT_FAMILY, "", 10)
+    pdf.set_text_color(120)
+    pdf.multi_cell(0, 6,
+        "※ 본 리포트는 NeuroHarmony BQ2 결과 기반으로 생성되었습니다.\n"
+        "비움과채움 AI교육팀 | enfedu.com",
+        align="L"
+    )
+
+
+def report_path(output_dir, name) -> Path:
+    return Path(output_dir) / f"{name}_리포트.pdf"
+
+
+def render_one(name, data, output_dir, font_path: str = FONT_PATH) -> Path:
+    """학생 1명 → PDF 1개 (스트리밍 배치 등 단건용)"""
+    pdf = new_document(font_path)
+    draw_report(pdf, name, data)
+    out = report_path(output_dir, name)
+    pdf.output(str(out))
+    return out
+
+
+def _split_pages(data: bytes, ranges: List[Tuple[int, int]], paths: List[Path]):
+    from PyPDF2 import PdfReader, PdfWriter
+
+    reader = PdfReader(io.BytesIO(data))
+    for (start, end), path in zip(ranges, paths):
+        writer = PdfWriter()
+        for i in range(start, end):
+            writer.add_page(reader.pages[i])
+        with open(path, "wb") as f:
+            writer.write(f)
+
+
+def render_chunk(job) -> Dict[str, Any]:
+    """
+    워커 프로세스에서 실행: 학생 묶음 → 묶음 PDF 1개(폰트 1회) → 학생별 파일로 분할
+    job: (items [(name, dict)], output_dir, font_path, keep_bytes)
+    """
+    items, output_dir, font_path, keep_bytes = job
+    pdf = new_document(font_path)
+    ranges = []
+    for name, data in items:
+        start = pdf.page_no()
+        draw_report(pdf, name, data)
+        ranges.append((start, pdf.page_no()))
+    data = bytes(pdf.output())
+    paths = [report_path(output_dir, name) for name, _ in items]
+    try:
+        _split_pages(data, ranges, paths)
+    except ImportError:
+        # PyPDF2가 없으면 학생별로 다시 렌더링 (폰트 재사용 없음)
+        paths = [render_one(name, d, output_dir, font_path) for name, d in items]
+    return {"paths": [str(p) for p in paths], "pdf": data if keep_bytes else None}
+
+
+def group_rows(df: pd.DataFrame, key: str = "student_name") -> List[Tuple[Any, Dict[str, Any]]]:
+    """학생별 첫 행 — 학생마다 전체 프레임을 다시 거르지 않고 한 번에 추출"""
+    first = df.drop_duplicates(key, keep="first")
+    return [(row[key], row) for row in first.to_dict("records")]
+
+
+def _chunks(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def render_reports(items: Sequence[Tuple[Any, Dict[str, Any]]], output_dir="report/pdf",
+                   workers: Optional[int] = None, chunksize: int = 25,
+                   combined_path: Optional[str] = None, font_path: str = FONT_PATH) -> List[str]:
+    """
+    [(이름, 지표 dict)] → 학생별 PDF 경로 목록
+    workers: 프로세스 수 (1이면 현재 프로세스), chunksize: 문서 1개에 그릴 학생 수
+    combined_path: 반 전체 PDF 저장 경로 (None이면 생략)
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    keep = combined_path is not None
+    jobs = [(list(c), str(output_dir), font_path, keep) for c in _chunks(list(items), max(1, chunksize))]
+
+    paths: List[str] = []
+    parts: List[bytes] = []
+    for res in run_batch(render_chunk, jobs, workers=workers):
+        if not res.ok:
+            names = ", ".join(str(n) for n, _ in res.item[0])
+            print(f"⚠️ 리포트 생성 실패 ({names}): {res.error}")
+            continue
+        paths.extend(res.value["paths"])
+        if keep:
+            parts.append(res.value["pdf"])
+
+    if keep and parts:
+        from PyPDF2 import PdfMerger
+
+        merger = PdfMerger()
+        for part in parts:
+            merger.append(io.BytesIO(part))
+        Path(combined_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(combined_path, "wb") as f:
+            merger.write(f)
+        merger.close()
+    return paths
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+report_writer.py
+리포트 파일 백그라운드 저장 (쓰기 전용 스레드 1개)
+
+노드는 submit()으로 (경로, 내용)만 넘기고 바로 다음 단계로 진행한다.
+- 임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 반쯤 쓰인 파일을 보지 않음
+- 파일을 바로 읽어야 하는 곳(대시보드 미리보기, 워커 종료 전)은 flush()로 대기
+- 프로세스 종료 시 남은 작업은 atexit에서 모두 저장
+"""
+
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Optional
+
+
+class ReportWriter:
+    def __init__(self, encoding: str = "utf-8"):
+        self.encoding = encoding
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.errors: List[str] = []
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="report-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                path, text, fut = job
+                try:
+                    self._write(path, text)
+                    fut.set_result(path)
+                except Exception as e:
+                    self.errors.append(f"{path}: {e}")
+                    print(f"⚠️ 리포트 저장 실패: {path} ({e})")
+                    fut.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: Path, text: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding=self.encoding)
+        os.replace(tmp, path)
+
+    def submit(self, path, text: str) -> Future:
+        """저장 예약 → Future(완료 시 경로)"""
+        fut: Future = Future()
+        self._ensure_thread()
+        self._queue.put((Path(path), text, fut))
+        return fut
+
+    def flush(self):
+        """지금까지 예약된 저장이 모두 끝날 때까지 대기"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+_WRITER = ReportWriter()
+atexit.register(_WRITER.close)
+
+
+def get_writer() -> ReportWriter:
+    return _WRITER
+
+
+def submit(path, text: str) -> Future:
+    return _WRITER.submit(path, text)
+
+
+def flush():
+    _WRITER.flush()
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+score_store.py
+점수 결과 파티션 저장소 (pyarrow dataset, hive 파티션)
+
+data/processed/scores/school=<학교>/grade=<학년>/month=<측정 월 YYYY-MM>/part-0.parquet
+- 학년/측정일은 NH_Input.csv(grade, measured_at) 기준, 학교 컬럼이 없으면 "default"
+- 쓰기: 이번에 계산한 파티션만 교체 (다른 학년/월 파티션은 그대로)
+  · 전체 갱신(refresh_scores, full=True)은 새 프레임에 없는 파티션을 지움
+    → 학교/학년/측정 월이 바뀐 학생의 이전 행이 옛 파티션에 남아 두 번 집계되지 않음
+- 읽기: load_scores(grade=..., since=...) → 파티션 필터 + 컬럼 선택으로 필요한 부분만 읽음
+- 요약 통계: 쓰기 때 파티션별 병합 가능한 집계(count/sum/sumsq/min/max)를 _summary.csv에 함께 기록
+  → load_summary(grade=...)는 데이터 파일을 열지 않고 평균/표준편차/최소/최대 계산
+  (neuro_scored.csv 옆에도 write_stats()로 같은 형식의 .stats.csv 기록)
+
+실행: python -m graph.score_store   (neuro_scored.csv + NH_Input.csv → 저장소 갱신)
+"""
+
+import os
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Optional, Union
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .score_table import NH_INPUT_CSV, load_score_table, save_norms
+
+SCORES_DIR = Path("data/processed/scores")
+PARTITION_SCHEMA = pa.schema([("school", pa.string()), ("grade", pa.string()), ("month", pa.string())])
+UNKNOWN = "unknown"
+_META_COLS = ["student_id", "name", "school", "grade", "multicultural", "measured_at"]
+# '_' 접두어 파일은 pyarrow dataset 탐색에서 제외됨
+SUMMARY_NAME = "_summary.csv"
+STAT_COLS = ["count", "sum", "sumsq", "min", "max"]
+
+
+def _partitioning():
+    return ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+
+def _nh_meta(nh_path: Optional[str] = None) -> pd.DataFrame:
+    path = nh_path or NH_INPUT_CSV
+    if not Path(path).exists():
+        return pd.DataFrame(columns=_META_COLS)
+    nh = pd.read_csv(path, encoding="utf-8-sig")
+    nh["student_id"] = nh["student_id"].astype(str).str.strip().str.upper()
+    nh["measured_at"] = pd.to_datetime(nh.get("measured_at"), errors="coerce")
+    nh = nh.sort_values("measured_at", kind="stable").drop_duplicates("student_id", keep="last")
+    return nh[[c for c in _META_COLS if c in nh.columns]]
+
+
+def build_score_frame(scored: Optional[pd.DataFrame] = None, nh_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    NH_Input 메타(학년/측정일) + score_table 점수 + neuro_scored(PDF 점수, 이름 기준) 결합
+    파티션 컬럼(school, grade, month)은 문자열, 모르는 값은 "unknown"
+    """
+    meta = _nh_meta(nh_path)
+    try:
+        table = load_score_table(nh_path)
+    except Exception as e:  # 점수표 계산 실패 → 메타 + PDF 점수만 저장
+        print(f"⚠️ 점수표 계산 실패: {type(e).__name__}: {e}")
+        table = None
+    # 배치 단계에서만 코호트 규준 파일 저장 (노드 조회 경로는 메모리만 갱신)
+    save_norms(table)
+    if table is not None and len(table.df):
+        meta = meta.merge(table.df, left_on="student_id", right_index=True, how="left")
+
+    if scored is not None and len(scored):
+        scored = scored.rename(columns={"student_name": "name"})
+        extra = [c for c in scored.columns if c == "name" or c not in meta.columns]
+        meta = meta.merge(scored[extra], on="name", how="outer") if "name" in meta.columns \
+            else scored[extra]
+
+    df = meta.reset_index(drop=True)
+    if "measured_at" not in df.columns:
+        df["measured_at"] = pd.NaT
+    df["measured_at"] = pd.to_datetime(df["measured_at"], errors="coerce")
+    df["school"] = df["school"].astype("string").fillna("default") if "school" in df.columns else "default"
+    df["grade"] = df["grade"].astype("string").str.replace(r"\.0$", "", regex=True).fillna(UNKNOWN) \
+        if "grade" in df.columns else UNKNOWN
+    df["month"] = df["measured_at"].dt.strftime("%Y-%m").fillna(UNKNOWN)
+    for col in ("school", "grade", "month"):
+        df[col] = df[col].astype(str)
+    return df
+
+
+def summarize(df: pd.DataFrame) -> pd.DataFrame:
+    """숫자 컬럼별 병합 가능한 집계 (index: metric, columns: count/sum/sumsq/min/max, NaN 제외)"""
+    num = df.select_dtypes(include="number")
+    arr = num.to_numpy(dtype="float64")
+    mask = ~np.isnan(arr)
+    filled = np.where(mask, arr, 0.0)
+    with np.errstate(invalid="ignore"):
+        mn = np.where(mask, arr, np.inf).min(axis=0, initial=np.inf)
+        mx = np.where(mask, arr, -np.inf).max(axis=0, initial=-np.inf)
+    out = pd.DataFrame({
+        "count": mask.sum(axis=0),
+        "sum": filled.sum(axis=0),
+        "sumsq": (filled * filled).sum(axis=0),
+        "min": np.where(np.isfinite(mn), mn, np.nan),
+        "max": np.where(np.isfinite(mx), mx, np.nan),
+    }, index=pd.Index(num.columns, name="metric"))
+    return out
+
+
+def combine_summaries(parts: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """summarize() 결과 여러 개 → 하나 (파티션 합치기)"""
+    parts = [p[STAT_COLS] for p in parts if p is not None and len(p)]
+    if not parts:
+        return pd.DataFrame(columns=STAT_COLS, index=pd.Index([], name="metric"))
+    stacked = pd.concat(parts)
+    return stacked.groupby(level="metric", sort=False).agg(
+        {"count": "sum", "sum": "sum", "sumsq": "sum", "min": "min", "max": "max"})
+
+
+def describe_summary(stats: pd.DataFrame) -> pd.DataFrame:
+    """집계 → describe()와 같은 mean / std(표본) / min / max"""
+    n = stats["count"].astype("float64")
+    mean = stats["sum"] / n.where(n > 0)
+    var = (stats["sumsq"] - stats["sum"] * mean) / (n - 1).where(n > 1)
+    return pd.DataFrame({"count": n, "mean": mean, "std": np.sqrt(var.clip(lower=0)),
+                         "min": stats["min"], "max": stats["max"]})
+
+
+def stats_path(scored_path: Union[str, Path]) -> Path:
+    """neuro_scored.csv → neuro_scored.stats.csv"""
+    p = Path(scored_path)
+    return p.with_name(p.stem + ".stats.csv")
+
+
+def write_stats(df: pd.DataFrame, scored_path: Union[str, Path]) -> Path:
+    """점수 CSV 옆에 반 전체 요약 집계 기록"""
+    path = stats_path(scored_path)
+    summarize(df).to_csv(path, encoding="utf-8-sig")
+    return path
+
+
+def load_stats(scored_path: Union[str, Path]) -> Optional[pd.DataFrame]:
+    """점수 CSV의 요약 집계 (없거나 점수 CSV보다 오래됐으면 None)"""
+    path, scored = stats_path(scored_path), Path(scored_path)
+    if not path.exists() or (scored.exists() and path.stat().st_mtime_ns < scored.stat().st_mtime_ns):
+        return None
+    return pd.read_csv(path, encoding="utf-8-sig", index_col="metric")
+
+
+def _partition_keys(df: pd.DataFrame) -> set:
+    return set(map(tuple, df[PARTITION_SCHEMA.names].astype(str).drop_duplicates().to_numpy().tolist()))
+
+
+def _drop_stale_partitions(df: pd.DataFrame, root: Path) -> int:
+    """새 프레임에 없는 (school, grade, month) 파티션 폴더 삭제 (빈 상위 폴더도 정리) → 삭제한 파티션 수"""
+    keep = _partition_keys(df)
+    pattern = "/".join(f"{n}=*" for n in PARTITION_SCHEMA.names)
+    dropped = 0
+    for leaf in list(root.glob(pattern)):
+        values = tuple(unquote(part.split("=", 1)[1]) for part in leaf.relative_to(root).parts)
+        if leaf.is_dir() and values not in keep:
+            shutil.rmtree(leaf)
+            dropped += 1
+            for parent in (leaf.parent, leaf.parent.parent):
+                if parent != root and parent.is_dir() and not any(parent.iterdir()):
+                    parent.rmdir()
+    return dropped
+
+
+def _write_partition_summaries(df: pd.DataFrame, root: Path, full: bool = False):
+    """이번 프레임의 파티션 집계만 교체 (다른 파티션 행은 유지, full이면 이번 프레임 집계로 전체 교체)"""
+    keys = PARTITION_SCHEMA.names
+    path = root / SUMMARY_NAME
+    parts = [summarize(g.drop(columns=keys)).assign(**dict(zip(keys, k))).reset_index()
+             for k, g in df.groupby(keys, sort=False)]
+    new = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["metric", *STAT_COLS, *keys])
+    if path.exists() and not full:
+        old = pd.read_csv(path, encoding="utf-8-sig", dtype={k: str for k in keys})
+        touched = _partition_keys(df)
+        keep = ~pd.Series([tuple(r) in touched for r in old[keys].to_numpy().tolist()], index=old.index, dtype=bool)
+        new = pd.concat([old[keep], new], ignore_index=True)
+    tmp = path.with_suffix(".csv.tmp")
+    new.to_csv(tmp, index=False, encoding="utf-8-sig")
+    os.replace(tmp, path)
+
+
+def write_scores(df: pd.DataFrame, root: Union[str, Path] = SCORES_DIR, full: bool = False) -> Path:
+    """
+    이번 프레임에 포함된 (school, grade, month) 파티션만 교체 (+ 파티션 요약 집계)
+    full=True: df가 전체 학생 → 프레임에 없는 파티션은 삭제 (소속이 바뀐 학생의 이전 행 제거)
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(table, root, format="parquet", partitioning=_partitioning(),
+                     basename_template="part-{i}.parquet", existing_data_behavior="delete_matching")
+    if full:
+        dropped = _drop_stale_partitions(df, root)
+        if dropped:
+            print(f"🗑️ 이번 점수에 없는 파티션 {dropped}개 제거")
+    _write_partition_summaries(df, root, full)
+    return root
+
+
+def refresh_scores(scored: Optional[pd.DataFrame] = None, nh_path: Optional[str] = None,
+                   root: Union[str, Path] = SCORES_DIR) -> Optional[Path]:
+    """
+    build_score_frame + write_scores (배치 끝의 저장소 갱신용)
+    실패해도 예외를 올리지 않고 경고만 출력 → None (neuro_scored.csv 등 본 결과는 이미 저장된 상태)
+    """
+    try:
+        frame = build_score_frame(scored, nh_path)
+        root = write_scores(frame, root, full=True)
+    except Exception as e:
+        print(f"⚠️ 점수 저장소 갱신 실패 (다음 실행에서 다시 시도): {type(e).__name__}: {e}")
+        return None
+    print(f"✅ 점수 저장소 갱신: {len(frame)}행 → {root}")
+    return root
+
+
+def scores_version(root: Union[str, Path] = SCORES_DIR) -> int:
+    """저장소 변경 감지용 값 (요약 파일 mtime, 쓰기마다 마지막에 갱신됨) — 없으면 0"""
+    path = Path(root) / SUMMARY_NAME
+    return path.stat().st_mtime_ns if path.exists() else 0
+
+
+def load_summary(grade=None, school=None, root: Union[str, Path] = SCORES_DIR) -> Optional[pd.DataFrame]:
+    """
+    파티션 요약 집계를 합쳐 describe_summary() 형식으로 반환 (데이터 파일은 읽지 않음)
+    요약 파일이 없으면 None
+    """
+    path = Path(root) / SUMMARY_NAME
+    if not path.exists():
+        return None
+    stats = pd.read_csv(path, encoding="utf-8-sig", dtype={k: str for k in PARTITION_SCHEMA.names})
+    for name, value in (("grade", grade), ("school", school)):
+        if value is None:
+            continue
+        values = [str(v) for v in (value if isinstance(value, (list, tuple, set)) else [value])]
+        stats = stats[stats[name].isin(values)]
+    return describe_summary(combine_summaries([stats.set_index("metric")]))
+
+
+def partition_values(key: str, root: Union[str, Path] = SCORES_DIR):
+    """파티션 디렉터리 이름만 보고 값 목록 (예: 학년 선택 상자) — 파일은 열지 않음"""
+    depth = PARTITION_SCHEMA.names.index(key) + 1
+    pattern = "/".join(f"{n}=*" for n in PARTITION_SCHEMA.names[:depth])
+    return sorted({p.name.split("=", 1)[1] for p in Path(root).glob(pattern) if p.is_dir()})
+
+
+def _as_ts(v: Union[str, date, datetime]) -> pd.Timestamp:
+    return pd.Timestamp(v)
+
+
+def load_scores(grade=None, since=None, until=None, school=None,
+                columns: Optional[Iterable[str]] = None, root: Union[str, Path] = SCORES_DIR) -> pd.DataFrame:
+    """
+    조건에 맞는 파티션/행만 읽기
+    grade/school: 값 하나 또는 목록, since/until: 측정일 범위 (포함, "2025-09-01" 또는 date)
+    columns: 읽을 컬럼 (None이면 전체)
+    """
+    root = Path(root)
+    if not root.exists():
+        return pd.DataFrame(columns=list(columns) if columns else [])
+    dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+
+    filters = []
+    ts_type = dataset.schema.field("measured_at").type if "measured_at" in dataset.schema.names else pa.timestamp("ns")
+    for name, value in (("grade", grade), ("school", school)):
+        if value is None:
+            continue
+        values = [str(v) for v in (value if isinstance(value, (list, tuple, set)) else [value])]
+        filters.append(ds.field(name).isin(values))
+    if since is not None:
+        since = _as_ts(since)
+        # month 파티션으로 먼저 걸러낸 뒤 측정일로 정확히 비교
+        filters.append(ds.field("month") >= since.strftime("%Y-%m"))
+        filters.append(ds.field("measured_at") >= pa.scalar(since.to_pydatetime(), ts_type))
+    if until is not None:
+        until = _as_ts(until)
+        filters.append(ds.field("month") <= until.strftime("%Y-%m"))
+        filters.append(ds.field("measured_at") <= pa.scalar(until.to_pydatetime(), ts_type))
+
+    expr = None
+    for f in filters:
+        expr = f if expr is None else expr & f
+    cols = None
+    if columns is not None:
+        names = set(dataset.schema.names)
+        cols = [c for c in columns if c in names]
+    return dataset.to_table(columns=cols, filter=expr).to_pandas()
+
+
+if __name__ == "__main__":
+    scored_path = Path("data/processed/neuro_scored.csv")
+    scored = pd.read_csv(scored_path) if scored_path.exists() else None
+    if scored is not None:
+        write_stats(scored, scored_path)
+    root = refresh_scores(scored)
+    if root is None:
+        raise SystemExit(1)
+    parts = load_scores(columns=["school", "grade", "month"], root=root)
+    print(parts.groupby(["school", "grade", "month"]).size().to_string())
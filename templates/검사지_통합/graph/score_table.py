@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+score_table.py
+반 전체 일괄 점수 계산 — NH_Input.csv + MC_SelfTest.csv를 한 번에 읽어 열 단위(벡터)로 계산
+
+- 밴드별 좌우 평균 (Theta_rel = (L_Theta_rel + R_Theta_rel) / 2 ...)
+- beta_delta_ratio / alpha_asymmetry (CSV 값이 비어 있으면 밴드 값으로 계산)
+- config/score_engine.yaml norms (formula.py로 컴파일): {id}_raw + {id} + 백분위({id}_pct)
+- profiles.risk_flags 규칙 → 학생별 플래그
+- 코호트 규준 (cohort_norms.py): {id}_raw 값을 학년/학교/다문화 코호트별 정렬 배열에 증분 반영
+  → 학생별 코호트 백분위는 O(log n) 조회 (점수표가 다시 계산돼도 바뀐 학생만 갱신)
+  → 규준 파일 저장은 save_norms (배치 / python -m graph.cohort_norms), 조회 경로에서는 쓰지 않음
+그래프 score_engine 노드는 학생별로 다시 계산하지 않고 여기서 계산된 결과를 조회한다.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from .bq2_tokenizer import BANDS
+from .cohort_norms import COHORT_DIMS, CohortNorms, get_norms, norms_path
+from .formula import FormulaError, Plan, compile_rule, load_plan
+
+ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT = ROOT.parents[1]
+NH_INPUT_CSV = os.getenv("NH_INPUT_CSV") or str(REPO_ROOT / "storage" / "inputs" / "NH_Input.csv")
+MC_SELFTEST_CSV = os.getenv("MC_SELFTEST_CSV") or str(REPO_ROOT / "storage" / "inputs" / "MC_SelfTest.csv")
+SCORE_CONFIG = ROOT / "config" / "score_engine.yaml"
+
+# 계산식에서 쓰는 밴드 별칭 (weighted_sum({beta: 0.4, theta: 0.3, alpha: 0.3}) 등) — 상대세기 좌우 평균
+BAND_ALIASES = {"delta": ("Delta",), "theta": ("Theta",), "alpha": ("Alpha",), "smr": ("SMR",),
+                "beta": ("BetaL", "BetaH"), "gamma": ("Gamma",)}
+
+_CACHE: Dict[Tuple, "ScoreTable"] = {}
+_LOCK = threading.Lock()
+
+
+@dataclass
+class ScoreTable:
+    """student_id(대문자) 인덱스 점수표 + 학생별 리스크 플래그"""
+    df: pd.DataFrame
+    flags: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    # 학생별 코호트 컬럼 (grade / school / multicultural, NH_Input에 있는 것만)
+    cohorts: Optional[pd.DataFrame] = None
+    norms: Optional[CohortNorms] = None
+    # 점수표를 만든 NH_Input 경로 (코호트 규준을 NH_Input별로 구분)
+    source: Optional[str] = None
+
+    def cohort_percentiles(self, sid: Optional[str]) -> Dict[str, Dict[str, Optional[float]]]:
+        """{norm id: {"all": .., "grade": .., "school": .., "multicultural": ..}} (규준 없으면 {})"""
+        if not sid or self.norms is None:
+            return {}
+        return self.norms.student_percentiles(str(sid).upper())
+
+    def values(self, sid: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not sid:
+            return None
+        key = str(sid).upper()
+        if key not in self.df.index:
+            return None
+        row = self.df.loc[key]
+        return {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+
+    def scores(self, sid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """PipelineState.scores 형식 {"values": {...}, "flags": [...]} (없으면 None)"""
+        values = self.values(sid)
+        if values is None:
+            return None
+        return {"values": values, "flags": list(self.flags.get(str(sid).upper(), [])),
+                "cohorts": self.cohort_percentiles(sid)}
+
+
+def _read(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df["student_id"] = df["student_id"].astype(str).str.strip().str.upper()
+    return df
+
+
+def _latest(df: pd.DataFrame, time_col: str) -> pd.DataFrame:
+    """학생별 최신 행 1개 (time_col 기준)"""
+    if time_col in df.columns:
+        df = df.assign(_t=pd.to_datetime(df[time_col], errors="coerce")).sort_values("_t", kind="stable").drop(columns="_t")
+    return df.drop_duplicates("student_id", keep="last").set_index("student_id")
+
+
+def _num(df: pd.DataFrame, cols: List[str]) -> Optional[np.ndarray]:
+    """cols가 모두 있으면 float 행렬 (n × len(cols)), 아니면 None"""
+    if not all(c in df.columns for c in cols):
+        return None
+    return df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+
+
+def _load_config(config_path) -> Tuple[Optional[Plan], List[Dict[str, Any]]]:
+    """(norms 계산 계획, risk_flags 규칙) — 설정 파일이 없거나 읽을 수 없으면 (None, []) (밴드 평균만 계산)"""
+    if not config_path or not os.path.exists(str(config_path)):
+        return None, []
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            cfg = yaml.safe_load(f) or {}
+        plan = load_plan(config_path)
+    except (yaml.YAMLError, FormulaError) as e:
+        print(f"⚠️ 점수 설정 파일 오류 → norms/리스크 규칙 없이 계산: {config_path} ({e})")
+        return None, []
+    rules = []
+    for profile in cfg.get("profiles", []):
+        if profile.get("id") == "risk_flags":
+            rules.extend(profile.get("rules", []))
+    return plan, rules
+
+
+def compute_scores(nh: pd.DataFrame, mc: Optional[pd.DataFrame] = None,
+                   plan: Optional[Plan] = None, rules: Optional[List[Dict[str, Any]]] = None) -> ScoreTable:
+    """
+    nh: NH_Input 원본 (학생별 여러 측정 가능 → 최신 측정 사용)
+    mc: MC_SelfTest 원본 (학생별 최신 제출 사용)
+    plan: config/score_engine.yaml norms 계산 계획, rules: risk_flags 규칙
+    """
+    nh = _latest(nh, "measured_at")
+    mc = _latest(mc, "submitted_at") if mc is not None and len(mc) else None
+    ids = nh.index.union(mc.index) if mc is not None else nh.index
+    nh = nh.reindex(ids)
+    out = pd.DataFrame(index=ids)
+
+    # 1) 밴드별 좌우 평균 — (n × 2) 행렬 평균 한 번
+    for kind in ("abs", "rel"):
+        for band in BANDS:
+            lr = _num(nh, [f"L_{band}_{kind}", f"R_{band}_{kind}"])
+            if lr is not None:
+                out[f"{band}_{kind}"] = lr.mean(axis=1)
+
+    # 2) 파생 지표 (CSV 값 우선, 비어 있으면 계산)
+    abs_ = {b: out.get(f"{b}_abs") for b in BANDS}
+    if abs_["Delta"] is not None and abs_["BetaL"] is not None and abs_["BetaH"] is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bdr = (abs_["BetaL"] + abs_["BetaH"]) / abs_["Delta"].replace(0, np.nan)
+        out["beta_delta_ratio"] = bdr
+    lr = _num(nh, ["L_Alpha_abs", "R_Alpha_abs"])
+    if lr is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["alpha_asymmetry"] = (lr[:, 1] - lr[:, 0]) / (lr[:, 0] + lr[:, 1])
+    for col in ("beta_delta_ratio", "alpha_asymmetry", "noise_index"):
+        if col in nh.columns:
+            given = pd.to_numeric(nh[col], errors="coerce")
+            out[col] = given.fillna(out[col]) if col in out.columns else given
+    # 장비 산출 attention_index는 참고값으로 보존 (점수의 attention_index는 설정 계산식 기준)
+    if "attention_index" in nh.columns:
+        out["attention_index_nh"] = pd.to_numeric(nh["attention_index"], errors="coerce")
+
+    cohorts = nh[[d for d in COHORT_DIMS if d in nh.columns]]
+    if plan is None:
+        return ScoreTable(out, {}, cohorts)
+
+    # 3) norms — 입력 프레임(밴드 별칭 + 설문 문항)에 컴파일된 계산식 일괄 적용
+    inputs = {}
+    for alias, bands in BAND_ALIASES.items():
+        cols = [out.get(f"{b}_rel") for b in bands]
+        if all(c is not None for c in cols):
+            inputs[alias] = sum(cols)
+    if mc is not None:
+        mc = mc.reindex(ids)
+        for col in mc.columns:
+            if col not in out.columns and col not in inputs:
+                num = pd.to_numeric(mc[col], errors="coerce")
+                if num.notna().any() or mc[col].isna().all():
+                    inputs[col] = num
+    scored = plan.evaluate(out.assign(**inputs))
+    out = scored[list(out.columns) + plan.ids]
+
+    # 4) 백분위 (반 전체 기준) — {id}_raw 가 있는 norm
+    for fid in plan.ids:
+        if fid.endswith("_raw"):
+            out[f"{fid[:-4]}_pct"] = out[fid].rank(pct=True) * 100.0
+
+    # 5) 리스크 플래그 (규칙마다 불리언 마스크 1회)
+    flags: Dict[str, List[Dict[str, Any]]] = {}
+    for rule in rules or []:
+        try:
+            mask = compile_rule(rule["when"]).evaluate(out)
+        except FormulaError as e:
+            print(f"⚠️ 리스크 규칙 평가 실패 ({rule.get('when')}): {e}")
+            continue
+        hit = out.index[np.asarray(pd.Series(mask, index=out.index).fillna(False), dtype=bool)]
+        for sid in hit:
+            flags.setdefault(sid, []).extend(dict(t) for t in rule.get("then", []))
+
+    return ScoreTable(out, flags, cohorts)
+
+
+def update_norms(table: ScoreTable, norms: Optional[CohortNorms] = None, save_path=None) -> CohortNorms:
+    """
+    점수표의 {id}_raw 값으로 코호트 규준 갱신 (점수표 = 전체 모집단, 빠진 학생은 제거)
+    정규화 점수(minmax)는 반 구성이 바뀌면 같이 바뀌므로 원점수 기준으로 규준을 만든다.
+    기본은 메모리만 갱신 — save_path를 준 경우에만 바뀐 규준을 파일에 저장
+    """
+    norms = norms if norms is not None else get_norms(table.source)
+    raw = [c for c in table.df.columns if c.endswith("_raw")]
+    if raw:
+        frame = table.df[raw].rename(columns=lambda c: c[:-4])
+        if table.cohorts is not None:
+            frame = frame.join(table.cohorts)
+        changes = norms.update(frame, metrics=[c[:-4] for c in raw], drop_missing=True)
+        if (changes["added"] or changes["changed"] or changes["removed"]) and save_path:
+            norms.save(save_path)
+    table.norms = norms
+    return norms
+
+
+def save_norms(table: Optional[ScoreTable]) -> Optional[Path]:
+    """점수표의 코호트 규준을 NH_Input별 파일(norms_path)에 저장 (배치 / CLI용, 실패해도 예외 없이 None)"""
+    if table is None or table.norms is None:
+        return None
+    try:
+        return table.norms.save(norms_path(table.source))
+    except OSError as e:
+        print(f"⚠️ 코호트 규준 저장 실패: {e}")
+        return None
+
+
+def _stamp(path: Optional[str]):
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def load_score_table(nh_path: Optional[str] = None, mc_path: Optional[str] = None,
+                     config_path=SCORE_CONFIG) -> Optional[ScoreTable]:
+    """
+    파일이 바뀌지 않았으면 이전 계산 결과 재사용 (경로 + mtime + size + 설정 파일 기준)
+    NH_Input이 없으면 None
+    """
+    nh_path = nh_path or NH_INPUT_CSV
+    mc_path = mc_path or MC_SELFTEST_CSV
+    key = (_stamp(nh_path), _stamp(mc_path), _stamp(str(config_path)))
+    if key[0] is None:
+        return None
+    with _LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            return cached
+    mc = _read(mc_path) if key[1] else None
+    plan, rules = _load_config(config_path)
+    table = compute_scores(_read(nh_path), mc, plan, rules)
+    table.source = os.path.abspath(nh_path)
+    try:
+        update_norms(table)
+    except Exception as e:
+        print(f"⚠️ 코호트 규준 갱신 실패: {e}")
+    with _LOCK:
+        _CACHE.clear()
+        _CACHE[key] = table
+    return table
+
+
+def clear_cache():
+    with _LOCK:
+        _CACHE.clear()
+
+
+def check_config(config_path=SCORE_CONFIG) -> Dict[str, Any]:
+    """
+    설정 파일 점검: 실제 score_engine.yaml로 예시 학생(NH_Input 행 + MC_SelfTest 행)을 계산해
+    score_engine 노드와 같은 Scores가 비어 있지 않은지 확인 (실패 시 AssertionError)
+    예시 입력에 없는 컬럼을 쓰는 계산식(예: 학교 설문 H 문항)은 검사하지 않고 skipped로 반환
+    """
+    from .state import Scores
+
+    plan, rules = _load_config(config_path)
+    assert plan is not None and plan.ids, f"norms 계산식을 읽지 못함: {config_path}"
+
+    rng = np.random.default_rng(0)
+    ids = [f"CHECK{i}" for i in range(3)]
+    nh = pd.DataFrame({"student_id": ids, "grade": ["5", "5", "6"]})
+    for kind, scale in (("abs", 10.0), ("rel", 100.0 / len(BANDS))):
+        for band in BANDS:
+            for side in ("L", "R"):
+                nh[f"{side}_{band}_{kind}"] = rng.uniform(0.5, 1.5, len(ids)) * scale
+    mc = pd.DataFrame({"student_id": ids, **{f"Q{i}": rng.integers(1, 6, len(ids)) for i in range(1, 31)}})
+
+    found = compute_scores(nh, mc, plan, rules).scores(ids[0])
+    assert found is not None, "예시 학생 점수 없음"
+    scores = Scores(**found)
+    assert scores.values, "Scores.values가 비어 있음"
+
+    available = set(nh.columns) | set(mc.columns) | set(BAND_ALIASES)
+    skipped: List[str] = []
+    for f in plan.formulas:  # 의존 순서
+        deps = set(f.deps)
+        if not (deps - set(plan.ids)) <= available or deps & set(skipped):
+            skipped.append(f.id)
+            continue
+        assert scores.values.get(f.id) is not None, f"계산 결과 없음: {f.id} = {f.expr}"
+    return {"scores": scores, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default=str(SCORE_CONFIG))
+    parser.add_argument("--check", action="store_true", help="설정 파일로 예시 학생 점수 계산 점검")
+    args = parser.parse_args()
+    if args.check:
+        result = check_config(args.config)
+        print(f"✅ 설정 점검 통과: {args.config}")
+        for k, v in result["scores"].values.items():
+            print(f"  {k}: {v}")
+        if result["skipped"]:
+            print(f"⚠️ 예시 입력에 없는 항목을 써서 건너뜀: {', '.join(result['skipped'])}")
+    else:
+        table = load_score_table(config_path=args.config)
+        print("❌ NH_Input.csv가 없습니다." if table is None else table.df.to_string())
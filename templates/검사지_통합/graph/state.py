@@ -1,28 +1,155 @@
 # D:\ai-edu-stack\templates\검사지_통합\graph\state.py
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Dict, Any, List, Union
+import operator
+import time
+from dataclasses import dataclass, field, is_dataclass
+from typing import Annotated, Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class _Record:
+    """
+    불변 하위 모델 공통 (slots 데이터클래스: 인스턴스 __dict__ 없음, 바꾸려면 새 객체로 교체)
+    기존 노드/대시보드 코드를 위해 dict처럼 .get / [] 접근도 허용
+    """
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.__dataclass_fields__:
+            return getattr(self, key)
+        return (getattr(self, "extra", None) or {}).get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__dataclass_fields__ or key in (getattr(self, "extra", None) or {})
+
+
+# forms 컬럼명 → Student 필드 (validate_schema와 같은 우선순위)
+_STUDENT_COLUMNS = {
+    "student_id": ("student_id",),
+    "name": ("student_name", "name", "이름"),
+    "grade": ("grade", "학년"),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Student(_Record):
+    student_id: str = "-"
+    name: str = "-"
+    grade: str = "-"
+    # forms 행의 나머지 컬럼(Q1..Q5 등)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for f in ("student_id", "name", "grade"):
+            v = getattr(self, f)
+            if not isinstance(v, str):
+                object.__setattr__(self, f, "-" if v is None else str(v))
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Student":
+        """forms 행 dict → Student (student_name/이름 → name, 학년 → grade, 나머지 컬럼은 extra)"""
+        values, used = {}, set()
+        for name, columns in _STUDENT_COLUMNS.items():
+            for col in columns:
+                v = row.get(col)
+                if v is not None and v == v and str(v).strip():
+                    values[name] = v
+                    used.add(col)
+                    break
+        return cls(**values, extra={k: v for k, v in row.items() if k not in used and k not in _STUDENT_COLUMNS})
+
+
+@dataclass(frozen=True, slots=True)
+class NeuroBands(_Record):
+    """neuro_parse 결과: 밴드별 좌/우 평균 상대세기 (눈 뜬 상태)"""
+    delta_rel_open: Optional[float] = None
+    theta_rel_open: Optional[float] = None
+    alpha_rel_open: Optional[float] = None
+    smr_rel_open: Optional[float] = None
+    betaL_rel_open: Optional[float] = None
+    betaH_rel_open: Optional[float] = None
+    gamma_rel_open: Optional[float] = None
+    source: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Scores(_Record):
+    values: Dict[str, Optional[float]] = field(default_factory=dict)
+    flags: Tuple[Dict[str, Any], ...] = ()
+    # 코호트 백분위 {norm id: {"all" / "grade" / "school" / "multicultural": 0~100}}
+    cohorts: Dict[str, Dict[str, Optional[float]]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not isinstance(self.flags, tuple):
+            object.__setattr__(self, "flags", tuple(self.flags))
+
+
+@dataclass(frozen=True, slots=True)
+class Report(_Record):
+    """대상별 리포트 경로 (md는 대시보드 미리보기용 = 담임용)"""
+    parent: Optional[str] = None
+    teacher: Optional[str] = None
+    institution: Optional[str] = None
+    md: Optional[str] = None
+
+
+def merge_dict(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """raw_inputs 리듀서: 노드가 돌려준 키만 덮어씀"""
+    if not right:
+        return left or {}
+    return {**(left or {}), **right}
+
+
+def event(name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """log 항목 1개 (ts: 기록 시각, epoch 초)"""
+    return {"event": name, "data": payload, "ts": time.time()}
 
 
 class PipelineState(BaseModel):
     """
     LangGraph용 전역 상태
+
+    노드는 상태를 고치거나 복사하지 않고 바뀐 필드만 dict로 반환한다.
+    - log: 리스트 이어 붙이기 리듀서 → {"log": [event(...)]}
+    - raw_inputs: dict 병합 리듀서 → {"raw_inputs": {"neuro_hash": ...}}
+    - 나머지 필드: 반환한 값으로 교체 (student/neuro/scores/report는 불변 하위 모델)
+    그래프 밖에서 노드를 직접 호출할 때는 state.apply(node.run(state))
     """
-    # 학생 데이터는 dict 또는 모델 객체 모두 허용
-    student: Union[Dict[str, Any], BaseModel, None] = None
-    scores: Dict[str, Any] = {}
-    neuro: Dict[str, Any] = {}
-    analysis: Dict[str, Any] = {}
-    report: Dict[str, Any] = {}
-    validated: Dict[str, Any] = {}
-    raw_inputs: Dict[str, Any] = {}
-    log: List[Dict[str, Any]] = []
+    student: Student = Field(default_factory=Student)
+    scores: Scores = Field(default_factory=Scores)
+    neuro: NeuroBands = Field(default_factory=NeuroBands)
+    analysis: Dict[str, Any] = Field(default_factory=dict)
+    report: Report = Field(default_factory=Report)
+    validated: Dict[str, Any] = Field(default_factory=dict)
+    raw_inputs: Annotated[Dict[str, Any], merge_dict] = Field(default_factory=dict)
+    log: Annotated[List[Dict[str, Any]], operator.add] = Field(default_factory=list)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    def apply(self, update: Dict[str, Any]) -> "PipelineState":
+        """노드 반환값(변경분)을 리듀서 규칙대로 반영한 새 상태 (얕은 복사)"""
+        if not update:
+            return self
+        changes = dict(update)
+        if "log" in changes:
+            changes["log"] = self.log + list(changes["log"])
+        if "raw_inputs" in changes:
+            changes["raw_inputs"] = merge_dict(self.raw_inputs, changes["raw_inputs"])
+        model_fields = type(self).model_fields
+        for key, value in changes.items():
+            ann = model_fields[key].annotation
+            if isinstance(value, dict) and is_dataclass(ann):
+                changes[key] = ann(**value)
+        return self.model_copy(update=changes)
+
     def log_event(self, name: str, payload: Dict[str, Any]):
-        self.log.append({"event": name, "data": payload})
+        self.log.append(event(name, payload))
 
     def print_log(self):
         for item in self.log:
             print(f"[{item['event']}] {item['data']}")
-
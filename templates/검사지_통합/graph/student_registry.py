@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+student_registry.py
+학생 명부 (SQLite) + PDF → 학생 매핑 단일 API
+
+- 원본: NH_Input.csv / MC_SelfTest.csv의 student_id / 이름 / 학년
+  원본별 (mtime, 크기)가 바뀐 파일만 다시 읽어 upsert
+- forms CSV(그래프 실행 입력)는 명부 DB에 넣지 않고 메모리에서만 조회 (forms_roster)
+  → 임시/데모 forms 파일이 NH_Input의 이름·학년을 덮어쓰지 않음
+  명부에서 못 찾은 학생은 forms 행으로 찾고 (method="forms"), 명부 값이 비어 있으면 forms 값으로 보충
+- 색인: students.student_id (PK), students.name_key (정규화 이름), files.hash / files.path
+- resolve(pdf): 파일 기록(경로·크기·mtime → 내용 해시) → 파일명 학번 토큰 → 파일명 이름 토큰 순서로 조회
+  (모두 B-tree 색인 조회 O(log n)), 찾으면 files에 기록해 다음부터는 파일 조회 1번으로 끝남
+  · 파일명 규칙: S001_홍길동_2025-09-01.pdf (Windows/POSIX 경로 모두 처리)
+  · 명부에 없는 학번도 파일명에서 찾았으면 그대로 돌려준다 (method="filename")
+
+실행: python -m graph.student_registry data/raw/neuro --forms data/raw/forms_2025-10-09.csv
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, replace
+from pathlib import Path, PureWindowsPath
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .neuro_cache import file_sha256
+from .score_table import MC_SELFTEST_CSV, NH_INPUT_CSV
+
+REGISTRY_PATH = Path(__file__).resolve().parents[1] / "data" / "cache" / "student_registry.sqlite"
+
+SID_PATTERN = re.compile(r"(?<![A-Za-z0-9])(S\d{3,4})(?!\d)", re.I)
+NAME_PATTERN = re.compile(r"[가-힣]{2,}")
+NAME_COLUMNS = ("name", "student_name", "이름")
+GRADE_COLUMNS = ("grade", "학년")
+_NAME_STRIP = re.compile(r"\s+")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS students ("
+    " student_id TEXT PRIMARY KEY, name TEXT, name_key TEXT, grade TEXT, source TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_students_name_key ON students(name_key)",
+    "CREATE TABLE IF NOT EXISTS files ("
+    " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+    " hash TEXT NOT NULL, student_id TEXT NOT NULL, method TEXT, resolved_at REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_files_hash ON files(hash)",
+    "CREATE INDEX IF NOT EXISTS idx_files_student_id ON files(student_id)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+
+def name_key(name: Any) -> str:
+    """이름 비교 키 (NFKC + 공백 제거 + 소문자)"""
+    if name is None or (isinstance(name, float) and name != name):
+        return ""
+    return _NAME_STRIP.sub("", unicodedata.normalize("NFKC", str(name))).lower()
+
+
+def parse_pdf_name(pdf_path) -> Tuple[Optional[str], List[str]]:
+    """파일명 → (학번 토큰, 이름 후보 목록), 예: ...\\S001_홍길동_2025-09-01.pdf → ("S001", ["홍길동"])"""
+    stem = PureWindowsPath(str(pdf_path)).stem  # '\\'와 '/' 모두 구분자로 처리
+    m = SID_PATTERN.search(stem)
+    sid = m.group(1).upper() if m else None
+    names = [n for part in stem.split("_") for n in NAME_PATTERN.findall(part)]
+    return sid, names
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """resolve() 결과 (method: file / hash / sid / name / forms / filename / none)"""
+    student_id: Optional[str]
+    name: Optional[str] = None
+    grade: Optional[str] = None
+    method: str = "none"
+
+    @property
+    def registered(self) -> bool:
+        return self.method in ("file", "hash", "sid", "name")
+
+
+def _first(row: Dict[str, Any], columns: Iterable[str]) -> Optional[str]:
+    for c in columns:
+        v = row.get(c)
+        if v is not None and not (isinstance(v, float) and v != v) and str(v).strip():
+            return str(v).strip()
+    return None
+
+
+def _signature(path: str) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return f"{st.st_mtime_ns}|{st.st_size}"
+
+
+def _read_students(path: str) -> Dict[str, Dict[str, Optional[str]]]:
+    """CSV → {student_id(대문자): {"name", "grade"}} (student_id 컬럼이 없거나 읽기 실패면 빈 dict)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        df = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        print(f"⚠️ 명부 원본 읽기 실패: {path} ({e})")
+        return {}
+    students: Dict[str, Dict[str, Optional[str]]] = {}
+    if "student_id" not in df.columns:
+        return students
+    for rec in df.to_dict("records"):
+        sid = _first(rec, ("student_id",))
+        if not sid:
+            continue
+        cur = students.setdefault(sid.upper(), {"name": None, "grade": None})
+        cur["name"] = cur["name"] or _first(rec, NAME_COLUMNS)
+        cur["grade"] = cur["grade"] or _first(rec, GRADE_COLUMNS)
+    return students
+
+
+class StudentRegistry:
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 이 프로세스에서 마지막으로 반영한 원본별 서명 (바뀌지 않았으면 DB도 열지 않음)
+        self._seen: Dict[str, str] = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            # 배치 워커 여러 개가 동시에 조회/기록
+            conn.execute("PRAGMA journal_mode=WAL")
+            for sql in _SCHEMA:
+                conn.execute(sql)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # --- 명부 ---
+    def sync(self, *sources) -> bool:
+        """
+        원본 CSV들을 명부에 반영 — 원본별 (mtime, 크기)를 기록해 두고 바뀐 원본만 다시 읽는다.
+        같은 원본 안에서는 먼저 나온 값, 원본끼리는 나중에 반영된 값이 우선 (빈 값은 덮어쓰지 않음)
+        명부는 지우지 않고 upsert만 한다 (원본 구성이 다른 배치끼리 같은 DB를 써도 재구축 반복 없음)
+        → 반영한 원본이 있으면 True
+        """
+        paths = [os.path.abspath(str(p)) for p in (sources or (NH_INPUT_CSV, MC_SELFTEST_CSV)) if p]
+        sigs = {p: _signature(p) for p in paths}
+        if all(self._seen.get(p) == sig for p, sig in sigs.items()):
+            return False
+        with self._lock:
+            db = self._db()
+            stored = dict(db.execute("SELECT key, value FROM meta WHERE key LIKE 'src:%'").fetchall())
+            changed = [p for p, sig in sigs.items() if stored.get(f"src:{p}") != sig]
+            total = 0
+            for p in changed:
+                students = _read_students(p)
+                with db:
+                    db.executemany(
+                        "INSERT INTO students (student_id, name, name_key, grade, source) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT(student_id) DO UPDATE SET"
+                        " name=COALESCE(excluded.name, name), name_key=COALESCE(excluded.name_key, name_key),"
+                        " grade=COALESCE(excluded.grade, grade), source=excluded.source",
+                        [(sid, s["name"], name_key(s["name"]) or None, s["grade"], Path(p).name)
+                         for sid, s in students.items()],
+                    )
+                    db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"src:{p}", sigs[p]))
+                total += len(students)
+            self._seen.update(sigs)
+        if changed:
+            print(f"📇 학생 명부 갱신: 원본 {len(changed)}개 / {total}명")
+        return bool(changed)
+
+    def get(self, student_id: Optional[str]) -> Optional[Dict[str, Optional[str]]]:
+        if not student_id:
+            return None
+        with self._lock:
+            row = self._db().execute(
+                "SELECT student_id, name, grade FROM students WHERE student_id=?", (str(student_id).upper(),)
+            ).fetchone()
+        return dict(zip(("student_id", "name", "grade"), row)) if row else None
+
+    def find_by_name(self, name: str) -> List[Dict[str, Optional[str]]]:
+        key = name_key(name)
+        if not key:
+            return []
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT student_id, name, grade FROM students WHERE name_key=?", (key,)
+            ).fetchall()
+        return [dict(zip(("student_id", "name", "grade"), r)) for r in rows]
+
+    # --- PDF → 학생 ---
+    def resolve(self, pdf_path, digest: Optional[str] = None) -> Resolution:
+        """
+        PDF 경로 → Resolution
+        digest: 이미 계산한 내용 해시 (없고 파일 기록도 없으면 여기서 계산)
+        """
+        path = os.path.abspath(str(pdf_path)) if pdf_path else ""
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+
+        if st is not None:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT s.student_id, s.name, s.grade FROM files f JOIN students s USING (student_id)"
+                    " WHERE f.path=? AND f.size=? AND f.mtime_ns=?",
+                    (path, st.st_size, st.st_mtime_ns),
+                ).fetchone()
+            if row:
+                return Resolution(*row, method="file")
+            digest = digest or file_sha256(path)
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT s.student_id, s.name, s.grade FROM files f JOIN students s USING (student_id)"
+                    " WHERE f.hash=? LIMIT 1",
+                    (digest,),
+                ).fetchone()
+            if row:
+                res = Resolution(*row, method="hash")
+                self._remember(path, st, digest, res)
+                return res
+
+        sid, names = parse_pdf_name(pdf_path or "")
+        res = None
+        found = self.get(sid)
+        if found:
+            res = Resolution(found["student_id"], found["name"], found["grade"], method="sid")
+        elif not sid:
+            for cand in names:
+                matches = self.find_by_name(cand)
+                if len(matches) == 1:  # 동명이인이면 이름으로 정하지 않음
+                    m = matches[0]
+                    res = Resolution(m["student_id"], m["name"], m["grade"], method="name")
+                    break
+        if res is None:
+            return Resolution(sid, names[0] if names else None, None, method="filename" if sid else "none")
+
+        if st is not None and digest:
+            self._remember(path, st, digest, res)
+        return res
+
+    def _remember(self, path: str, st: os.stat_result, digest: str, res: Resolution):
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, hash, student_id, method, resolved_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, st.st_size, st.st_mtime_ns, digest, res.student_id, res.method, time.time()),
+                )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_REGISTRIES: Dict[str, StudentRegistry] = {}
+_REG_LOCK = threading.Lock()
+# forms CSV 경로 → (서명, {student_id: {"name", "grade"}}) — 메모리 전용
+_FORMS: Dict[str, Tuple[str, Dict[str, Dict[str, Optional[str]]]]] = {}
+_FORMS_LOCK = threading.Lock()
+
+
+def get_registry(path=None) -> StudentRegistry:
+    """프로세스 공용 명부 (설정된 NH_Input + MC_SelfTest 기준으로 최신화)"""
+    path = str(path or os.getenv("NH_STUDENT_REGISTRY") or REGISTRY_PATH)
+    with _REG_LOCK:
+        reg = _REGISTRIES.get(path)
+        if reg is None:
+            reg = _REGISTRIES[path] = StudentRegistry(path)
+    reg.sync(NH_INPUT_CSV, MC_SELFTEST_CSV)
+    return reg
+
+
+def forms_roster(path) -> Dict[str, Dict[str, Optional[str]]]:
+    """forms CSV → {student_id(대문자): {"name", "grade"}} (DB에 쓰지 않음, (mtime, 크기)가 같으면 다시 읽지 않음)"""
+    path = os.path.abspath(str(path))
+    sig = _signature(path)
+    with _FORMS_LOCK:
+        cached = _FORMS.get(path)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+    roster = _read_students(path)
+    with _FORMS_LOCK:
+        _FORMS[path] = (sig, roster)
+    return roster
+
+
+def _with_forms(res: Resolution, pdf_path, rosters: List[Dict[str, Dict[str, Optional[str]]]]) -> Resolution:
+    """명부 조회 결과를 forms 행으로 보충 (명부에 있으면 빈 이름/학년만, 없으면 학번 → 이름 순서로 forms에서 조회)"""
+    if res.registered:
+        if res.name and res.grade:
+            return res
+        for roster in rosters:
+            row = roster.get(str(res.student_id).upper())
+            if row:
+                return replace(res, name=res.name or row["name"], grade=res.grade or row["grade"])
+        return res
+
+    sid, names = parse_pdf_name(pdf_path or "")
+    if sid:
+        for roster in rosters:
+            row = roster.get(sid)
+            if row:
+                return Resolution(sid, row["name"] or res.name, row["grade"], method="forms")
+        return res
+    for cand in names:
+        key = name_key(cand)
+        hits = {s: row for roster in rosters for s, row in roster.items() if name_key(row["name"]) == key}
+        if len(hits) == 1:  # 동명이인이면 이름으로 정하지 않음
+            s, row = next(iter(hits.items()))
+            return Resolution(s, row["name"], row["grade"], method="forms")
+    return res
+
+
+def resolve_pdf(pdf_path, *forms_sources, digest: Optional[str] = None) -> Resolution:
+    """get_registry().resolve(pdf_path) + forms_sources(forms CSV) 행으로 메모리에서 보충"""
+    res = get_registry().resolve(pdf_path, digest=digest)
+    rosters = [forms_roster(p) for p in forms_sources if p]
+    return _with_forms(res, pdf_path, rosters) if rosters else res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("neuro_dir", nargs="?", default="data/raw/neuro")
+    parser.add_argument("--forms", default=None, help="명부에 없는 학생을 찾을 forms CSV (DB에는 넣지 않음)")
+    args = parser.parse_args()
+    for pdf in sorted(Path(args.neuro_dir).glob("*.pdf")):
+        r = resolve_pdf(pdf, *([args.forms] if args.forms else []))
+        print(f"{pdf.name}: {r.student_id} / {r.name or '-'} / {r.grade or '-'} ({r.method})")
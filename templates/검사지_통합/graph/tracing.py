@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+tracing.py
+LangGraph 노드 실행 추적 (노드별 wall / CPU 시간, 최대 RSS 증가량, 예외)
+
+- traced(name, run): pipeline_graph가 모든 노드를 이 래퍼로 등록
+  · 성공: 노드 변경분의 log에 {"event": "trace", ...} 1건 추가 → 상태 로그로 확인
+  · 실패: 예외 정보를 기록한 뒤 그대로 다시 발생
+- 모든 구간은 프로세스별 메모리 버퍼(최근 NH_TRACE_BUFFER개)에 쌓이고, NH_TRACE_PATH가 있으면 JSONL로 즉시 추가 기록
+  (멀티프로세스 배치도 같은 파일에 한 줄씩 추가)
+- write_chrome() / Tracer.export_chrome(): chrome://tracing / Perfetto에서 여는 Trace Event JSON
+
+실행: python -m graph.tracing outputs/trace.jsonl --chrome outputs/trace.json
+"""
+
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .state import event
+
+TRACE_PATH = os.getenv("NH_TRACE_PATH")
+# 메모리 버퍼에 남길 최근 구간 수 (오래 켜 둔 대시보드/배치 프로세스에서 무한 증가 방지)
+TRACE_BUFFER = int(os.getenv("NH_TRACE_BUFFER", "10000"))
+TRACE_EVENT = "trace"
+
+try:
+    import resource
+
+    # Linux는 KB, macOS는 byte 단위
+    _RSS_UNIT = 1 if os.uname().sysname == "Darwin" else 1024
+
+    def peak_rss() -> Optional[int]:
+        """프로세스 최대 RSS (byte)"""
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+except ImportError:  # Windows
+    try:
+        import psutil
+
+        _PROC = psutil.Process()
+
+        def peak_rss() -> Optional[int]:
+            info = _PROC.memory_info()
+            return getattr(info, "peak_wset", info.rss)
+    except ImportError:
+        def peak_rss() -> Optional[int]:
+            return None
+
+
+class Tracer:
+    """구간 기록 버퍼 (+ 선택적 JSONL 파일)"""
+
+    def __init__(self, path: Optional[str] = TRACE_PATH, maxlen: int = TRACE_BUFFER):
+        self.path = Path(path) if path else None
+        self.spans: "deque[Dict[str, Any]]" = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, span: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(span)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def export_jsonl(self, path) -> Path:
+        return write_jsonl(self.spans, path)
+
+    def export_chrome(self, path) -> Path:
+        return write_chrome(self.spans, path)
+
+
+_TRACER = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _TRACER
+
+
+def _run_label(state) -> Optional[str]:
+    raw = getattr(state, "raw_inputs", None) or {}
+    pdf = raw.get("neuro_pdf")
+    return Path(str(pdf)).stem if pdf else None
+
+
+def traced(name: str, run: Callable, tracer: Optional[Tracer] = None) -> Callable:
+    """노드 run 래퍼: 시간/메모리/예외 기록, 성공 시 변경분 log에 trace 1건 추가"""
+    tracer = tracer or _TRACER
+
+    @functools.wraps(run)
+    def wrapper(state):
+        start = time.time()
+        t0, c0, rss0 = time.perf_counter(), time.thread_time(), peak_rss()
+        span = {"node": name, "run": _run_label(state), "start": start,
+                "pid": os.getpid(), "tid": threading.get_ident()}
+        try:
+            update = run(state)
+        except Exception as e:
+            span.update(_measure(t0, c0, rss0), ok=False,
+                        error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc(limit=5))
+            tracer.record(span)
+            raise
+        span.update(_measure(t0, c0, rss0), ok=True)
+        tracer.record(span)
+
+        update = dict(update or {})
+        update["log"] = list(update.get("log") or []) + [event(TRACE_EVENT, span)]
+        return update
+
+    return wrapper
+
+
+def _measure(t0: float, c0: float, rss0: Optional[int]) -> Dict[str, Any]:
+    rss1 = peak_rss()
+    return {
+        "wall_s": round(time.perf_counter() - t0, 6),
+        "cpu_s": round(time.thread_time() - c0, 6),
+        "peak_rss_delta": (rss1 - rss0) if rss0 is not None and rss1 is not None else None,
+    }
+
+
+def node_timings(log: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """상태 log → trace 구간 목록 (대시보드 차트용)"""
+    return [item["data"] for item in log or [] if item.get("event") == TRACE_EVENT]
+
+
+def read_jsonl(path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_jsonl(spans: Iterable[Dict[str, Any]], path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for span in spans:
+            f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+    return path
+
+
+def chrome_trace(spans: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Trace Event 형식 ("X" 완료 이벤트, 마이크로초)"""
+    events = []
+    for s in spans:
+        args = {k: s.get(k) for k in ("run", "cpu_s", "peak_rss_delta", "ok", "error") if s.get(k) is not None}
+        events.append({
+            "name": s["node"], "cat": "node", "ph": "X",
+            "ts": int(s["start"] * 1e6), "dur": int(s["wall_s"] * 1e6),
+            "pid": s.get("pid", 0), "tid": s.get("tid", 0), "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome(spans: Iterable[Dict[str, Any]], path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(spans), f, ensure_ascii=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("jsonl", help="NH_TRACE_PATH로 기록한 JSONL")
+    parser.add_argument("--chrome", required=True, help="저장할 Chrome trace JSON 경로")
+    args = parser.parse_args()
+    spans = read_jsonl(args.jsonl)
+    out = write_chrome(spans, args.chrome)
+    print(f"✅ {len(spans)}개 구간 → {out}")
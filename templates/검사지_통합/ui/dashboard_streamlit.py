@@ -4,43 +4,113 @@ dashboard_streamlit.py
 NeuroHarmony BQ2 결과 요약 대시보드 (표 중심 ver.0.1)
 """
 
+import sys
 import streamlit as st
 import pandas as pd
 from pathlib import Path
 
+# streamlit run ui/dashboard_streamlit.py 로 실행해도 graph 패키지를 찾도록
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from graph.cohort_norms import COHORT_DIMS, COHORT_LABELS, CohortNorms
+from graph.score_store import (SCORES_DIR, describe_summary, load_scores, load_stats, load_summary,
+                               partition_values, scores_version, summarize)
+
 # === 페이지 설정 ===
 st.set_page_config(page_title="🧠 NeuroHarmony 반 전체 요약 대시보드", layout="wide")
 st.title("🧠 NeuroHarmony BQ2 결과 요약표")
 st.caption("비움과채움 AI교육팀 | 반 전체 데이터 기반 자동 요약 (표 중심 Ver.0.1)")
 
+
+# === 캐시 (위젯을 조작할 때마다 스크립트가 다시 실행되므로 파일이 바뀔 때만 다시 읽음) ===
+# version 인자(mtime)가 캐시 키에 들어가므로 파일이 갱신되면 자동으로 새로 읽는다.
+# '_'로 시작하는 인자(_df)는 해시하지 않음 → 큰 프레임도 (key, version)만으로 조회
+@st.cache_data(show_spinner=False, max_entries=8)
+def _read_csv(path: str, version: int) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _read_scores(grade, since, version: int) -> pd.DataFrame:
+    return load_scores(grade=grade, since=since).rename(columns={"name": "student_name"})
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _summary(source: str, key, version: int, _df: pd.DataFrame) -> pd.DataFrame:
+    """미리 계산된 요약 집계가 있으면 그대로, 없으면 (측정일 필터 등) 한 번만 계산"""
+    stats = None
+    if source == "scores" and key[1] is None:
+        stats = load_summary(grade=key[0])
+    elif source == "csv":
+        found = load_stats(key)
+        stats = describe_summary(found) if found is not None else None
+    if stats is None:
+        stats = describe_summary(summarize(_df))
+    return stats
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _csv_bytes(key, version: int, _df: pd.DataFrame) -> bytes:
+    return _df.to_csv(index=False).encode("utf-8-sig")
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _students(key, version: int, _df: pd.DataFrame):
+    """학생 이름 → 행 번호 (선택할 때마다 전체 열 비교를 하지 않도록)"""
+    return dict(_df.groupby("student_name", sort=False).indices)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _norms(key, version: int, _df: pd.DataFrame) -> CohortNorms:
+    """행 번호 기준 코호트 규준 (학생 선택 시 백분위는 O(log n) 조회만)"""
+    norms = CohortNorms()
+    norms.update(_df.reset_index(drop=True))
+    return norms
+
+
 # === 데이터 로드 ===
 data_path = Path("data/processed/neuro_scored.csv")
 
-if not data_path.exists():
+if SCORES_DIR.exists():
+    # 파티션 저장소: 선택한 학년 / 측정일 이후 데이터만 읽음
+    grades = partition_values("grade")
+    grade = st.sidebar.selectbox("학년", ["전체"] + grades)
+    since = st.sidebar.date_input("측정일 (이후)", value=None)
+    source, key = "scores", (None if grade == "전체" else grade, since or None)
+    version = scores_version()
+    df = _read_scores(key[0], key[1], version)
+elif data_path.exists():
+    source, key = "csv", str(data_path)
+    version = data_path.stat().st_mtime_ns
+    df = _read_csv(key, version)
+else:
     st.error("❌ 분석된 데이터 파일이 없습니다.\n먼저 apply_score_engine.py를 실행해 주세요.")
     st.stop()
 
-df = pd.read_csv(data_path)
+if df.empty:
+    st.warning("선택한 조건에 해당하는 데이터가 없습니다.")
+    st.stop()
 
 # === 요약 통계 ===
 st.subheader("📊 반 전체 요약 통계")
-summary = df.select_dtypes(include='number').describe().T
+summary = _summary(source, key, version, df)
 summary = summary[["mean", "std", "min", "max"]].rename(
     columns={"mean": "평균", "std": "표준편차", "min": "최소값", "max": "최대값"}
 )
+st.dataframe(summary.style.format("{:.2f}", na_rep="—"), use_container_width=True)
 
 # 👩‍🎓 학생별 주요 지표
 st.subheader("👩‍🎓 학생별 주요 지표")
+students = _students(key, version, df)
 
 # 학생 선택 박스
 cols = st.columns(2)
 with cols[0]:
-    student = st.selectbox("학생 선택", df["student_name"].unique())
+    student = st.selectbox("학생 선택", list(students))
 with cols[1]:
     st.markdown("")
 
 # 학생 데이터 필터링
-student_df = df[df["student_name"] == student]
+student_df = df.iloc[students[student]]
 
 # 학생 데이터 표시
 st.write(f"**{student} 학생 데이터 요약**")
@@ -52,12 +122,29 @@ st.dataframe(
     use_container_width=True
 )
 
-# === 파일 다운로드 ===
-st.download_button(
-    label="📥 CSV로 다운로드",
-    data=df.to_csv(index=False, encoding="utf-8-sig"),
-    file_name="neuro_scored_summary.csv",
-    mime="text/csv",
-)
+# === 코호트 비교 (학년 / 학교 / 다문화 여부) ===
+st.subheader("🏷️ 코호트 내 백분위")
+norms = _norms(key, version, df)
+row = int(students[student][-1])  # 여러 번 측정했으면 마지막 행
+pcts = pd.DataFrame(norms.student_percentiles(str(row))).T
+if pcts.empty:
+    st.caption("백분위를 계산할 숫자 지표가 없습니다.")
+else:
+    pcts = pcts[[c for c in COHORT_LABELS if c in pcts.columns]].rename(columns=COHORT_LABELS)
+    st.caption(" | ".join(f"{COHORT_LABELS[d]}: {v}" for d, v in norms.cohort_of(str(row)).items()) or "코호트 정보 없음")
+    st.dataframe(pcts.style.format("{:.1f}", na_rep="—"), use_container_width=True)
+
+dims = ["all"] + [d for d in COHORT_DIMS if d in df.columns]
+dim = st.selectbox("코호트 기준", dims, format_func=COHORT_LABELS.get)
+st.dataframe(norms.stats(dim).drop(columns="dim", errors="ignore"), use_container_width=True)
+
+# === 파일 다운로드 (요청할 때만 CSV 생성, 같은 데이터면 캐시 재사용) ===
+if st.checkbox(f"📦 CSV 다운로드 준비 ({len(df):,}행)"):
+    st.download_button(
+        label="📥 CSV로 다운로드",
+        data=_csv_bytes(key, version, df),
+        file_name="neuro_scored_summary.csv",
+        mime="text/csv",
+    )
 
 st.success("✅ 데이터 로드 및 요약 완료!")